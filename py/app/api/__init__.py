@@ -1,6 +1,9 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
-from .endpoints import task_predictions
+from .endpoints import admin, task_predictions, task_snapshots
 
 api_router = APIRouter()
 api_router.include_router(task_predictions.router, prefix="/tasks", tags=["tasks"])
+api_router.include_router(task_snapshots.router, prefix="/tasks/snapshots", tags=["snapshots"])
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"],
+                          dependencies=[Depends(admin.require_admin_token)])
@@ -0,0 +1,76 @@
+import hmac
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException
+from app.core import config
+from app.schemas.model_registry import CandidateRequest, ModelReloadRequest
+from app.models.model_registry import list_versions, set_active_version
+from app.models.model_reloader import get_model_reloader
+from app.models.candidate_scoring import get_candidate_scorer
+
+router = APIRouter()
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    # Fails closed: no configured token means no admin access at all
+    if not config.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled, TASKR_ADMIN_TOKEN is not set")
+    if not hmac.compare_digest(x_admin_token or "", config.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+def _reloader():
+    reloader = get_model_reloader()
+    if reloader is None:
+        raise HTTPException(status_code=503, detail="Model reloader is not running")
+    return reloader
+
+@router.get("/model")
+async def model_registry_status():
+    return dict(_reloader().status(), versions=list_versions())
+
+@router.post("/model/reload")
+async def reload_model(request: Optional[ModelReloadRequest] = None):
+    # Loads and warms the version next to the one being served, then swaps it in.
+    # A requested version is made the registry's active one once it loaded here,
+    # which the other worker processes pick up through their manifest watch.
+    reloader = _reloader()
+    version = request.version if request is not None else None
+    try:
+        await reloader.reload(version)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Reload failed, the previous version is still served: {e}")
+    if version is not None:
+        set_active_version(version)
+    return dict(reloader.status(), versions=list_versions())
+
+def _scorer():
+    scorer = get_candidate_scorer()
+    if scorer is None:
+        raise HTTPException(status_code=503, detail="Candidate scoring is not running")
+    return scorer
+
+@router.get("/candidate")
+async def candidate_status():
+    return _scorer().stats()
+
+@router.post("/candidate")
+async def set_candidate(request: CandidateRequest):
+    # Applies to this worker process only; set TASKR_CANDIDATE_VERSION to cover all of them
+    scorer = _scorer()
+    try:
+        await scorer.load(request.version)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Candidate failed to load: {e}")
+    if request.shadow_sample_rate is not None:
+        scorer.shadow_sample_rate = request.shadow_sample_rate
+    if request.canary_percent is not None:
+        scorer.canary_percent = request.canary_percent
+    return scorer.stats()
+
+@router.delete("/candidate")
+async def clear_candidate():
+    scorer = _scorer()
+    scorer.clear()
+    return scorer.stats()
@@ -1,117 +1,141 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
-from app.schemas.task_prediction import TaskPredictionInput, TaskPredictionOutput
-from app.models.task_prediction_model import predict_task_completion
-import pandas as pd
-from datetime import datetime, timezone
+import json
+import numpy as np
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from typing import AsyncIterator, List
+from app.core import config
+from app.schemas.task_prediction import TaskExplanationOutput, TaskPredictionInput, TaskPredictionOutput
+from app.schemas.packed_prediction import PACKED_MEDIA_TYPE
+from app.models.task_prediction_model import encode_task_features, get_model_version, risk_levels
+from app.models.candidate_scoring import get_candidate_scorer
+from app.models.drift_monitor import observe_drift
+from app.api.prediction_pipeline import (
+    MODEL_VERSION_HEADER,
+    PipelineRun,
+    run_explain_pipeline,
+    run_model,
+    run_prediction_pipeline,
+)
 
 router = APIRouter()
 
-PRIORITY_MAP = {'LOW': 1, 'MEDIUM': 2, 'HIGH': 3}
-
-@router.post("/predict_batch", response_model=List[TaskPredictionOutput])
-async def predict_batch(tasks: List[TaskPredictionInput]):
-    if not tasks:
-        raise HTTPException(status_code=400, detail="No tasks provided for prediction")
-
-    data = pd.DataFrame([task.model_dump() for task in tasks])
-
-    now = datetime.now(timezone.utc)
-    data['deadline'] = pd.to_datetime(data['deadline'], utc=True)
-    data['created_at'] = pd.to_datetime(data['created_at'], utc=True)
-
-    if 'deadline_days' not in data.columns or data['deadline_days'].isnull().any():
-        data['deadline_days'] = (data['deadline'] - now).dt.days
-    if 'created_to_deadline' not in data.columns or data['created_to_deadline'].isnull().any():
-        data['created_to_deadline'] = (data['deadline'] - data['created_at']).dt.days
-
-    data['priority'] = data['priority'].str.upper().map(PRIORITY_MAP).fillna(2).astype(int)
-
-    required_features = [
-        'duration', 'priority', 'subtasks', 'deadline_days', 'created_to_deadline',
-        'user_past_completion', 'task_type', 'description_length', 'comments_count',
-        'assigned_team_size', 'user_availability', 'no_curr_assigned_tasks', 'tasks_completed',
-         'avg_completion_time'
-    ]
-    for feat in required_features:
-        if feat not in data.columns:
-            print("feat missing: ", feat)
-            data[feat] = 0
-
-    print("data", data)
-    predictions = predict_task_completion(data)
-
-    if not predictions or len(predictions) != len(tasks):
-        raise HTTPException(status_code=500, detail="Prediction failed")
-
-    results = []
-    for i, task in enumerate(tasks):
-        completion_prob = predictions[i]
-        if completion_prob < 0.3:
-            risk_indicator = "HIGH"
-        elif completion_prob < 0.6:
-            risk_indicator = "MEDIUM"
-        else:
-            risk_indicator = "LOW"
-
-        results.append(TaskPredictionOutput(
-            task_id=getattr(task, "task_id", i),
-            completion_probability=completion_prob,
-            risk_indicator=risk_indicator
-        ))
-
-    return results
-
-@router.post("/predict", response_model=List[TaskPredictionOutput])
-async def predict_completion(tasks: List[TaskPredictionInput]):
-
-    if not tasks:
-        raise HTTPException(status_code=400, detail="No tasks provided for prediction")
-
-    data = pd.DataFrame([task.model_dump() for task in tasks])
-
-    now = datetime.now(timezone.utc)
-    data['deadline'] = pd.to_datetime(data['deadline'], utc=True)
-    data['created_at'] = pd.to_datetime(data['created_at'], utc=True)
-
-    if 'deadline_days' not in data.columns or data['deadline_days'].isnull().any():
-        data['deadline_days'] = (data['deadline'] - now).dt.days
-    if 'created_to_deadline' not in data.columns or data['created_to_deadline'].isnull().any():
-        data['created_to_deadline'] = (data['deadline'] - data['created_at']).dt.days
-
-    data['priority'] = data['priority'].str.upper().map(PRIORITY_MAP).fillna(2).astype(int)
-
-
-
-    required_features = [
-        'duration', 'priority', 'subtasks', 'deadline_days', 'created_to_deadline',
-        'user_past_completion', 'task_type', 'description_length', 'comments_count',
-        'assigned_team_size', 'user_availability', 'no_curr_assigned_tasks', 'tasks_completed', 'avg_completion_time'
-    ]
-    for feat in required_features:
-        if feat not in data.columns:
-            print("feat missing: ", feat)
-            data[feat] = 0
-
-    predictions = predict_task_completion(data)
-
-    if not predictions or len(predictions) != len(tasks):
-        raise HTTPException(status_code=500, detail="Prediction failed")
-
-    results = []
-    for i, task in enumerate(tasks):
-        completion_prob = predictions[i]
-        if completion_prob < 0.3:
-            risk_indicator = "HIGH"
-        elif completion_prob < 0.6:
-            risk_indicator = "MEDIUM"
-        else:
-            risk_indicator = "LOW"
-
-        results.append(TaskPredictionOutput(
-            task_id=getattr(task, "task_id", i),
-            completion_probability=completion_prob,
-            risk_indicator=risk_indicator
-        ))
-
-    return results
\ No newline at end of file
+# Both prediction endpoints take a JSON array of TaskPredictionInput or the
+# packed columnar format (app/schemas/packed_prediction.py)
+_PREDICT_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {"schema": {"type": "array", "items": TaskPredictionInput.model_json_schema()}},
+            PACKED_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}},
+        },
+    },
+    "responses": {"200": {"content": {PACKED_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}}}}},
+}
+
+@router.post("/predict_batch", response_model=List[TaskPredictionOutput], openapi_extra=_PREDICT_OPENAPI)
+async def predict_batch(request: Request):
+    return await run_prediction_pipeline(request, "predict_batch")
+
+@router.post("/predict", response_model=List[TaskPredictionOutput], openapi_extra=_PREDICT_OPENAPI)
+async def predict_completion(request: Request):
+    # Single-task calls from the task board go through the micro-batcher
+    return await run_prediction_pipeline(request, "predict", batched=True)
+
+@router.post("/explain_batch", response_model=List[TaskExplanationOutput],
+             openapi_extra={"requestBody": _PREDICT_OPENAPI["requestBody"]})
+async def explain_batch(request: Request):
+    # predict_batch plus per-field attributions, for up to TASKR_EXPLAIN_MAX_TASKS
+    # tasks; answered in JSON only
+    return await run_explain_pipeline(request, "explain_batch")
+
+class _LineTooLong(Exception):
+    pass
+
+class _DuplexStreamingResponse(StreamingResponse):
+    # The body iterator reads the request stream itself. The stock response
+    # would consume receive() in parallel to watch for disconnects and swallow
+    # the request body; a disconnect surfaces from request.stream() instead.
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+async def _ndjson_lines(request: Request) -> AsyncIterator[bytes]:
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        if len(buffer) > config.STREAM_MAX_LINE_BYTES:
+            raise _LineTooLong(f"NDJSON line longer than {config.STREAM_MAX_LINE_BYTES} bytes")
+        for line in lines:
+            yield line
+    yield buffer
+
+async def _score_stream(request: Request) -> AsyncIterator[bytes]:
+    # Reading the body is driven by the client consuming the response, so at
+    # most one chunk of tasks is held in memory at any time
+    index = 0
+    task_ids, tasks = [], []
+
+    async def flush():
+        run = PipelineRun("predict_stream")
+        run.rows = len(tasks)
+        with run.stage("featurize"):
+            features = encode_task_features(tasks)
+            if features is not None:
+                observe_drift(features)
+        with run.stage("infer"):
+            predictions = (await run_model(features, batched=False))[0] if features is not None else []
+        if len(predictions) != len(tasks):
+            return [json.dumps({"task_ids": task_ids, "error": "Prediction failed"}).encode() + b"\n"]
+        # Streams are shadowed but never canaried, their version header is fixed up front
+        scorer = get_candidate_scorer()
+        if scorer is not None:
+            scorer.maybe_shadow(features, predictions)
+        with run.stage("postprocess"):
+            return [
+                TaskPredictionOutput(
+                    task_id=task_id,
+                    completion_probability=prediction,
+                    risk_indicator=risk,
+                ).model_dump_json().encode() + b"\n"
+                for task_id, prediction, risk in zip(task_ids, predictions, risk_levels(np.asarray(predictions)).tolist())
+            ]
+
+    try:
+        async for line in _ndjson_lines(request):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                task = TaskPredictionInput.model_validate(record)
+            except (ValueError, ValidationError) as e:
+                yield json.dumps({"line": index, "error": str(e)}).encode() + b"\n"
+                index += 1
+                continue
+            task_id = record.get("task_id")
+            task_ids.append(task_id if isinstance(task_id, int) else index)
+            tasks.append(task)
+            index += 1
+
+            if len(tasks) >= config.STREAM_CHUNK_SIZE:
+                yield b"".join(await flush())
+                task_ids, tasks = [], []
+    except _LineTooLong as e:
+        yield json.dumps({"line": index, "error": str(e)}).encode() + b"\n"
+        return
+
+    if tasks:
+        yield b"".join(await flush())
+
+@router.post("/predict_stream")
+async def predict_stream(request: Request):
+    # Newline-delimited TaskPredictionInput records in, one TaskPredictionOutput
+    # (or {"line": n, "error": ...}) per line out, scored in fixed-size chunks.
+    # Clients have to read the response while still uploading (e.g. curl -T -);
+    # a client that only reads after sending everything stalls once the socket
+    # buffers are full, because nothing is buffered server-side.
+    # The version header is the model version when the stream started.
+    return _DuplexStreamingResponse(_score_stream(request), media_type="application/x-ndjson",
+                                    headers={MODEL_VERSION_HEADER: str(get_model_version())})
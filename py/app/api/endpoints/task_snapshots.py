@@ -0,0 +1,86 @@
+from typing import List
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+import numpy as np
+from app.core import config
+from app.schemas.task_snapshot import (
+    TaskSnapshotChanges,
+    TaskSnapshotDelta,
+    TaskSnapshotInput,
+    TaskSnapshotResponse,
+    TaskSnapshotSweep,
+)
+from app.schemas.task_prediction import TaskPredictionInput
+from app.models.task_prediction_model import get_model_version, risk_levels
+from app.models.task_snapshots import get_task_snapshot_store
+from app.api.prediction_pipeline import predict_scores
+
+router = APIRouter()
+
+# Incremental scoring for callers that keep tasks in sync with the service:
+# PUT full tasks once, PATCH only the fields that changed afterwards, and poll
+# /changes for scores the day-rollover sweep recomputed. Only tasks whose
+# derived features changed are re-scored; every response says how many were.
+
+def _store():
+    store = get_task_snapshot_store()
+    if store is None:
+        raise HTTPException(status_code=503, detail="Task snapshots are disabled")
+    return store
+
+def _scores(results) -> List[dict]:
+    risks = risk_levels(np.array([probability for _, probability, _ in results], dtype=np.float64)).tolist()
+    return [
+        {"task_id": task_id, "completion_probability": probability, "risk_indicator": risk, "recomputed": recomputed}
+        for (task_id, probability, recomputed), risk in zip(results, risks)
+    ]
+
+def _last_per_task(items, task_id):
+    # A task sent twice in one call keeps its last entry
+    return list({task_id(item): item for item in items}.values())
+
+@router.put("", response_model=TaskSnapshotResponse)
+async def put_snapshots(tasks: List[TaskSnapshotInput]):
+    tasks = _last_per_task(tasks, lambda task: task.task_id)
+    try:
+        results = await _store().put(
+            [task.task_id for task in tasks],
+            [TaskPredictionInput.model_validate(task.model_dump(exclude={"task_id"})) for task in tasks],
+            predict_scores,
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"rows": len(tasks), "recomputed": sum(1 for *_, recomputed in results if recomputed),
+            "model_version": get_model_version(), "scores": _scores(results)}
+
+@router.patch("", response_model=TaskSnapshotResponse)
+async def patch_snapshots(deltas: List[TaskSnapshotDelta]):
+    deltas = _last_per_task([delta.model_dump(exclude_unset=True) for delta in deltas], lambda delta: delta["task_id"])
+    try:
+        results, unknown = await _store().apply_delta(deltas, predict_scores)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False))
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"rows": len(deltas), "recomputed": sum(1 for *_, recomputed in results if recomputed),
+            "model_version": get_model_version(), "scores": _scores(results), "unknown_task_ids": unknown}
+
+@router.get("/changes", response_model=TaskSnapshotChanges)
+async def snapshot_changes(since: int = Query(0, ge=0), limit: int = Query(10_000, ge=1, le=100_000)):
+    store = _store()
+    seq, results = store.changes(since, limit)
+    return {"epoch": store.epoch, "seq": seq, "scores": _scores(results)}
+
+@router.post("/sweep", response_model=TaskSnapshotSweep)
+async def sweep_snapshots():
+    # The scheduled sweep, run now
+    try:
+        return await _store().sweep(predict_scores, config.SNAPSHOT_SWEEP_BATCH)
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.delete("/{task_id}", status_code=204)
+async def delete_snapshot(task_id: int):
+    if not await _store().delete(task_id):
+        raise HTTPException(status_code=404, detail=f"No snapshot for task {task_id}")
@@ -0,0 +1,271 @@
+import json
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi import HTTPException, Request, Response
+from fastapi.exceptions import RequestValidationError
+from pydantic import TypeAdapter, ValidationError
+
+from app.core import config
+from app.core.metrics import observe_stage
+from app.schemas.task_prediction import TaskPredictionInput
+from app.schemas.packed_prediction import (
+    PACKED_MEDIA_TYPE,
+    PackedFormatError,
+    PackedTasks,
+    decode_packed_tasks,
+    encode_packed_predictions,
+)
+from app.models.task_prediction_model import (
+    encode_task_columns,
+    encode_task_features,
+    get_task_feature_builder,
+    predict_versioned_features,
+    risk_codes,
+    risk_levels,
+)
+from app.models.inference_executor import get_inference_executor
+from app.models.batcher import get_prediction_batcher
+from app.models.feature_builder import TaskFeatures
+from app.models.prediction_cache import get_prediction_cache
+from app.models.candidate_scoring import get_candidate_scorer
+from app.models.drift_monitor import observe_drift
+from app.models.explanations import EXPLAINED_FIELDS, occlusion_attributions, occlusion_batch
+
+# Every prediction route runs the same stages:
+#   validate    parse the JSON or packed body into tasks
+#   featurize   derive the raw model inputs (TaskFeatures)
+#   infer       cache, micro-batcher and inference executor (or the canary
+#               candidate), then a sampled shadow run of the candidate
+#   postprocess risk buckets and response encoding
+# Each stage reports (route, stage, seconds, rows, ok) to the stage hooks.
+
+STAGES = ("validate", "featurize", "infer", "postprocess")
+MODEL_VERSION_HEADER = "X-Model-Version"
+
+StageHook = Callable[[str, str, float, int, bool], None]
+_stage_hooks: List[StageHook] = []
+
+
+def add_stage_hook(hook: StageHook):
+    _stage_hooks.append(hook)
+
+
+class PipelineStats:
+    # Per route and stage: calls, failures, rows and latency totals
+    def __init__(self):
+        self._stages: Dict[Tuple[str, str], dict] = {}
+
+    def record(self, route: str, stage: str, seconds: float, rows: int, ok: bool):
+        entry = self._stages.get((route, stage))
+        if entry is None:
+            entry = self._stages[(route, stage)] = {
+                "calls": 0, "failed": 0, "rows": 0, "total_ms": 0.0, "max_ms": 0.0,
+            }
+        entry["calls"] += 1
+        entry["failed"] += 0 if ok else 1
+        entry["rows"] += rows
+        entry["total_ms"] += seconds * 1000
+        entry["max_ms"] = max(entry["max_ms"], seconds * 1000)
+
+    def stats(self) -> dict:
+        routes: Dict[str, dict] = {}
+        for (route, stage), entry in self._stages.items():
+            routes.setdefault(route, {})[stage] = dict(
+                entry, avg_ms=entry["total_ms"] / entry["calls"] if entry["calls"] else 0.0,
+            )
+        return routes
+
+
+pipeline_stats = PipelineStats()
+add_stage_hook(pipeline_stats.record)
+add_stage_hook(observe_stage)
+
+
+class PipelineRun:
+    def __init__(self, route: str):
+        self.route = route
+        self.rows = 0
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            elapsed = time.perf_counter() - started
+            for hook in _stage_hooks:
+                hook(self.route, name, elapsed, self.rows, ok)
+
+
+async def run_model(features: TaskFeatures, batched: bool) -> Tuple[List[float], Optional[str]]:
+    # Scores and the version of the model that produced them
+    batcher = get_prediction_batcher() if batched else None
+    if batcher is not None:
+        # Single-task calls from the task board are coalesced into shared model batches
+        return await batcher.submit(features)
+    return await get_inference_executor().run(predict_versioned_features, features)
+
+
+async def predict(features: TaskFeatures, batched: bool = False) -> Tuple[List[float], Optional[str]]:
+    cache = get_prediction_cache()
+    if cache is None:
+        return await run_model(features, batched)
+    # Cache keys hold category codes, which have to be those of the model being served
+    features = features.for_categories(get_task_feature_builder().categories)
+    # Only rows whose derived features were not scored recently reach the model
+    return await cache.predict(features, lambda misses: run_model(misses, batched))
+
+
+async def predict_scores(features: TaskFeatures) -> List[float]:
+    # Scores only, for callers that keep them without a version (task snapshots)
+    return (await predict(features))[0]
+
+
+_task_list = TypeAdapter(List[TaskPredictionInput])
+
+
+def _media_type(header: str) -> str:
+    return header.split(";", 1)[0].strip().lower()
+
+
+def _wants_packed(request: Request, packed_request: bool) -> bool:
+    accepted = [_media_type(part) for part in request.headers.get("accept", "").split(",") if part.strip()]
+    if PACKED_MEDIA_TYPE in accepted:
+        return True
+    if "application/json" in accepted:
+        return False
+    # No preference (or */*): answer in the format of the request
+    return packed_request
+
+
+async def validate(request: Request):
+    content_type = _media_type(request.headers.get("content-type", "application/json"))
+    body = await request.body()
+
+    if content_type == PACKED_MEDIA_TYPE:
+        try:
+            tasks = decode_packed_tasks(body)
+        except PackedFormatError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    elif content_type in ("application/json", ""):
+        try:
+            tasks = _task_list.validate_json(body)
+        except ValidationError as e:
+            raise RequestValidationError(e.errors(include_url=False))
+    else:
+        raise HTTPException(status_code=415, detail=f"Expected application/json or {PACKED_MEDIA_TYPE}")
+
+    if not len(tasks):
+        raise HTTPException(status_code=400, detail="No tasks provided for prediction")
+    return tasks
+
+
+def featurize(tasks) -> TaskFeatures:
+    if isinstance(tasks, PackedTasks):
+        try:
+            features = encode_task_columns(tasks.numeric, tasks.task_type_names, tasks.task_type_index,
+                                           tasks.deadline_us, tasks.created_us)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    else:
+        # Derived day counts, priority mapping and task_type codes in one pass over the tasks
+        features = encode_task_features(tasks)
+    if features is None:
+        raise HTTPException(status_code=500, detail="Prediction failed")
+    observe_drift(features)
+    return features
+
+
+async def infer(features: TaskFeatures, batched: bool) -> Tuple[np.ndarray, str]:
+    # Scores and the model version that produced them
+    scorer = get_candidate_scorer()
+    predictions = None
+    if scorer is not None and scorer.take_canary():
+        # Canary traffic skips the cache and batcher, which hold the served version's scores
+        version = scorer.version
+        predictions = await scorer.predict_canary(features) or None
+    if predictions is None:
+        # Also the fallback of a failed canary call
+        predictions, version = await predict(features, batched)
+        if scorer is not None and len(predictions) == len(features):
+            scorer.maybe_shadow(features, predictions)
+    if not predictions or len(predictions) != len(features):
+        raise HTTPException(status_code=500, detail="Prediction failed")
+    return np.asarray(predictions, dtype=np.float64), str(version)
+
+
+def postprocess(request: Request, probabilities: np.ndarray, packed_request: bool) -> Response:
+    if _wants_packed(request, packed_request):
+        codes = risk_codes(probabilities, config.RISK_THRESHOLDS)
+        return Response(content=encode_packed_predictions(probabilities, codes), media_type=PACKED_MEDIA_TYPE)
+    # TaskPredictionOutput rows, serialized without a model instance per task
+    body = json.dumps([
+        {"task_id": i, "completion_probability": probability, "risk_indicator": risk}
+        for i, (probability, risk) in enumerate(zip(probabilities.tolist(), risk_levels(probabilities).tolist()))
+    ], separators=(",", ":"))
+    return Response(content=body, media_type="application/json")
+
+
+async def run_prediction_pipeline(request: Request, route: str, batched: bool = False) -> Response:
+    run = PipelineRun(route)
+    with run.stage("validate"):
+        tasks = await validate(request)
+    run.rows = len(tasks)
+    with run.stage("featurize"):
+        features = featurize(tasks)
+    with run.stage("infer"):
+        probabilities, version = await infer(features, batched)
+    with run.stage("postprocess"):
+        response = postprocess(request, probabilities, isinstance(tasks, PackedTasks))
+    response.headers[MODEL_VERSION_HEADER] = version
+    return response
+
+
+async def run_explain_pipeline(request: Request, route: str) -> Response:
+    # The prediction stages with occlusion attributions (app/models/explanations.py).
+    # The stacked batch goes straight to the served model: perturbed rows would
+    # only evict useful cache entries, and canary traffic is not explained
+    run = PipelineRun(route)
+    with run.stage("validate"):
+        tasks = await validate(request)
+        if len(tasks) > config.EXPLAIN_MAX_TASKS:
+            raise HTTPException(status_code=413, detail=f"At most {config.EXPLAIN_MAX_TASKS} tasks can be explained per call")
+    run.rows = len(tasks)
+    with run.stage("featurize"):
+        features = featurize(tasks)
+        reference = get_task_feature_builder().reference
+        if reference is None:
+            raise HTTPException(status_code=503, detail="The served model artifacts have no reference task to explain against")
+        batch = occlusion_batch(features, reference)
+    with run.stage("infer"):
+        predictions, version = await get_inference_executor().run(predict_versioned_features, batch)
+        if len(predictions) != len(batch):
+            raise HTTPException(status_code=500, detail="Prediction failed")
+    with run.stage("postprocess"):
+        probabilities, baseline, attributions = occlusion_attributions(
+            predictions, len(features), len(features.categories or []),
+        )
+        body = json.dumps([
+            {
+                "task_id": i,
+                "completion_probability": probability,
+                "risk_indicator": risk,
+                "baseline_probability": baseline,
+                "attributions": dict(zip(EXPLAINED_FIELDS, row)),
+            }
+            for i, (probability, risk, row) in enumerate(zip(
+                probabilities.tolist(), risk_levels(probabilities).tolist(), attributions.tolist(),
+            ))
+        ], separators=(",", ":"))
+    response = Response(content=body, media_type="application/json")
+    response.headers[MODEL_VERSION_HEADER] = str(version)
+    return response
+
+
+def get_pipeline_stats() -> dict:
+    return pipeline_stats.stats()
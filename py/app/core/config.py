@@ -0,0 +1,90 @@
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+# "thread" keeps the model in the API process, "process" loads one copy per worker process
+INFERENCE_EXECUTOR = os.getenv("TASKR_INFERENCE_EXECUTOR", "thread").lower()
+INFERENCE_WORKERS = _env_int("TASKR_INFERENCE_WORKERS", 2)
+
+# Dynamic micro-batching of /predict calls: a batch is flushed once it holds
+# BATCH_MAX_SIZE rows or its first request has waited BATCH_MAX_WAIT_MS
+BATCHING_ENABLED = os.getenv("TASKR_BATCHING_ENABLED", "true").lower() in ("1", "true", "yes")
+BATCH_MAX_SIZE = _env_int("TASKR_BATCH_MAX_SIZE", 64)
+BATCH_MAX_WAIT_MS = _env_int("TASKR_BATCH_MAX_WAIT_MS", 5)
+
+# "keras" serves the .keras model with the sklearn preprocessor, "numpy" runs the
+# same weights as plain NumPy matmuls after load, "bundle" serves the folded
+# NumPy weight bundle exported by the training scripts (no TensorFlow), "linear"
+# the logistic regression trained next to the network (fastest, lower accuracy)
+INFERENCE_BACKEND = os.getenv("TASKR_INFERENCE_BACKEND", "keras").lower()
+# Which exported bundle the bundle backend loads: "float32", or the smaller
+# "float16" / "int8" weight exports (computed in float32 either way)
+BUNDLE_PRECISION = os.getenv("TASKR_BUNDLE_PRECISION", "float32").lower()
+
+# Warm-up before the service reports ready: rounds of WARMUP_ROUND_SIZE calls per
+# batch size until the p99 of every batch size moves less than WARMUP_TOLERANCE
+# between rounds (or WARMUP_MAX_ROUNDS is reached)
+WARMUP_ENABLED = os.getenv("TASKR_WARMUP_ENABLED", "true").lower() in ("1", "true", "yes")
+WARMUP_BATCH_SIZES = [int(size) for size in os.getenv("TASKR_WARMUP_BATCH_SIZES", f"1,8,{BATCH_MAX_SIZE}").split(",") if size.strip()]
+WARMUP_ROUND_SIZE = _env_int("TASKR_WARMUP_ROUND_SIZE", 10)
+WARMUP_MAX_ROUNDS = _env_int("TASKR_WARMUP_MAX_ROUNDS", 5)
+WARMUP_TOLERANCE = float(os.getenv("TASKR_WARMUP_TOLERANCE", "0.1"))
+
+# In-process cache of completion probabilities keyed on the derived feature row
+CACHE_ENABLED = os.getenv("TASKR_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+CACHE_MAX_ENTRIES = _env_int("TASKR_CACHE_MAX_ENTRIES", 100_000)
+CACHE_TTL_SECONDS = _env_int("TASKR_CACHE_TTL_SECONDS", 3600)
+
+# Rows per model call on the NDJSON streaming endpoint
+STREAM_CHUNK_SIZE = _env_int("TASKR_STREAM_CHUNK_SIZE", 1000)
+STREAM_MAX_LINE_BYTES = _env_int("TASKR_STREAM_MAX_LINE_BYTES", 64 * 1024)
+
+# Tasks per /explain_batch call. Each task is scored about 20 times (once per
+# feature and task type), so this bounds one call to ~20x EXPLAIN_MAX_TASKS rows
+EXPLAIN_MAX_TASKS = _env_int("TASKR_EXPLAIN_MAX_TASKS", 500)
+
+# Risk buckets of the completion probability: HIGH below the first threshold,
+# MEDIUM below the second, LOW from there on
+RISK_THRESHOLDS = [float(value) for value in os.getenv("TASKR_RISK_THRESHOLDS", "0.3,0.6").split(",") if value.strip()]
+
+# Versioned model registry (app/models/model_registry.py); empty means
+# trained_models/registry. Every MODEL_WATCH_SECONDS the service checks the
+# manifest and hot-swaps to a newly activated version (0 turns the watch off)
+MODEL_REGISTRY_DIR = os.getenv("TASKR_MODEL_REGISTRY_DIR", "")
+MODEL_WATCH_SECONDS = float(os.getenv("TASKR_MODEL_WATCH_SECONDS", "5"))
+# Required in the X-Admin-Token header of the /admin endpoints; without it they answer 403
+ADMIN_TOKEN = os.getenv("TASKR_ADMIN_TOKEN", "")
+
+# Candidate model (a registry version) scored next to the served one: a
+# SHADOW_SAMPLE_RATE fraction of requests is re-scored by it in the background
+# and compared, CANARY_PERCENT of requests are answered by it instead. It runs
+# on its own CANDIDATE_WORKERS threads; sampled requests beyond
+# SHADOW_MAX_PENDING unfinished shadow runs are skipped.
+CANDIDATE_VERSION = os.getenv("TASKR_CANDIDATE_VERSION", "")
+CANDIDATE_WORKERS = _env_int("TASKR_CANDIDATE_WORKERS", 1)
+SHADOW_SAMPLE_RATE = float(os.getenv("TASKR_SHADOW_SAMPLE_RATE", "0.1"))
+SHADOW_MAX_PENDING = _env_int("TASKR_SHADOW_MAX_PENDING", 4)
+SHADOW_LOG_EVERY = _env_int("TASKR_SHADOW_LOG_EVERY", 100)
+CANARY_PERCENT = float(os.getenv("TASKR_CANARY_PERCENT", "0"))
+
+# Per-task_id snapshot store behind /tasks/snapshots: the last fields, derived
+# features and score of up to SNAPSHOT_MAX_TASKS tasks. Every
+# SNAPSHOT_SWEEP_SECONDS the tasks whose deadline day rolled over are re-scored,
+# SNAPSHOT_SWEEP_BATCH rows per model call (0 turns the sweep off)
+SNAPSHOTS_ENABLED = os.getenv("TASKR_SNAPSHOTS_ENABLED", "true").lower() in ("1", "true", "yes")
+SNAPSHOT_MAX_TASKS = _env_int("TASKR_SNAPSHOT_MAX_TASKS", 1_000_000)
+SNAPSHOT_SWEEP_SECONDS = float(os.getenv("TASKR_SNAPSHOT_SWEEP_SECONDS", "60"))
+SNAPSHOT_SWEEP_BATCH = _env_int("TASKR_SNAPSHOT_SWEEP_BATCH", 10_000)
+
+# Drift of served inputs against the reference stats saved with the model:
+# /stats/drift covers the current and the previous DRIFT_WINDOW_SECONDS window.
+# A feature counts as drifted at PSI >= DRIFT_PSI_THRESHOLD once the windows
+# hold DRIFT_MIN_ROWS rows
+DRIFT_ENABLED = os.getenv("TASKR_DRIFT_ENABLED", "true").lower() in ("1", "true", "yes")
+DRIFT_WINDOW_SECONDS = float(os.getenv("TASKR_DRIFT_WINDOW_SECONDS", "3600"))
+DRIFT_PSI_THRESHOLD = float(os.getenv("TASKR_DRIFT_PSI_THRESHOLD", "0.2"))
+DRIFT_MIN_ROWS = _env_int("TASKR_DRIFT_MIN_ROWS", 500)
@@ -0,0 +1,194 @@
+import glob
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from app.core.process_info import memory_usage
+
+# Prometheus metrics served at /metrics. With several worker processes
+# (uvicorn --workers, serve.py, the process executor) PROMETHEUS_MULTIPROC_DIR
+# has to point at an empty directory before the service starts: every process
+# then writes its values there and any worker can answer a scrape for all of
+# them. serve.py empties the directory itself; with uvicorn --workers wipe it
+# on deploy.
+MULTIPROCESS_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+# Stage latencies go well below a millisecond
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+ROW_BUCKETS = tuple(2 ** i for i in range(17))
+
+REQUESTS = Counter(
+    "taskr_http_requests_total", "HTTP requests by endpoint and status", ["handler", "method", "status"],
+)
+REQUEST_LATENCY = Histogram(
+    "taskr_http_request_duration_seconds", "HTTP request latency", ["handler"], buckets=LATENCY_BUCKETS,
+)
+REQUEST_ROWS = Histogram(
+    "taskr_prediction_request_rows", "Tasks per prediction request", ["route"], buckets=ROW_BUCKETS,
+)
+STAGE_LATENCY = Histogram(
+    "taskr_pipeline_stage_duration_seconds", "Prediction pipeline stage latency (featurize, infer, ...)",
+    ["route", "stage"], buckets=LATENCY_BUCKETS,
+)
+STAGE_FAILURES = Counter(
+    "taskr_pipeline_stage_failures_total", "Prediction pipeline stages that raised", ["route", "stage"],
+)
+MODEL_BATCH_ROWS = Histogram(
+    "taskr_model_batch_rows", "Rows per model call", ["backend"], buckets=ROW_BUCKETS,
+)
+TRANSFORM_LATENCY = Histogram(
+    "taskr_preprocessor_transform_duration_seconds", "Scaling and one-hot encoding per model call",
+    ["backend"], buckets=LATENCY_BUCKETS,
+)
+PREDICT_LATENCY = Histogram(
+    "taskr_model_predict_duration_seconds", "Model forward pass per model call", ["backend"], buckets=LATENCY_BUCKETS,
+)
+ERRORS = Counter(
+    "taskr_prediction_errors_total", "Prediction errors by cause", ["cause"],
+)
+SHADOW_ROWS = Counter(
+    "taskr_shadow_rows_total", "Rows re-scored by the candidate model by primary and candidate risk bucket",
+    ["primary_risk", "candidate_risk"],
+)
+SHADOW_MEAN_ABS_DELTA = Histogram(
+    "taskr_shadow_mean_abs_delta", "Mean |candidate - primary| score per shadowed request",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+SHADOW_SKIPPED = Counter(
+    "taskr_shadow_skipped_total", "Sampled requests not shadowed because too many shadow runs were pending",
+)
+CANARY_REQUESTS = Counter(
+    "taskr_canary_requests_total", "Requests answered by the candidate model",
+)
+CANARY_FAILURES = Counter(
+    "taskr_canary_failures_total", "Canary requests the candidate failed to score, answered by the served model",
+)
+SNAPSHOT_ROWS = Counter(
+    "taskr_snapshot_rows_total", "Snapshot rows refreshed, by source (put, delta, sweep) and whether they were re-scored",
+    ["source", "result"],
+)
+FEATURE_DRIFT_PSI = Gauge(
+    "taskr_feature_drift_psi", "PSI of each input feature against the training data, as of the last drift report",
+    ["feature"], multiprocess_mode="liveall",
+)
+RESIDENT_MEMORY = Gauge(
+    "taskr_process_resident_memory_bytes", "Resident memory of each service process", multiprocess_mode="liveall",
+)
+
+_memory_refreshed_at = 0.0
+
+
+def record_error(cause: str):
+    ERRORS.labels(cause).inc()
+
+
+def observe_request(handler: str, method: str, status: int, seconds: float):
+    REQUESTS.labels(handler, method, str(status)).inc()
+    REQUEST_LATENCY.labels(handler).observe(seconds)
+
+
+def observe_stage(route: str, stage: str, seconds: float, rows: int, ok: bool):
+    # Hook for the prediction pipeline (app/api/prediction_pipeline.py)
+    STAGE_LATENCY.labels(route, stage).observe(seconds)
+    if not ok:
+        STAGE_FAILURES.labels(route, stage).inc()
+    elif stage == "featurize":
+        REQUEST_ROWS.labels(route).observe(rows)
+
+
+def observe_model_call(backend: str, rows: int, transform_seconds, predict_seconds: float):
+    MODEL_BATCH_ROWS.labels(backend).observe(rows)
+    if transform_seconds is not None:
+        TRANSFORM_LATENCY.labels(backend).observe(transform_seconds)
+    PREDICT_LATENCY.labels(backend).observe(predict_seconds)
+
+
+def observe_shadow(risk_pairs, mean_abs_delta: float):
+    # risk_pairs: {(primary_risk, candidate_risk): rows}
+    for (primary_risk, candidate_risk), rows in risk_pairs.items():
+        SHADOW_ROWS.labels(primary_risk, candidate_risk).inc(rows)
+    SHADOW_MEAN_ABS_DELTA.observe(mean_abs_delta)
+
+
+def observe_snapshot_rows(source: str, recomputed: int, unchanged: int):
+    SNAPSHOT_ROWS.labels(source, "recomputed").inc(recomputed)
+    SNAPSHOT_ROWS.labels(source, "unchanged").inc(unchanged)
+
+
+def observe_feature_drift(features: dict):
+    for name, entry in features.items():
+        FEATURE_DRIFT_PSI.labels(name).set(entry["psi"])
+
+
+def refresh_process_memory(max_age_seconds: float = 1.0):
+    global _memory_refreshed_at
+    now = time.monotonic()
+    if now - _memory_refreshed_at >= max_age_seconds:
+        _memory_refreshed_at = now
+        RESIDENT_MEMORY.set(memory_usage()["rss_bytes"])
+
+
+def render_metrics() -> bytes:
+    refresh_process_memory(0.0)
+    if MULTIPROCESS_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def clear_multiprocess_dir():
+    if MULTIPROCESS_DIR:
+        for path in glob.glob(os.path.join(MULTIPROCESS_DIR, "*.db")):
+            os.remove(path)
+
+
+def mark_process_dead(pid: int):
+    # Drops the live gauges of a worker that exited
+    if MULTIPROCESS_DIR:
+        multiprocess.mark_process_dead(pid)
+
+
+class MetricsMiddleware:
+    # Plain ASGI middleware, so streamed request and response bodies pass through untouched
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Labelled by endpoint function rather than URL, so unknown paths do not
+            # grow the label set (included routers are mounted, their route.path lacks the prefix)
+            route = scope.get("route")
+            observe_request(getattr(route, "name", "unmatched"), scope["method"], status,
+                            time.perf_counter() - started)
+            refresh_process_memory()
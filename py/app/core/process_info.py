@@ -0,0 +1,41 @@
+import os
+import resource
+import time
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_IMPORTED_AT = time.monotonic()
+
+
+def memory_usage() -> dict:
+    # Resident memory and its file-backed shared part (statm does not count
+    # anonymous copy-on-write pages as shared). /proc is Linux only; elsewhere
+    # fall back to the peak RSS from getrusage.
+    try:
+        with open("/proc/self/statm") as f:
+            _, resident, shared = (int(value) for value in f.read().split()[:3])
+        return {"rss_bytes": resident * _PAGE_SIZE, "shared_bytes": shared * _PAGE_SIZE}
+    except OSError:
+        max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {"rss_bytes": max_rss_kb * 1024, "shared_bytes": None}
+
+
+def seconds_since_start() -> float:
+    # Time since this process was created (or forked), read from /proc when available
+    try:
+        with open("/proc/self/stat") as f:
+            # The command name may contain spaces, so split after its closing paren
+            fields = f.read().rsplit(")", 1)[1].split()
+        started_ticks = int(fields[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - started_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return time.monotonic() - _IMPORTED_AT
+
+
+def startup_report(label: str) -> str:
+    memory = memory_usage()
+    report = f"{label}: ready after {seconds_since_start():.2f}s, RSS {memory['rss_bytes'] / 2 ** 20:.1f} MB"
+    if memory["shared_bytes"] is not None:
+        report += f" ({memory['shared_bytes'] / 2 ** 20:.1f} MB shared)"
+    return report
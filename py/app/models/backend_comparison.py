@@ -0,0 +1,61 @@
+import json
+import time
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from app.models.model_registry import ModelArtifacts
+from app.models.precision_parity import classification_metrics
+from app.models.task_prediction_model import INFERENCE_BACKENDS, build_backend
+
+# Accuracy/latency tradeoff of the inference backends on one model version:
+# the evaluate_model metrics of each on a held-out split next to its scoring
+# cost per row at a single-task, a board-sized and a bulk batch size.
+LATENCY_BATCH_SIZES = (1, 64, 4096)
+
+
+def _us_per_row(backend, features, batch_size: int, min_seconds: float = 0.2) -> float:
+    batch = features.take(np.arange(batch_size) % len(features))
+    backend.predict(batch)
+    calls = 0
+    started = time.perf_counter()
+    while True:
+        backend.predict(batch)
+        calls += 1
+        elapsed = time.perf_counter() - started
+        if calls >= 3 and elapsed >= min_seconds:
+            return elapsed / calls / batch_size * 1e6
+
+
+def backend_comparison_report(artifacts: ModelArtifacts, X_test, y_test,
+                              backends: Sequence[str] = INFERENCE_BACKENDS,
+                              output: Optional[str] = None) -> Dict[str, dict]:
+    # X_test/y_test as split off in the training scripts (training-style frame)
+    y_true = np.asarray(y_test)
+    report = {}
+    for name in backends:
+        try:
+            backend = build_backend(artifacts, name)
+        except FileNotFoundError as e:
+            print(f"Skipping {name} backend: {e}")
+            continue
+        features = backend.feature_builder.encode_frame(X_test)
+        probabilities = np.asarray(backend.predict(features), dtype=np.float64)
+        report[name] = dict(
+            classification_metrics(y_true, probabilities),
+            us_per_row={batch_size: _us_per_row(backend, features, batch_size) for batch_size in LATENCY_BATCH_SIZES},
+        )
+
+    print(f"\nBackends on {len(y_true)} held-out rows (model version {artifacts.version}):")
+    latency_header = "".join(f"{f'us/row@{batch_size}':>13}" for batch_size in LATENCY_BATCH_SIZES)
+    print(f"{'':<8}{'accuracy':>9}{'precision':>10}{'recall':>8}{'f1':>8}{'auc':>8}{latency_header}")
+    for name, entry in report.items():
+        latency = "".join(f"{entry['us_per_row'][batch_size]:>13.2f}" for batch_size in LATENCY_BATCH_SIZES)
+        print(f"{name:<8}{entry['accuracy']:>9.4f}{entry['precision']:>10.4f}{entry['recall']:>8.4f}"
+              f"{entry['f1']:>8.4f}{entry['auc']:>8.4f}{latency}")
+
+    if output:
+        with open(output, "w") as f:
+            json.dump({"rows": len(y_true), "model_version": artifacts.version, "report": report}, f, indent=2)
+        print(f"Backend comparison written to {output}")
+    return report
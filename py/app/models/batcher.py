@@ -0,0 +1,156 @@
+import asyncio
+from typing import List, Optional, Tuple
+
+from app.core import config
+from app.models.feature_builder import TaskFeatures
+from app.models.inference_executor import InferenceExecutor
+from app.models.task_prediction_model import predict_versioned_features
+
+
+class PredictionBatcher:
+    def __init__(self, executor: InferenceExecutor, max_batch_size: int = 64, max_wait_ms: int = 5):
+        self.executor = executor
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0, max_wait_ms) / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._carry = None
+        # At most one batch per executor worker is in flight; while they are all
+        # busy new requests keep piling up in the queue and form larger batches
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._dispatches = set()
+
+        self.batches = 0
+        self.rows = 0
+        self.max_rows_seen = 0
+        self.batch_size_counts = {}
+
+    def start(self):
+        if self._collector is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.executor.workers)
+        self._collector = asyncio.create_task(self._collect())
+        print(f"Prediction batcher started (max batch {self.max_batch_size} rows, max wait {self.max_wait * 1000:.0f} ms)")
+
+    async def stop(self):
+        if self._collector is None:
+            return
+        self._collector.cancel()
+        try:
+            await self._collector
+        except asyncio.CancelledError:
+            pass
+        self._collector = None
+        if self._dispatches:
+            await asyncio.gather(*self._dispatches, return_exceptions=True)
+
+    async def submit(self, features: TaskFeatures) -> Tuple[List[float], Optional[str]]:
+        if self._queue is None:
+            raise RuntimeError("Prediction batcher is not running")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((features, future))
+        return await future
+
+    async def _next_item(self):
+        if self._carry is not None:
+            item, self._carry = self._carry, None
+            return item
+        return await self._queue.get()
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._slots.acquire()
+            first = await self._next_item()
+            batch = [first]
+            rows = len(first[0])
+            flush_at = loop.time() + self.max_wait
+
+            while rows < self.max_batch_size:
+                timeout = flush_at - loop.time()
+                try:
+                    if timeout > 0:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    else:
+                        # Past the deadline, only take what is already queued
+                        item = self._queue.get_nowait()
+                except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                    break
+                if rows + len(item[0]) > self.max_batch_size:
+                    self._carry = item
+                    break
+                batch.append(item)
+                rows += len(item[0])
+
+            dispatch = asyncio.create_task(self._dispatch(batch, rows))
+            self._dispatches.add(dispatch)
+            dispatch.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch, rows: int):
+        try:
+            self._record_batch(rows)
+            features = TaskFeatures.concat([item[0] for item in batch])
+            try:
+                predictions, version = await self.executor.run(predict_versioned_features, features)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+            if len(predictions) != rows:
+                # predict_versioned_features signals failure with an empty list
+                predictions = None
+            offset = 0
+            for item_features, future in batch:
+                size = len(item_features)
+                if not future.done():
+                    future.set_result((predictions[offset:offset + size] if predictions is not None else [], version))
+                offset += size
+        finally:
+            self._slots.release()
+
+    def _record_batch(self, rows: int):
+        self.batches += 1
+        self.rows += rows
+        self.max_rows_seen = max(self.max_rows_seen, rows)
+        bucket = 1
+        while bucket < rows:
+            bucket *= 2
+        self.batch_size_counts[bucket] = self.batch_size_counts.get(bucket, 0) + 1
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "queued_requests": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "rows": self.rows,
+            "avg_batch_size": self.rows / self.batches if self.batches else 0.0,
+            "max_batch_size_seen": self.max_rows_seen,
+            # Batch sizes rounded up to the next power of two
+            "batch_size_histogram": {str(size): count for size, count in sorted(self.batch_size_counts.items())},
+        }
+
+
+prediction_batcher: Optional[PredictionBatcher] = None
+
+
+def start_prediction_batcher(executor: InferenceExecutor) -> Optional[PredictionBatcher]:
+    global prediction_batcher
+    if config.BATCHING_ENABLED and prediction_batcher is None:
+        prediction_batcher = PredictionBatcher(executor, config.BATCH_MAX_SIZE, config.BATCH_MAX_WAIT_MS)
+        prediction_batcher.start()
+    return prediction_batcher
+
+
+async def stop_prediction_batcher():
+    global prediction_batcher
+    if prediction_batcher is not None:
+        await prediction_batcher.stop()
+        prediction_batcher = None
+
+
+def get_prediction_batcher() -> Optional[PredictionBatcher]:
+    return prediction_batcher
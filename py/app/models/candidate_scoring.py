@@ -0,0 +1,231 @@
+import asyncio
+import random
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Set
+
+import numpy as np
+
+from app.core import config
+from app.core.metrics import CANARY_FAILURES, CANARY_REQUESTS, SHADOW_SKIPPED, observe_shadow
+from app.models.feature_builder import TaskFeatures
+from app.models.model_registry import resolve_model_version
+from app.models.model_reloader import build_and_warm_backend
+from app.models.task_prediction_model import (
+    RISK_LEVELS,
+    activate_candidate_backend,
+    get_candidate_version,
+    get_model_version,
+    predict_candidate_features,
+    risk_codes,
+)
+
+# Shadow and canary scoring of a candidate model version. Shadow runs start
+# after the primary scores are known and are never awaited by the request;
+# canary requests are answered by the candidate instead of the served model.
+# The candidate has its own thread pool, so neither competes for the
+# inference executor's workers.
+
+
+def _compare(features: TaskFeatures, primary: List[float]) -> Optional[dict]:
+    # Runs on a candidate thread, so the event loop only applies the summary
+    candidate = predict_candidate_features(features)
+    if len(candidate) != len(primary):
+        return None
+    primary_scores = np.asarray(primary, dtype=np.float64)
+    delta = np.asarray(candidate, dtype=np.float64) - primary_scores
+    n_levels = len(RISK_LEVELS)
+    pairs = (risk_codes(primary_scores, config.RISK_THRESHOLDS) * n_levels
+             + risk_codes(np.asarray(candidate), config.RISK_THRESHOLDS))
+    confusion = np.bincount(pairs, minlength=n_levels * n_levels).reshape(n_levels, n_levels)
+    return {
+        "rows": len(primary),
+        "delta_sum": float(delta.sum()),
+        "abs_delta_sum": float(np.abs(delta).sum()),
+        "max_abs_delta": float(np.abs(delta).max()),
+        "confusion": confusion,
+    }
+
+
+class CandidateScorer:
+    def __init__(self, shadow_sample_rate: float, canary_percent: float, max_pending: int, workers: int = 1):
+        self.shadow_sample_rate = shadow_sample_rate
+        self.canary_percent = canary_percent
+        self.max_pending = max(1, max_pending)
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="candidate")
+        self._rng = random.Random()
+        self._tasks: Set[asyncio.Task] = set()
+        self.loading_version: Optional[str] = None
+        self.last_error: Optional[str] = None
+        self.pending = 0
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.shadow_requests = 0
+        self.shadow_rows = 0
+        self.shadow_skipped = 0
+        self.shadow_failed = 0
+        self.canary_requests = 0
+        self.canary_rows = 0
+        self.canary_failed = 0
+        self.delta_sum = 0.0
+        self.abs_delta_sum = 0.0
+        self.max_abs_delta = 0.0
+        self.confusion = np.zeros((len(RISK_LEVELS), len(RISK_LEVELS)), dtype=np.int64)
+
+    @property
+    def version(self) -> Optional[str]:
+        return get_candidate_version()
+
+    @property
+    def active(self) -> bool:
+        # Once the candidate has been promoted there is nothing left to compare
+        version = self.version
+        return version is not None and version != get_model_version()
+
+    async def load(self, version: str):
+        # Loaded and warmed like a hot reload, then installed with fresh statistics
+        self.loading_version = version
+        try:
+            artifacts = resolve_model_version(version)
+            backend = await asyncio.get_running_loop().run_in_executor(self._pool, build_and_warm_backend, artifacts)
+        except Exception as e:
+            self.last_error = f"Candidate version {version}: {e}"
+            print(f"Candidate model failed to load: {e}")
+            raise
+        finally:
+            self.loading_version = None
+        self.last_error = None
+        activate_candidate_backend(backend)
+        self._reset_stats()
+        print(f"Candidate model version {artifacts.version} loaded "
+              f"(shadow rate {self.shadow_sample_rate:g}, canary {self.canary_percent:g}%)")
+
+    def clear(self):
+        activate_candidate_backend(None)
+
+    def take_canary(self) -> bool:
+        return self.canary_percent > 0 and self.active and self._rng.random() * 100 < self.canary_percent
+
+    async def predict_canary(self, features: TaskFeatures) -> List[float]:
+        # An empty list when the candidate fails, the caller then scores with the served model
+        self.canary_requests += 1
+        self.canary_rows += len(features)
+        CANARY_REQUESTS.inc()
+        try:
+            predictions = await asyncio.get_running_loop().run_in_executor(
+                self._pool, predict_candidate_features, features,
+            )
+        except Exception as e:
+            print(f"Canary scoring failed: {e}")
+            predictions = []
+        if len(predictions) != len(features):
+            self.canary_failed += 1
+            CANARY_FAILURES.inc()
+            return []
+        return predictions
+
+    def maybe_shadow(self, features: TaskFeatures, primary: List[float]):
+        if self.shadow_sample_rate <= 0 or not self.active or self._rng.random() >= self.shadow_sample_rate:
+            return
+        if self.pending >= self.max_pending:
+            # The candidate is behind; skipping keeps its backlog (and its CPU use) bounded
+            self.shadow_skipped += 1
+            SHADOW_SKIPPED.inc()
+            return
+        self.pending += 1
+        task = asyncio.create_task(self._shadow(features, primary))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _shadow(self, features: TaskFeatures, primary: List[float]):
+        try:
+            summary = await asyncio.get_running_loop().run_in_executor(self._pool, _compare, features, primary)
+        except Exception as e:
+            print(f"Shadow scoring failed: {e}")
+            summary = None
+        finally:
+            self.pending -= 1
+        if summary is None:
+            self.shadow_failed += 1
+            return
+
+        self.shadow_requests += 1
+        self.shadow_rows += summary["rows"]
+        self.delta_sum += summary["delta_sum"]
+        self.abs_delta_sum += summary["abs_delta_sum"]
+        self.max_abs_delta = max(self.max_abs_delta, summary["max_abs_delta"])
+        self.confusion += summary["confusion"]
+        observe_shadow({
+            (RISK_LEVELS[i], RISK_LEVELS[j]): int(rows)
+            for (i, j), rows in np.ndenumerate(summary["confusion"]) if rows
+        }, summary["abs_delta_sum"] / summary["rows"])
+        if self.shadow_requests % max(1, config.SHADOW_LOG_EVERY) == 0:
+            stats = self.stats()
+            print(f"Shadow {self.version} vs {get_model_version()}: {stats['shadow_rows']} rows, "
+                  f"mean delta {stats['mean_delta']:+.4f}, mean |delta| {stats['mean_abs_delta']:.4f}, "
+                  f"max |delta| {stats['max_abs_delta']:.4f}, risk disagreement {stats['disagreement_rate']:.2%}")
+
+    def stats(self) -> dict:
+        rows = self.shadow_rows or 1
+        disagreements = int(self.confusion.sum() - np.trace(self.confusion))
+        return {
+            "candidate_version": self.version,
+            "served_version": get_model_version(),
+            "active": self.active,
+            "loading": self.loading_version,
+            "last_error": self.last_error,
+            "shadow_sample_rate": self.shadow_sample_rate,
+            "canary_percent": self.canary_percent,
+            "shadow_requests": self.shadow_requests,
+            "shadow_rows": self.shadow_rows,
+            "shadow_pending": self.pending,
+            "shadow_skipped": self.shadow_skipped,
+            "shadow_failed": self.shadow_failed,
+            "canary_requests": self.canary_requests,
+            "canary_rows": self.canary_rows,
+            "canary_failed": self.canary_failed,
+            "mean_delta": self.delta_sum / rows,
+            "mean_abs_delta": self.abs_delta_sum / rows,
+            "max_abs_delta": self.max_abs_delta,
+            "disagreement_rate": disagreements / rows,
+            # Rows by primary risk (outer) and candidate risk (inner)
+            "risk_confusion": {
+                primary: {candidate: int(self.confusion[i, j]) for j, candidate in enumerate(RISK_LEVELS)}
+                for i, primary in enumerate(RISK_LEVELS)
+            },
+        }
+
+    async def shutdown(self):
+        for task in list(self._tasks):
+            task.cancel()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+candidate_scorer: Optional[CandidateScorer] = None
+
+
+def start_candidate_scorer() -> CandidateScorer:
+    global candidate_scorer
+    if candidate_scorer is None:
+        candidate_scorer = CandidateScorer(config.SHADOW_SAMPLE_RATE, config.CANARY_PERCENT,
+                                           config.SHADOW_MAX_PENDING, config.CANDIDATE_WORKERS)
+    return candidate_scorer
+
+
+async def load_configured_candidate(scorer: CandidateScorer):
+    try:
+        await scorer.load(config.CANDIDATE_VERSION)
+    except Exception:
+        # Reported in the scorer's last_error, the service runs on without a candidate
+        pass
+
+
+async def stop_candidate_scorer():
+    global candidate_scorer
+    if candidate_scorer is not None:
+        await candidate_scorer.shutdown()
+        candidate_scorer = None
+
+
+def get_candidate_scorer() -> Optional[CandidateScorer]:
+    return candidate_scorer
@@ -0,0 +1,92 @@
+from typing import List, Tuple
+
+import numpy as np
+
+# A served network is a plain list of (kernel, bias, activation) steps.
+# Nothing in here imports TensorFlow; Keras models are only read through
+# their layers' get_config()/get_weights().
+DenseLayer = Tuple[np.ndarray, np.ndarray, str]
+
+ACTIVATIONS = ("linear", "relu", "sigmoid")
+SKIPPED_LAYERS = ("InputLayer", "Dropout")
+
+
+def _activation_name(layer) -> str:
+    activation = layer.get_config().get("activation", "linear")
+    if isinstance(activation, dict):
+        activation = activation.get("config", {}).get("name", activation.get("class_name"))
+    if activation not in ACTIVATIONS:
+        raise ValueError(f"Unsupported activation '{activation}' in layer {layer.name}")
+    return activation
+
+
+def _batch_norm_affine(layer) -> Tuple[np.ndarray, np.ndarray]:
+    # Inference-time BatchNormalization is y = x * scale + shift
+    config = layer.get_config()
+    weights = [np.asarray(w, dtype=np.float64) for w in layer.get_weights()]
+    gamma = weights.pop(0) if config.get("scale", True) else None
+    beta = weights.pop(0) if config.get("center", True) else None
+    moving_mean, moving_variance = weights
+    scale = 1.0 / np.sqrt(moving_variance + config.get("epsilon", 1e-3))
+    if gamma is not None:
+        scale = scale * gamma
+    shift = -moving_mean * scale
+    if beta is not None:
+        shift = shift + beta
+    return scale, shift
+
+
+def extract_dense_layers(model) -> List[DenseLayer]:
+    # Dropout is the identity at inference and is dropped. BatchNormalization
+    # is folded into the preceding Dense when that Dense is linear, otherwise
+    # (Dense(relu) -> BatchNorm, as in the training scripts) into the next one.
+    layers: List[List] = []
+    pending_affine = None
+    for layer in model.layers:
+        kind = layer.__class__.__name__
+        if kind in SKIPPED_LAYERS:
+            continue
+        if kind == "Dense":
+            kernel, bias = [np.asarray(w, dtype=np.float64) for w in layer.get_weights()]
+            if pending_affine is not None:
+                scale, shift = pending_affine
+                bias = shift @ kernel + bias
+                kernel = scale[:, None] * kernel
+                pending_affine = None
+            layers.append([kernel, bias, _activation_name(layer)])
+        elif kind == "BatchNormalization":
+            scale, shift = _batch_norm_affine(layer)
+            if layers and layers[-1][2] == "linear" and pending_affine is None:
+                kernel, bias, activation = layers[-1]
+                layers[-1] = [kernel * scale, bias * scale + shift, activation]
+            elif pending_affine is None:
+                pending_affine = (scale, shift)
+            else:
+                previous_scale, previous_shift = pending_affine
+                pending_affine = (previous_scale * scale, previous_shift * scale + shift)
+        else:
+            raise ValueError(f"Unsupported layer type '{kind}' ({layer.name})")
+
+    if pending_affine is not None:
+        raise ValueError("BatchNormalization after the last Dense layer cannot be folded")
+    return [(kernel, bias, activation) for kernel, bias, activation in layers]
+
+
+def apply_activation(x: np.ndarray, activation: str) -> np.ndarray:
+    if activation == "relu":
+        return np.maximum(x, 0, out=x)
+    if activation == "sigmoid":
+        np.negative(x, out=x)
+        with np.errstate(over="ignore"):
+            np.exp(x, out=x)
+        x += 1
+        return np.reciprocal(x, out=x)
+    return x
+
+
+def forward(layers: List[DenseLayer], x: np.ndarray) -> np.ndarray:
+    for kernel, bias, activation in layers:
+        x = x @ kernel
+        x += bias
+        x = apply_activation(x, activation)
+    return x
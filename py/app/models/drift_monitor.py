@@ -0,0 +1,226 @@
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+import numpy as np
+
+from app.core import config
+from app.core.metrics import observe_feature_drift
+from app.models.feature_builder import NUMERICAL_FEATURES, PRIORITY_MAP, TaskFeatures
+from app.models.task_prediction_model import get_model_artifacts, get_model_generation
+
+# Drift of the served inputs against the data the model was trained on.
+#
+# At training time save_model_and_preprocessor writes reference stats next to
+# the model: per numeric feature the training quantiles as bin edges and the
+# training rows per bin, and the task_type and priority counts. The service
+# counts its own traffic into the same bins as it is featurized. That is one
+# fixed-size int64 vector per window, whatever the traffic, updated with one
+# np.bincount per request. /stats/drift compares the current and previous
+# window with the reference by PSI per feature and KS per numeric feature
+# (at the bin edges, so within one bin's resolution).
+
+REFERENCE_FORMAT_VERSION = 1
+REFERENCE_BINS = 20
+HISTOGRAM_FEATURES = [name for name in NUMERICAL_FEATURES if name != "priority"]
+PRIORITY_LEVELS = list(PRIORITY_MAP)
+OTHER = "other"
+# Priority is encoded as PRIORITY_MAP's 1..3, binned like a numeric feature
+_PRIORITY_EDGES = [2.0, 3.0]
+# Empty bins are counted as this share, so PSI stays finite
+_MIN_SHARE = 1e-4
+# Above this many rows per call, binning by searchsorted beats one broadcast comparison
+_BROADCAST_ROWS = 16
+
+_PRIORITY = NUMERICAL_FEATURES.index("priority")
+
+
+def _counts(codes: np.ndarray, n_values: int) -> list:
+    return np.bincount(codes, minlength=n_values).tolist()
+
+
+def reference_stats(features: TaskFeatures, bins: int = REFERENCE_BINS) -> dict:
+    # features: the training rows, e.g. FeatureBuilder.encode_frame(X_train)
+    numeric = {}
+    for name in HISTOGRAM_FEATURES:
+        column = features.numeric[:, NUMERICAL_FEATURES.index(name)]
+        edges = np.unique(np.quantile(column, np.linspace(0, 1, bins + 1)[1:-1]))
+        numeric[name] = {
+            "edges": edges.tolist(),
+            "counts": _counts(np.searchsorted(edges, column, side="right"), len(edges) + 1),
+        }
+    categories = list(features.categories or [])
+    task_type = np.where(features.task_type < 0, len(categories), features.task_type)
+    return {
+        "format_version": REFERENCE_FORMAT_VERSION,
+        "rows": len(features),
+        "numeric": numeric,
+        "categorical": {
+            "task_type": {"values": categories + [OTHER], "counts": _counts(task_type, len(categories) + 1)},
+            "priority": {
+                "values": PRIORITY_LEVELS,
+                "counts": _counts(np.searchsorted(_PRIORITY_EDGES, features.numeric[:, _PRIORITY], side="right"),
+                                  len(PRIORITY_LEVELS)),
+            },
+        },
+    }
+
+
+def save_reference_stats(features: TaskFeatures, path: str, bins: int = REFERENCE_BINS):
+    with open(path, "w") as f:
+        json.dump(reference_stats(features, bins), f)
+
+
+def load_reference_stats(path: str) -> dict:
+    with open(path) as f:
+        reference = json.load(f)
+    if reference.get("format_version") != REFERENCE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported reference stats format {reference.get('format_version')}")
+    return reference
+
+
+def psi(live: np.ndarray, expected: np.ndarray) -> float:
+    actual = np.maximum(live / max(live.sum(), 1), _MIN_SHARE)
+    expected = np.maximum(expected / max(expected.sum(), 1), _MIN_SHARE)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def binned_ks(live: np.ndarray, expected: np.ndarray) -> float:
+    return float(np.max(np.abs(np.cumsum(live) / max(live.sum(), 1) - np.cumsum(expected) / max(expected.sum(), 1))))
+
+
+class DriftMonitor:
+    def __init__(self, reference: dict, version: Optional[str], window_seconds: float = 3600.0):
+        self.reference = reference
+        self.version = version
+        self.window_seconds = window_seconds
+
+        # Every histogram and count is a slice of one flat vector
+        self._blocks = {}
+        offset = 0
+        for name, stats in reference["numeric"].items():
+            self._blocks[name] = slice(offset, offset + len(stats["counts"]))
+            offset += len(stats["counts"])
+        for name, stats in reference["categorical"].items():
+            self._blocks[name] = slice(offset, offset + len(stats["counts"]))
+            offset += len(stats["counts"])
+        self._size = offset
+
+        # The numeric features and priority, binned together
+        self._columns = [NUMERICAL_FEATURES.index(name) for name in reference["numeric"]] + [_PRIORITY]
+        edges = [stats["edges"] for stats in reference["numeric"].values()] + [_PRIORITY_EDGES]
+        self._column_edges = [np.asarray(column_edges, dtype=np.float64) for column_edges in edges]
+        # Padded with +inf, which no value reaches
+        self._edges = np.full((len(edges), max(map(len, edges))), np.inf)
+        for i, column_edges in enumerate(edges):
+            self._edges[i, :len(column_edges)] = column_edges
+        self._offsets = np.array(
+            [self._blocks[name].start for name in reference["numeric"]] + [self._blocks["priority"].start],
+            dtype=np.int64,
+        )
+        self._categories = reference["categorical"]["task_type"]["values"][:-1]
+
+        self._current = np.zeros(self._size, dtype=np.int64)
+        self._previous: Optional[np.ndarray] = None
+        self._rows = [0, 0]
+        self._window_started = time.monotonic()
+        self._window_started_at = datetime.now(timezone.utc).isoformat()
+
+    def _rotate(self):
+        self._previous = self._current
+        self._current = np.zeros(self._size, dtype=np.int64)
+        self._rows = [self._rows[1], 0]
+        self._window_started = time.monotonic()
+        self._window_started_at = datetime.now(timezone.utc).isoformat()
+
+    def observe(self, features: TaskFeatures):
+        if self.window_seconds > 0 and time.monotonic() - self._window_started >= self.window_seconds:
+            self._rotate()
+            observe_feature_drift(self.report()["features"])
+        numeric = features.numeric[:, self._columns]
+        # Bin of every value: how many of its feature's edges it reaches
+        if len(features) <= _BROADCAST_ROWS:
+            bins = (numeric[:, :, None] >= self._edges[None]).sum(axis=2)
+        else:
+            bins = np.empty(numeric.shape, dtype=np.int64)
+            for j, column_edges in enumerate(self._column_edges):
+                bins[:, j] = np.searchsorted(column_edges, numeric[:, j], side="right")
+        task_type = features.for_categories(self._categories).task_type
+        codes = np.concatenate([
+            (bins + self._offsets).ravel(),
+            np.where(task_type < 0, len(self._categories), task_type) + self._blocks["task_type"].start,
+        ])
+        self._current += np.bincount(codes, minlength=self._size)
+        self._rows[1] += len(features)
+
+    def report(self) -> dict:
+        # Current window plus the previous one, so a report never covers only a few minutes of traffic
+        live = self._current if self._previous is None else self._current + self._previous
+        rows = self._rows[1] + (self._rows[0] if self._previous is not None else 0)
+        enough_rows = rows >= config.DRIFT_MIN_ROWS
+        features = {}
+        for kind in ("numeric", "categorical"):
+            for name, stats in self.reference[kind].items():
+                counts = live[self._blocks[name]]
+                expected = np.asarray(stats["counts"], dtype=np.float64)
+                entry = {"psi": psi(counts, expected), "ks": binned_ks(counts, expected) if kind == "numeric" else None}
+                entry["drifted"] = enough_rows and entry["psi"] >= config.DRIFT_PSI_THRESHOLD
+                if kind == "categorical":
+                    entry["live_counts"] = dict(zip(stats["values"], counts.tolist()))
+                features[name] = entry
+        return {
+            "model_version": self.version,
+            "reference_rows": self.reference["rows"],
+            "live_rows": rows,
+            "window_seconds": self.window_seconds,
+            "window_started_at": self._window_started_at,
+            "psi_threshold": config.DRIFT_PSI_THRESHOLD,
+            "drifted": [name for name, entry in features.items() if entry["drifted"]],
+            "features": features,
+        }
+
+
+drift_monitor: Optional[DriftMonitor] = None
+_monitored_generation: Optional[int] = None
+
+
+def _activate_reference():
+    # A model swap brings its own reference stats and starts counting afresh
+    global drift_monitor
+    drift_monitor = None
+    artifacts = get_model_artifacts()
+    if artifacts is None:
+        return
+    if not os.path.exists(artifacts.reference_stats_path):
+        print(f"Model version {artifacts.version} has no reference stats, drift monitoring is off")
+        return
+    try:
+        drift_monitor = DriftMonitor(
+            load_reference_stats(artifacts.reference_stats_path), artifacts.version, config.DRIFT_WINDOW_SECONDS,
+        )
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error loading reference stats of model version {artifacts.version}: {e}")
+
+
+def observe_drift(features: TaskFeatures):
+    global _monitored_generation
+    if not config.DRIFT_ENABLED:
+        return
+    generation = get_model_generation()
+    if generation != _monitored_generation:
+        _monitored_generation = generation
+        _activate_reference()
+    if drift_monitor is not None:
+        drift_monitor.observe(features)
+
+
+def get_drift_report() -> dict:
+    if not config.DRIFT_ENABLED:
+        return {"enabled": False}
+    if drift_monitor is None:
+        return {"enabled": True, "model_version": None, "features": {}}
+    report = drift_monitor.report()
+    observe_feature_drift(report["features"])
+    return dict(report, enabled=True)
@@ -0,0 +1,66 @@
+from typing import List, Tuple
+
+import numpy as np
+
+from app.models.feature_builder import CATEGORICAL_FEATURES, NUMERICAL_FEATURES, TaskFeatures
+
+# Occlusion attributions, computed with the same backends as plain predictions.
+# Every task is scored once as sent and once per feature with that feature
+# replaced by its reference value, all rows stacked into one model call:
+#
+#   attribution = p(task) - p(task with the feature at its reference value)
+#
+# Positive values are what raises the completion probability. The reference
+# task is the training mean of each numeric feature (the scaler's mean_, all
+# zeros once scaled). task_type has no mean: its one-hot columns are one group,
+# replaced by each training category in turn and the results averaged.
+#
+# A batch of n tasks costs n * rows_per_task(k) model rows for k categories,
+# plus k rows for the probability of the reference task itself.
+
+EXPLAINED_FIELDS = NUMERICAL_FEATURES + CATEGORICAL_FEATURES
+
+
+def _reference_codes(n_categories: int) -> np.ndarray:
+    # Without a category list the group falls back to the unknown code (all zeros)
+    return np.arange(n_categories, dtype=np.int32) if n_categories else np.array([-1], dtype=np.int32)
+
+
+def rows_per_task(n_categories: int) -> int:
+    return 1 + len(NUMERICAL_FEATURES) + len(_reference_codes(n_categories))
+
+
+def occlusion_batch(features: TaskFeatures, reference: np.ndarray) -> TaskFeatures:
+    # Per task: the task, one row per numeric feature at its reference value,
+    # one row per category; then the reference task with each category
+    n, n_numeric = features.numeric.shape
+    codes = _reference_codes(len(features.categories or []))
+    per_task = rows_per_task(len(features.categories or []))
+
+    numeric = np.repeat(features.numeric[:, None, :], per_task, axis=1)
+    columns = np.arange(n_numeric)
+    numeric[:, 1 + columns, columns] = reference
+    task_type = np.repeat(features.task_type[:, None], per_task, axis=1)
+    task_type[:, 1 + n_numeric:] = codes
+
+    return TaskFeatures(
+        np.concatenate([numeric.reshape(-1, n_numeric), np.tile(reference, (len(codes), 1))]),
+        np.concatenate([task_type.reshape(-1), codes]),
+        features.categories,
+    )
+
+
+def occlusion_attributions(predictions: List[float], n_tasks: int,
+                           n_categories: int) -> Tuple[np.ndarray, float, np.ndarray]:
+    # Probabilities of the tasks, of the reference task, and the (n_tasks,
+    # len(EXPLAINED_FIELDS)) attributions, from the scores of occlusion_batch
+    n_numeric = len(NUMERICAL_FEATURES)
+    per_task = rows_per_task(n_categories)
+    predictions = np.asarray(predictions, dtype=np.float64)
+    scores = predictions[:n_tasks * per_task].reshape(n_tasks, per_task)
+    probabilities = scores[:, 0]
+
+    attributions = np.empty((n_tasks, len(EXPLAINED_FIELDS)))
+    attributions[:, :n_numeric] = probabilities[:, None] - scores[:, 1:1 + n_numeric]
+    attributions[:, n_numeric] = probabilities - scores[:, 1 + n_numeric:].mean(axis=1)
+    return probabilities, float(predictions[n_tasks * per_task:].mean()), attributions
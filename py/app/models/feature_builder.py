@@ -0,0 +1,230 @@
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, List, Optional, Sequence
+
+import numpy as np
+
+if TYPE_CHECKING:
+    # pandas is only needed by callers that already hold DataFrames
+    import pandas as pd
+
+NUMERICAL_FEATURES = [
+    'duration', 'priority', 'subtasks', 'deadline_days', 'created_to_deadline',
+    'user_past_completion', 'description_length', 'comments_count',
+    'assigned_team_size', 'user_availability', 'no_curr_assigned_tasks',
+    'tasks_completed', 'avg_completion_time'
+]
+CATEGORICAL_FEATURES = ['task_type']
+
+PRIORITY_MAP = {'LOW': 1, 'MEDIUM': 2, 'HIGH': 3}
+DEFAULT_PRIORITY = 2
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+_MICROSECONDS_PER_DAY = 86_400_000_000
+
+
+def _epoch_microseconds(value: datetime) -> int:
+    # Naive datetimes are read as UTC, like pd.to_datetime(..., utc=True)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def _floor_days(delta_us: np.ndarray) -> np.ndarray:
+    # Same flooring as Timedelta.days for negative deltas
+    return np.floor_divide(delta_us, _MICROSECONDS_PER_DAY)
+
+
+class TaskFeatures:
+    # Model inputs before scaling: raw numeric columns in NUMERICAL_FEATURES
+    # order and the task_type category code (-1 for categories unseen in training).
+    # categories is the list the codes index into, so features encoded before a
+    # model swap can be re-coded for the new model's categories
+    __slots__ = ("numeric", "task_type", "categories")
+
+    def __init__(self, numeric: np.ndarray, task_type: np.ndarray, categories: Optional[List[str]] = None):
+        self.numeric = numeric
+        self.task_type = task_type
+        self.categories = categories
+
+    def __len__(self) -> int:
+        return len(self.task_type)
+
+    def slice(self, start: int, stop: int) -> "TaskFeatures":
+        return TaskFeatures(self.numeric[start:stop], self.task_type[start:stop], self.categories)
+
+    def take(self, indices) -> "TaskFeatures":
+        return TaskFeatures(self.numeric[indices], self.task_type[indices], self.categories)
+
+    def for_categories(self, categories: List[str]) -> "TaskFeatures":
+        if self.categories is None or self.categories is categories or self.categories == categories:
+            return self
+        index = {category: i for i, category in enumerate(categories)}
+        # The trailing -1 is picked up by code -1
+        lookup = np.array([index.get(category, -1) for category in self.categories] + [-1], dtype=np.int32)
+        return TaskFeatures(self.numeric, lookup[self.task_type], categories)
+
+    @classmethod
+    def concat(cls, parts: Sequence["TaskFeatures"]) -> "TaskFeatures":
+        if len(parts) == 1:
+            return parts[0]
+        categories = parts[0].categories
+        if categories is not None:
+            parts = [part.for_categories(categories) for part in parts]
+        return cls(
+            np.concatenate([part.numeric for part in parts]),
+            np.concatenate([part.task_type for part in parts]),
+            categories,
+        )
+
+
+class FeatureBuilder:
+    def __init__(self, numerical_features: List[str], categories: List[str], mean: np.ndarray, scale: np.ndarray,
+                 reference: Optional[np.ndarray] = None):
+        self.numerical_features = list(numerical_features)
+        self.categories = list(categories)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        # Raw numeric values of the average training task, the baseline of the
+        # occlusion attributions; None for artifacts exported without it
+        self.reference = np.asarray(reference, dtype=np.float64) if reference is not None else None
+        self.category_index = {category: i for i, category in enumerate(self.categories)}
+        self.n_features = len(self.numerical_features) + len(self.categories)
+
+    @classmethod
+    def from_preprocessor(cls, preprocessor) -> "FeatureBuilder":
+        # Compiles the fitted ColumnTransformer from the training scripts:
+        # ('num', StandardScaler, NUMERICAL_FEATURES), ('cat', OneHotEncoder, ['task_type'])
+        transformers = {name: (transformer, columns) for name, transformer, columns in preprocessor.transformers_}
+        scaler, numerical_features = transformers['num']
+        encoder, categorical_features = transformers['cat']
+
+        if list(numerical_features) != NUMERICAL_FEATURES or list(categorical_features) != CATEGORICAL_FEATURES:
+            raise ValueError("Preprocessor columns do not match the task prediction features")
+        if getattr(encoder, 'drop', None) is not None:
+            raise ValueError("OneHotEncoder with drop is not supported")
+
+        n_numeric = len(numerical_features)
+        mean = scaler.mean_ if scaler.with_mean else np.zeros(n_numeric)
+        scale = scaler.scale_ if scaler.with_std else np.ones(n_numeric)
+        reference = scaler.mean_ if getattr(scaler, 'mean_', None) is not None else None
+        return cls(numerical_features, [str(c) for c in encoder.categories_[0]], mean, scale, reference)
+
+    def encode(self, tasks: Sequence, now: Optional[datetime] = None) -> TaskFeatures:
+        n = len(tasks)
+        numeric = np.array([
+            (
+                task.duration,
+                PRIORITY_MAP.get(task.priority.upper(), DEFAULT_PRIORITY),
+                task.subtasks,
+                0,
+                0,
+                task.user_past_completion,
+                task.description_length,
+                task.comments_count,
+                task.assigned_team_size,
+                task.user_availability,
+                task.no_curr_assigned_tasks,
+                task.tasks_completed,
+                task.avg_completion_time,
+            )
+            for task in tasks
+        ], dtype=np.float64).reshape(n, len(NUMERICAL_FEATURES))
+
+        deadline_days = [task.deadline_days for task in tasks]
+        created_to_deadline = [task.created_to_deadline for task in tasks]
+        deadline_days_missing = None in deadline_days
+        created_to_deadline_missing = None in created_to_deadline
+
+        if deadline_days_missing or created_to_deadline_missing:
+            deadline_us = np.fromiter((_epoch_microseconds(task.deadline) for task in tasks), np.int64, n)
+        # As before, one missing value means the column is derived for every task
+        if deadline_days_missing:
+            now_us = _epoch_microseconds(now or datetime.now(timezone.utc))
+            numeric[:, 3] = _floor_days(deadline_us - now_us)
+        else:
+            numeric[:, 3] = deadline_days
+        if created_to_deadline_missing:
+            created_us = np.fromiter((_epoch_microseconds(task.created_at) for task in tasks), np.int64, n)
+            numeric[:, 4] = _floor_days(deadline_us - created_us)
+        else:
+            numeric[:, 4] = created_to_deadline
+
+        task_type = np.fromiter((self.category_index.get(task.task_type, -1) for task in tasks), np.int32, n)
+        return TaskFeatures(numeric, task_type, self.categories)
+
+    def encode_columns(self, numeric: np.ndarray, task_type_names: Sequence[str], task_type_index: np.ndarray,
+                       deadline_us: Optional[np.ndarray] = None, created_us: Optional[np.ndarray] = None,
+                       now: Optional[datetime] = None) -> TaskFeatures:
+        # Column-wise input such as the packed binary format: numeric in
+        # NUMERICAL_FEATURES order with NaN where a day count was left out,
+        # task_type as indices into a per-request dictionary (-1 for none)
+        numeric = np.array(numeric, dtype=np.float64)
+        if np.isnan(numeric[:, 3]).any():
+            if deadline_us is None:
+                raise ValueError("deadline_days left out without deadline timestamps")
+            now_us = _epoch_microseconds(now or datetime.now(timezone.utc))
+            numeric[:, 3] = _floor_days(deadline_us - now_us)
+        if np.isnan(numeric[:, 4]).any():
+            if deadline_us is None or created_us is None:
+                raise ValueError("created_to_deadline left out without deadline and created_at timestamps")
+            numeric[:, 4] = _floor_days(deadline_us - created_us)
+
+        # The trailing -1 is picked up by index -1
+        lookup = np.array([self.category_index.get(name, -1) for name in task_type_names] + [-1], dtype=np.int32)
+        return TaskFeatures(numeric, lookup[task_type_index], self.categories)
+
+    def missing_columns(self, columns) -> set:
+        columns = set(columns)
+        missing = set(self.numerical_features + CATEGORICAL_FEATURES) - columns
+        # The day counts can be derived from the raw timestamps
+        if 'deadline' in columns:
+            missing.discard('deadline_days')
+            if 'created_at' in columns:
+                missing.discard('created_to_deadline')
+        return missing
+
+    def encode_frame(self, data: "pd.DataFrame", now: Optional[datetime] = None) -> TaskFeatures:
+        # Accepts training-style frames (numeric priority, derived day counts) as
+        # well as raw API-style ones (priority strings, deadline/created_at), with
+        # the same derivation rules as encode()
+        import pandas as pd
+
+        numeric = np.empty((len(data), len(self.numerical_features)), dtype=np.float64)
+        for i, feature in enumerate(self.numerical_features):
+            if feature in ('priority', 'deadline_days', 'created_to_deadline'):
+                continue
+            numeric[:, i] = data[feature].to_numpy(dtype=np.float64)
+
+        priority = data['priority']
+        if not pd.api.types.is_numeric_dtype(priority):
+            priority = priority.str.upper().map(PRIORITY_MAP).fillna(DEFAULT_PRIORITY)
+        numeric[:, self.numerical_features.index('priority')] = priority.to_numpy(dtype=np.float64)
+
+        deadline = None
+        for feature, start in (('deadline_days', None), ('created_to_deadline', 'created_at')):
+            column = data.get(feature)
+            if column is None or column.isnull().any():
+                if deadline is None:
+                    deadline = pd.to_datetime(data['deadline'], utc=True)
+                if start is None:
+                    origin = pd.Timestamp(now or datetime.now(timezone.utc))
+                else:
+                    origin = pd.to_datetime(data[start], utc=True)
+                column = (deadline - origin).dt.days
+            numeric[:, self.numerical_features.index(feature)] = column.to_numpy(dtype=np.float64)
+
+        task_type = data['task_type'].map(self.category_index).fillna(-1).to_numpy(dtype=np.int32)
+        return TaskFeatures(numeric, task_type, self.categories)
+
+    def transform(self, features: TaskFeatures) -> np.ndarray:
+        n_numeric = len(self.numerical_features)
+        X = np.zeros((len(features), self.n_features), dtype=np.float32)
+        # Scaled in float64 like StandardScaler and only then rounded to float32
+        X[:, :n_numeric] = (features.numeric - self.mean) / self.scale
+        rows = np.flatnonzero(features.task_type >= 0)
+        X[rows, n_numeric + features.task_type[rows]] = 1.0
+        return X
+
+    def build(self, tasks: Sequence, now: Optional[datetime] = None) -> np.ndarray:
+        return self.transform(self.encode(tasks, now))
@@ -0,0 +1,152 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+from app.core import config
+from app.models.task_prediction_model import get_model_version, load_task_prediction_model
+
+EXECUTOR_KINDS = ("thread", "process")
+
+
+def _init_worker_process(version: Optional[str] = None):
+    # Every worker process owns its own copy of the model and preprocessor, of
+    # the version the API process encodes features for
+    load_task_prediction_model(version)
+
+
+def _timed_call(fn, args):
+    # time.monotonic is system-wide, so timestamps taken in a worker process
+    # can be compared with the submit time recorded on the event loop
+    started_at = time.monotonic()
+    result = fn(*args)
+    return result, started_at, time.monotonic()
+
+
+class InferenceExecutor:
+    def __init__(self, kind: str = "thread", workers: int = 1):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Unknown inference executor kind '{kind}', expected one of {EXECUTOR_KINDS}")
+        self.kind = kind
+        self.workers = max(1, workers)
+        self._pool: Optional[Executor] = None
+
+        self.pending = 0
+        self.peak_pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.queue_seconds_total = 0.0
+        self.run_seconds_total = 0.0
+        self.max_latency_seconds = 0.0
+
+    def _new_pool(self, version: Optional[str]) -> Executor:
+        if self.kind == "process":
+            return ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker_process,
+                initargs=(version,),
+            )
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+
+    def start(self):
+        if self._pool is not None:
+            return
+        self._pool = self._new_pool(get_model_version())
+        print(f"Inference executor started ({self.kind} pool, {self.workers} workers)")
+
+    async def start_replacement(self, version: str, warm_fn, *args) -> Executor:
+        # Process pool whose workers load the given model version, warmed with
+        # one warm_fn(*args) call per worker before it takes any traffic
+        pool = self._new_pool(version)
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.gather(*[loop.run_in_executor(pool, warm_fn, *args) for _ in range(self.workers)])
+        except BaseException:
+            # Also on cancellation, e.g. a shutdown during a reload
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        return pool
+
+    def swap_pool(self, pool: Executor):
+        # New calls go to the new pool right away; calls already submitted to
+        # the old one run to completion before its workers exit
+        old, self._pool = self._pool, pool
+        if old is not None:
+            old.shutdown(wait=False)
+        print(f"Inference executor switched to a new {self.kind} pool")
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    async def run(self, fn, *args):
+        if self._pool is None:
+            raise RuntimeError("Inference executor is not running")
+
+        loop = asyncio.get_running_loop()
+        submitted_at = time.monotonic()
+        self.submitted += 1
+        self.pending += 1
+        self.peak_pending = max(self.peak_pending, self.pending)
+        try:
+            result, started_at, finished_at = await loop.run_in_executor(self._pool, _timed_call, fn, args)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.pending -= 1
+
+        self.completed += 1
+        self.queue_seconds_total += started_at - submitted_at
+        self.run_seconds_total += finished_at - started_at
+        self.max_latency_seconds = max(self.max_latency_seconds, finished_at - submitted_at)
+        return result
+
+    @property
+    def queue_depth(self) -> int:
+        # Jobs that have been submitted but are not yet picked up by a worker
+        return max(0, self.pending - self.workers)
+
+    def stats(self) -> dict:
+        completed = self.completed or 1
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "pending": self.pending,
+            "peak_pending": self.peak_pending,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_queue_ms": self.queue_seconds_total / completed * 1000,
+            "avg_run_ms": self.run_seconds_total / completed * 1000,
+            "max_latency_ms": self.max_latency_seconds * 1000,
+        }
+
+
+inference_executor: Optional[InferenceExecutor] = None
+
+
+def start_inference_executor() -> InferenceExecutor:
+    global inference_executor
+    if inference_executor is None:
+        inference_executor = InferenceExecutor(config.INFERENCE_EXECUTOR, config.INFERENCE_WORKERS)
+        inference_executor.start()
+    return inference_executor
+
+
+def shutdown_inference_executor():
+    global inference_executor
+    if inference_executor is not None:
+        inference_executor.shutdown()
+        inference_executor = None
+
+
+def get_inference_executor() -> InferenceExecutor:
+    if inference_executor is None:
+        raise RuntimeError("Inference executor is not running")
+    return inference_executor
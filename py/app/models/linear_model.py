@@ -0,0 +1,76 @@
+from typing import Optional
+
+import numpy as np
+
+from app.models.feature_builder import FeatureBuilder, TaskFeatures
+
+# Logistic regression on the same ColumnTransformer features as the network,
+# for latency-sensitive callers. Like the inference bundle, the StandardScaler
+# is folded into the coefficients and the task_type one-hot into a lookup
+# table, so scoring is one dot product per row in plain NumPy.
+LINEAR_FORMAT_VERSION = 1
+
+
+def export_linear_model(classifier, preprocessor, path: str):
+    # classifier: a fitted binary LogisticRegression or SGDClassifier(loss="log_loss")
+    # on preprocessor.transform features
+    feature_builder = FeatureBuilder.from_preprocessor(preprocessor)
+    coef = np.asarray(classifier.coef_, dtype=np.float64).reshape(-1)
+    n_numeric = len(feature_builder.numerical_features)
+    if len(coef) != feature_builder.n_features:
+        raise ValueError(f"Classifier has {len(coef)} coefficients, the preprocessor gives {feature_builder.n_features}")
+
+    # ((x - mean) / scale) . w = x . (w / scale) - (mean / scale) . w
+    numeric_coef = coef[:n_numeric] / feature_builder.scale
+    intercept = float(np.asarray(classifier.intercept_).reshape(-1)[0]) - float(
+        (feature_builder.mean / feature_builder.scale) @ coef[:n_numeric]
+    )
+    # The extra zero is picked by code -1 (categories unseen in training)
+    category_coef = np.append(coef[n_numeric:], 0.0)
+
+    arrays = {
+        "format_version": np.array(LINEAR_FORMAT_VERSION),
+        "numerical_features": np.array(feature_builder.numerical_features),
+        "categories": np.array(feature_builder.categories),
+        "numeric_coef": numeric_coef,
+        "category_coef": category_coef,
+        "intercept": np.array(intercept),
+    }
+    if feature_builder.reference is not None:
+        arrays["reference"] = feature_builder.reference
+    with open(path, "wb") as f:
+        np.savez(f, **arrays)
+
+
+class LinearModel:
+    def __init__(self, numerical_features, categories, numeric_coef: np.ndarray, category_coef: np.ndarray,
+                 intercept: float, reference: Optional[np.ndarray] = None):
+        # float64 like the raw features, so there is no per-call cast
+        self.numeric_coef = numeric_coef
+        self.category_coef = category_coef
+        self.intercept = intercept
+        # Only used for encoding: the scaling already lives in numeric_coef
+        n_numeric = len(numerical_features)
+        self.feature_builder = FeatureBuilder(numerical_features, categories, np.zeros(n_numeric), np.ones(n_numeric),
+                                              reference)
+
+    @classmethod
+    def load(cls, path: str) -> "LinearModel":
+        with np.load(path, allow_pickle=False) as model:
+            version = int(model["format_version"])
+            if version != LINEAR_FORMAT_VERSION:
+                raise ValueError(f"Unsupported linear model format {version}")
+            return cls(
+                [str(name) for name in model["numerical_features"]],
+                [str(category) for category in model["categories"]],
+                model["numeric_coef"].astype(np.float64),
+                model["category_coef"].astype(np.float64),
+                float(model["intercept"]),
+                model["reference"] if "reference" in model else None,
+            )
+
+    def predict(self, features: TaskFeatures) -> np.ndarray:
+        z = features.numeric @ self.numeric_coef
+        z += self.category_coef[features.task_type]
+        z += self.intercept
+        return (1.0 / (1.0 + np.exp(-z))).astype(np.float32)
@@ -0,0 +1,146 @@
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from app.core import config
+from app.models.inference_bundle import BUNDLE_PRECISIONS, precision_bundle_path
+
+# Local registry of model versions:
+#
+#   <registry>/manifest.json      {"active": "<version>", "versions": [{"version": ..., "created_at": ..., "files": {...}}]}
+#   <registry>/<version>/         the Keras model, preprocessor, inference bundles, linear model and
+#                                 reference stats (app/models/drift_monitor.py) of one training run
+#
+# A version directory is never written to after it is published; switching
+# versions only rewrites the manifest, atomically. Without a manifest the
+# service falls back to the flat files in trained_models/ as version "unversioned".
+
+TRAINED_MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "trained_models")
+MODEL_FILENAME = "task_completion_prediction_model_nn.keras"
+PREPROCESSOR_FILENAME = "preprocessor_nn.pkl"
+BUNDLE_FILENAME = "task_completion_prediction_model_nn.npz"
+LINEAR_MODEL_FILENAME = "task_completion_prediction_model_linear.npz"
+REFERENCE_STATS_FILENAME = "reference_stats.json"
+UNVERSIONED = "unversioned"
+
+REGISTRY_DIR = config.MODEL_REGISTRY_DIR or os.path.join(TRAINED_MODELS_DIR, "registry")
+MANIFEST_PATH = os.path.join(REGISTRY_DIR, "manifest.json")
+
+
+class ModelArtifacts:
+    def __init__(self, version: str, directory: str, files: Optional[dict] = None):
+        files = files or {}
+        self.version = version
+        self.directory = directory
+        self.model_path = os.path.join(directory, files.get("model", MODEL_FILENAME))
+        self.preprocessor_path = os.path.join(directory, files.get("preprocessor", PREPROCESSOR_FILENAME))
+        # The bundle of the configured precision
+        bundle_key = "bundle" if config.BUNDLE_PRECISION == "float32" else f"bundle_{config.BUNDLE_PRECISION}"
+        self.bundle_path = os.path.join(
+            directory, files.get(bundle_key, precision_bundle_path(BUNDLE_FILENAME, config.BUNDLE_PRECISION)),
+        )
+        self.linear_model_path = os.path.join(directory, files.get("linear", LINEAR_MODEL_FILENAME))
+        self.reference_stats_path = os.path.join(directory, files.get("reference_stats", REFERENCE_STATS_FILENAME))
+
+
+def read_manifest() -> Optional[dict]:
+    if not os.path.exists(MANIFEST_PATH):
+        return None
+    with open(MANIFEST_PATH) as f:
+        return json.load(f)
+
+
+def manifest_mtime() -> Optional[int]:
+    try:
+        return os.stat(MANIFEST_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _write_manifest(manifest: dict):
+    # Written next to the manifest and renamed over it, so readers never see half a file
+    os.makedirs(REGISTRY_DIR, exist_ok=True)
+    tmp_path = f"{MANIFEST_PATH}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+
+def list_versions() -> List[dict]:
+    manifest = read_manifest()
+    return list(manifest["versions"]) if manifest else []
+
+
+def active_version() -> Optional[str]:
+    manifest = read_manifest()
+    return manifest.get("active") if manifest else None
+
+
+def resolve_model_version(version: Optional[str] = None) -> ModelArtifacts:
+    # The given version, or the manifest's active one; KeyError for unknown versions
+    if version == UNVERSIONED:
+        # Also once a manifest exists, e.g. for process pool workers started
+        # (or respawned) with the version served before the first publish
+        return ModelArtifacts(UNVERSIONED, TRAINED_MODELS_DIR)
+    manifest = read_manifest()
+    if manifest is None or (version is None and not manifest.get("active")):
+        if version is not None:
+            raise KeyError(f"Unknown model version '{version}', the registry at {REGISTRY_DIR} is empty")
+        return ModelArtifacts(UNVERSIONED, TRAINED_MODELS_DIR)
+    version = version or manifest["active"]
+    for entry in manifest["versions"]:
+        if entry["version"] == version:
+            return ModelArtifacts(version, os.path.join(REGISTRY_DIR, version), entry.get("files"))
+    raise KeyError(f"Unknown model version '{version}'")
+
+
+def set_active_version(version: str):
+    manifest = read_manifest()
+    if manifest is None or all(entry["version"] != version for entry in manifest["versions"]):
+        raise KeyError(f"Unknown model version '{version}'")
+    manifest["active"] = version
+    _write_manifest(manifest)
+
+
+def publish_model_version(model_path: str, preprocessor_path: str, bundle_path: Optional[str] = None,
+                          version: Optional[str] = None, activate: bool = True,
+                          linear_model_path: Optional[str] = None, reference_stats_path: Optional[str] = None) -> str:
+    # Copies one training run's artifacts into a new version directory and
+    # records it in the manifest (as the active version unless activate=False)
+    version = version or datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+    if version == UNVERSIONED:
+        raise ValueError(f"'{UNVERSIONED}' is reserved for the files in {TRAINED_MODELS_DIR}")
+    manifest = read_manifest() or {"active": None, "versions": []}
+    if any(entry["version"] == version for entry in manifest["versions"]):
+        raise ValueError(f"Model version '{version}' already exists")
+
+    directory = os.path.join(REGISTRY_DIR, version)
+    os.makedirs(directory)
+    files = {"model": MODEL_FILENAME, "preprocessor": PREPROCESSOR_FILENAME}
+    shutil.copy2(model_path, os.path.join(directory, MODEL_FILENAME))
+    shutil.copy2(preprocessor_path, os.path.join(directory, PREPROCESSOR_FILENAME))
+    for precision in BUNDLE_PRECISIONS if bundle_path is not None else ():
+        # Reduced-precision exports sit next to the float32 bundle
+        source = precision_bundle_path(bundle_path, precision)
+        if os.path.exists(source):
+            filename = precision_bundle_path(BUNDLE_FILENAME, precision)
+            shutil.copy2(source, os.path.join(directory, filename))
+            files["bundle" if precision == "float32" else f"bundle_{precision}"] = filename
+    if linear_model_path is not None and os.path.exists(linear_model_path):
+        shutil.copy2(linear_model_path, os.path.join(directory, LINEAR_MODEL_FILENAME))
+        files["linear"] = LINEAR_MODEL_FILENAME
+    if reference_stats_path is not None and os.path.exists(reference_stats_path):
+        shutil.copy2(reference_stats_path, os.path.join(directory, REFERENCE_STATS_FILENAME))
+        files["reference_stats"] = REFERENCE_STATS_FILENAME
+
+    manifest["versions"].append({
+        "version": version,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "files": files,
+    })
+    if activate:
+        manifest["active"] = version
+    _write_manifest(manifest)
+    return version
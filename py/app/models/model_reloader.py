@@ -0,0 +1,174 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+import numpy as np
+
+from app.core import config
+from app.core.metrics import record_error
+from app.models.feature_builder import TaskFeatures
+from app.models.inference_executor import InferenceExecutor
+from app.models.model_registry import active_version, manifest_mtime, resolve_model_version
+from app.models.task_prediction_model import (
+    activate_backend,
+    activate_feature_builder,
+    build_backend,
+    build_feature_builder,
+    get_model_version,
+    predict_features,
+)
+from app.models.warmup import synthetic_features
+
+# Hot reload of registry versions. The new version is loaded and warmed next
+# to the one being served (threads, or a second process pool) and swapped in
+# with plain assignments on the event loop, so requests never wait on a load
+# and calls in flight finish on the version they started with.
+
+
+def warm_prediction(features: TaskFeatures):
+    # Module-level so process pool workers can run it
+    predictions = predict_features(features)
+    if len(predictions) != len(features):
+        raise RuntimeError("Warm-up prediction of the new model version failed")
+
+
+def _warm_batches(n_categories: int):
+    rng = np.random.default_rng(0)
+    return [synthetic_features(size, n_categories, rng) for size in config.WARMUP_BATCH_SIZES or [1]]
+
+
+def build_and_warm_backend(artifacts):
+    backend = build_backend(artifacts)
+    for features in _warm_batches(len(backend.feature_builder.categories)):
+        for _ in range(config.WARMUP_ROUND_SIZE):
+            predictions = backend.predict(features)
+            if len(predictions) != len(features):
+                raise RuntimeError("Warm-up prediction of the new model version failed")
+    return backend
+
+
+class ModelReloader:
+    def __init__(self, executor: InferenceExecutor):
+        self.executor = executor
+        self._lock = asyncio.Lock()
+        self._watch_task: Optional[asyncio.Task] = None
+        self._seen_manifest: Optional[int] = manifest_mtime()
+
+        self.loading_version: Optional[str] = None
+        self.failed_version: Optional[str] = None
+        self.last_error: Optional[str] = None
+        self.last_reload_at: Optional[str] = None
+        self.last_reload_seconds = 0.0
+        self.reloads = 0
+
+    async def reload(self, version: Optional[str] = None) -> bool:
+        # Loads, warms and activates the given version (default: the manifest's
+        # active one). Returns False if that version is already served; unknown
+        # versions raise KeyError, load failures keep the current version and raise.
+        async with self._lock:
+            artifacts = resolve_model_version(version)
+            if artifacts.version == get_model_version():
+                return False
+            self.loading_version = artifacts.version
+            started = time.monotonic()
+            loop = asyncio.get_running_loop()
+            print(f"Loading model version {artifacts.version} from {artifacts.directory}")
+            try:
+                if self.executor.kind == "process":
+                    feature_builder = await loop.run_in_executor(None, build_feature_builder, artifacts)
+                    batches = _warm_batches(len(feature_builder.categories))
+                    pool = await self.executor.start_replacement(artifacts.version, warm_prediction, batches[0])
+                    try:
+                        for features in batches[1:]:
+                            await loop.run_in_executor(pool, warm_prediction, features)
+                    except BaseException:
+                        pool.shutdown(wait=False, cancel_futures=True)
+                        raise
+                    # No await between the two, so requests see both or neither
+                    self.executor.swap_pool(pool)
+                    activate_feature_builder(feature_builder, artifacts)
+                else:
+                    backend = await loop.run_in_executor(None, build_and_warm_backend, artifacts)
+                    activate_backend(backend)
+            except Exception as e:
+                self.failed_version = artifacts.version
+                self.last_error = f"Model version {artifacts.version}: {e}"
+                record_error("artifact_load")
+                print(f"Reload failed, still serving {get_model_version()}: {e}")
+                raise
+            finally:
+                self.loading_version = None
+
+            self.failed_version = None
+            self.last_error = None
+            self.reloads += 1
+            self.last_reload_seconds = time.monotonic() - started
+            self.last_reload_at = datetime.now(timezone.utc).isoformat()
+            print(f"Model version {artifacts.version} active after {self.last_reload_seconds:.2f}s")
+            return True
+
+    async def _watch(self, interval: float):
+        # Follows the manifest's active version, which is how an activation
+        # reaches every worker process of the service
+        while True:
+            await asyncio.sleep(interval)
+            mtime = manifest_mtime()
+            if mtime == self._seen_manifest:
+                continue
+            try:
+                version = active_version()
+                # A version that failed to load is retried only after the manifest changes again
+                self._seen_manifest = mtime
+                if version is not None and version != get_model_version():
+                    await self.reload(version)
+            except Exception as e:
+                print(f"Model registry watch: {e}")
+
+    def start_watch(self, interval: float):
+        if interval > 0 and self._watch_task is None:
+            self._watch_task = asyncio.create_task(self._watch(interval))
+
+    async def stop_watch(self):
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
+    def status(self) -> dict:
+        return {
+            "version": get_model_version(),
+            "registry_active": active_version(),
+            "loading": self.loading_version,
+            "failed_version": self.failed_version,
+            "last_error": self.last_error,
+            "reloads": self.reloads,
+            "last_reload_at": self.last_reload_at,
+            "last_reload_seconds": self.last_reload_seconds,
+            "watching": self._watch_task is not None,
+        }
+
+
+model_reloader: Optional[ModelReloader] = None
+
+
+def start_model_reloader(executor: InferenceExecutor) -> ModelReloader:
+    global model_reloader
+    if model_reloader is None:
+        model_reloader = ModelReloader(executor)
+        model_reloader.start_watch(config.MODEL_WATCH_SECONDS)
+    return model_reloader
+
+
+async def stop_model_reloader():
+    global model_reloader
+    if model_reloader is not None:
+        await model_reloader.stop_watch()
+        model_reloader = None
+
+
+def get_model_reloader() -> Optional[ModelReloader]:
+    return model_reloader
@@ -0,0 +1,81 @@
+import json
+import os
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from app.core import config
+from app.models.inference_bundle import BUNDLE_PRECISIONS, InferenceBundle, precision_bundle_path
+from app.models.task_prediction_model import risk_codes
+
+# Accuracy parity of the exported bundles (float32 and the reduced-precision
+# ones) against the Keras model on a held-out split: the evaluate_model
+# metrics for each, how far their probabilities move from Keras, how many
+# labels (at 0.5) and risk buckets flip, plus file size and scoring speed.
+# Only used at training/export time, so sklearn is fine here.
+
+
+def classification_metrics(y_true: np.ndarray, probabilities: np.ndarray) -> dict:
+    from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, roc_auc_score
+
+    y_pred = (probabilities > 0.5).astype(int)
+    return {
+        "accuracy": float(accuracy_score(y_true, y_pred)),
+        "precision": float(precision_score(y_true, y_pred, zero_division=0)),
+        "recall": float(recall_score(y_true, y_pred, zero_division=0)),
+        "f1": float(f1_score(y_true, y_pred, zero_division=0)),
+        "auc": float(roc_auc_score(y_true, probabilities)),
+    }
+
+
+def _us_per_row(bundle: InferenceBundle, features, repeats: int = 5) -> float:
+    bundle.predict(features)
+    started = time.perf_counter()
+    for _ in range(repeats):
+        bundle.predict(features)
+    return (time.perf_counter() - started) / repeats / len(features) * 1e6
+
+
+def precision_parity_report(model, preprocessor, X_test, y_test, bundle_path: str,
+                            output: Optional[str] = None) -> Dict[str, dict]:
+    # X_test/y_test as split off in the training scripts (training-style frame)
+    y_true = np.asarray(y_test)
+    reference = model.predict(preprocessor.transform(X_test), verbose=0).reshape(-1)
+    reference_labels = reference > 0.5
+    reference_risk = risk_codes(reference, config.RISK_THRESHOLDS)
+
+    report = {"keras": classification_metrics(y_true, reference)}
+    for precision in BUNDLE_PRECISIONS:
+        path = precision_bundle_path(bundle_path, precision)
+        if not os.path.exists(path):
+            continue
+        bundle = InferenceBundle.load(path)
+        features = bundle.feature_builder.encode_frame(X_test)
+        probabilities = bundle.predict(features).astype(np.float64)
+        diff = np.abs(probabilities - reference)
+        report[f"bundle_{precision}"] = dict(
+            classification_metrics(y_true, probabilities),
+            max_abs_diff=float(diff.max()),
+            mean_abs_diff=float(diff.mean()),
+            label_flips=int(np.sum((probabilities > 0.5) != reference_labels)),
+            risk_flips=int(np.sum(risk_codes(probabilities, config.RISK_THRESHOLDS) != reference_risk)),
+            size_bytes=os.path.getsize(path),
+            us_per_row=_us_per_row(bundle, features),
+        )
+
+    print(f"\nPrecision parity on {len(y_true)} held-out rows:")
+    print(f"{'':<16}{'accuracy':>9}{'f1':>8}{'auc':>8}{'max|diff|':>11}{'label flips':>13}"
+          f"{'risk flips':>12}{'KB':>8}{'us/row':>8}")
+    for name, entry in report.items():
+        line = f"{name:<16}{entry['accuracy']:>9.4f}{entry['f1']:>8.4f}{entry['auc']:>8.4f}"
+        if name != "keras":
+            line += (f"{entry['max_abs_diff']:>11.2e}{entry['label_flips']:>13}{entry['risk_flips']:>12}"
+                     f"{entry['size_bytes'] / 1024:>8.1f}{entry['us_per_row']:>8.3f}")
+        print(line)
+
+    if output:
+        with open(output, "w") as f:
+            json.dump({"rows": len(y_true), "report": report}, f, indent=2)
+        print(f"Parity report written to {output}")
+    return report
@@ -0,0 +1,138 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+import numpy as np
+
+from app.core import config
+from app.models.feature_builder import TaskFeatures
+from app.models.task_prediction_model import get_model_generation
+
+
+def feature_keys(features: TaskFeatures) -> List[bytes]:
+    # The key covers the fully derived row. deadline_days and created_to_deadline
+    # are whole days, so a task's key (and its score) changes when its deadline
+    # day rolls over and stays put within the day.
+    rows = np.empty((len(features), features.numeric.shape[1] + 1), dtype=np.float64)
+    rows[:, :-1] = features.numeric
+    rows[:, -1] = features.task_type
+    return [hashlib.blake2b(row.tobytes(), digest_size=16).digest() for row in rows]
+
+
+class PredictionCache:
+    def __init__(self, max_entries: int = 100_000, ttl_seconds: float = 3600):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._generation = get_model_generation()
+        # Version of the model that scored the entries, all of one generation
+        self._version: Optional[str] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def clear(self):
+        self._entries.clear()
+        self._version = None
+
+    def _check_generation(self):
+        generation = get_model_generation()
+        if generation != self._generation:
+            # Scores from a previous model artifact must not be served
+            self._generation = generation
+            self.invalidations += 1
+            self.clear()
+
+    def lookup(self, keys: List[bytes]):
+        self._check_generation()
+        now = time.monotonic()
+        values: List[Optional[float]] = [None] * len(keys)
+        missing = []
+        for i, key in enumerate(keys):
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= now:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                missing.append(i)
+                continue
+            self._entries.move_to_end(key)
+            values[i] = entry[0]
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+        return values, missing
+
+    def store(self, keys: List[bytes], values: List[float], generation: int, version: Optional[str]):
+        if generation != get_model_generation():
+            # The model changed while these rows were being scored
+            return
+        if version != self._version:
+            # Entries scored by another version (e.g. process pool workers still on the old one)
+            self.clear()
+            self._version = version
+        expires_at = time.monotonic() + self.ttl_seconds
+        for key, value in zip(keys, values):
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def predict(self, features: TaskFeatures,
+                      predict_misses: Callable[[TaskFeatures], Awaitable[Tuple[List[float], Optional[str]]]]
+                      ) -> Tuple[List[float], Optional[str]]:
+        keys = feature_keys(features)
+        values, missing = self.lookup(keys)
+        cached_version = self._version
+        if not missing:
+            return values, cached_version
+
+        generation = self._generation
+        partial = len(missing) < len(keys)
+        predictions, version = await predict_misses(features.take(missing) if partial else features)
+        if len(predictions) != len(missing):
+            return [], version
+        if partial and version != cached_version:
+            # The model changed between the lookup and the scoring: the hits are
+            # another version's scores, so the whole batch is scored again
+            predictions, version = await predict_misses(features)
+            if len(predictions) != len(keys):
+                return [], version
+            missing = list(range(len(keys)))
+        for i, prediction in zip(missing, predictions):
+            values[i] = prediction
+        self.store([keys[i] for i in missing], predictions, generation, version)
+        return values, version
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+prediction_cache: Optional[PredictionCache] = None
+
+
+def start_prediction_cache() -> Optional[PredictionCache]:
+    global prediction_cache
+    if config.CACHE_ENABLED and prediction_cache is None:
+        prediction_cache = PredictionCache(config.CACHE_MAX_ENTRIES, config.CACHE_TTL_SECONDS)
+    return prediction_cache
+
+
+def get_prediction_cache() -> Optional[PredictionCache]:
+    return prediction_cache
@@ -0,0 +1,244 @@
+import glob
+import math
+import os
+import time
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.models.feature_builder import CATEGORICAL_FEATURES, NUMERICAL_FEATURES
+
+# Out-of-core training input for datasets that do not fit in memory:
+#
+#  - fit_streaming_preprocessor makes one pass over the shards. It fits the
+#    StandardScaler with partial_fit, scans the task_type vocabulary and
+#    keeps a bounded test sample for evaluation.
+#  - training_dataset then feeds model.fit from a tf.data pipeline. Shards are
+#    read in chunks, interleaved, rebatched, scaled/one-hot encoded in a
+#    parallel map and prefetched.
+#
+# Rows are assigned to train/validation/test splits by a random draw seeded
+# per (seed, shard, chunk). Every pass reads the shards in the plan's chunk
+# size, so it sees the same split.
+
+LABEL = "completed_on_time"
+_FEATURE_COLUMNS = NUMERICAL_FEATURES + CATEGORICAL_FEATURES
+SPLITS = ("train", "validation", "test")
+_SPLIT_CODES = {name: i for i, name in enumerate(SPLITS)}
+
+
+def is_parquet(path: str) -> bool:
+    return path.lower().endswith((".parquet", ".pq"))
+
+
+def list_shards(paths: List[str]) -> List[str]:
+    # Files, directories of CSV/Parquet files and glob patterns, sorted
+    shards = []
+    for path in paths:
+        if os.path.isdir(path):
+            shards.extend(
+                os.path.join(path, name) for name in os.listdir(path)
+                if is_parquet(name) or name.lower().endswith(".csv")
+            )
+        elif glob.has_magic(path):
+            shards.extend(glob.glob(path))
+        else:
+            shards.append(path)
+    if not shards:
+        raise FileNotFoundError(f"No CSV or Parquet shards in {paths}")
+    return sorted(shards)
+
+
+def read_chunks(path: str, chunk_rows: int):
+    columns = _FEATURE_COLUMNS + [LABEL]
+    if is_parquet(path):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_rows, usecols=columns)
+
+
+class SplitPlan:
+    def __init__(self, test_fraction: float = 0.25, validation_fraction: float = 0.2, seed: int = 42,
+                 chunk_rows: int = 100_000):
+        # validation_fraction is a share of the non-test rows, like validation_split in model.fit
+        self.test_fraction = test_fraction
+        self.validation_fraction = validation_fraction
+        self.seed = seed
+        self.chunk_rows = chunk_rows
+
+    def assign(self, shard_index: int, chunk_index: int, n_rows: int) -> np.ndarray:
+        rng = np.random.default_rng(np.random.SeedSequence(self.seed, spawn_key=(shard_index, chunk_index)))
+        draw = rng.random(n_rows)
+        codes = np.full(n_rows, _SPLIT_CODES["train"], dtype=np.int8)
+        codes[draw < self.test_fraction + (1 - self.test_fraction) * self.validation_fraction] = _SPLIT_CODES["validation"]
+        codes[draw < self.test_fraction] = _SPLIT_CODES["test"]
+        return codes
+
+
+def _build_preprocessor(scaler, categories: List[str], sample: pd.DataFrame):
+    # The same fitted ColumnTransformer as preprocessor.fit_transform in the
+    # training scripts, so FeatureBuilder and the bundle export take it as is.
+    # Fitting on a small sample sets up the fitted state; the scaler is then
+    # replaced by the one fitted over the whole training split
+    from sklearn.compose import ColumnTransformer
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    preprocessor = ColumnTransformer(
+        transformers=[
+            ('num', StandardScaler(), NUMERICAL_FEATURES),
+            ('cat', OneHotEncoder(categories=[categories], handle_unknown='ignore'), CATEGORICAL_FEATURES),
+        ],
+        remainder='drop'
+    )
+    preprocessor.fit(sample[_FEATURE_COLUMNS])
+    preprocessor.transformers_ = [
+        (name, scaler if name == 'num' else transformer, columns)
+        for name, transformer, columns in preprocessor.transformers_
+    ]
+    return preprocessor
+
+
+class StreamingFit:
+    def __init__(self, preprocessor, split_rows: dict, positive_rate: float, X_test: pd.DataFrame, y_test: pd.Series):
+        self.preprocessor = preprocessor
+        self.split_rows = split_rows
+        self.positive_rate = positive_rate
+        self.X_test = X_test
+        self.y_test = y_test
+
+
+def fit_streaming_preprocessor(shards: List[str], plan: SplitPlan, eval_rows: int = 250_000) -> StreamingFit:
+    # One pass: scaler and vocabulary from the train and validation rows (the
+    # rows the in-memory scripts fit_transform), at most eval_rows test rows kept
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = StandardScaler()
+    vocabulary = set()
+    split_rows = dict.fromkeys(SPLITS, 0)
+    positives = 0
+    test_parts = []
+    test_kept = 0
+    sample = None
+    started = time.monotonic()
+
+    for shard_index, path in enumerate(shards):
+        for chunk_index, chunk in enumerate(read_chunks(path, plan.chunk_rows)):
+            codes = plan.assign(shard_index, chunk_index, len(chunk))
+            fit_rows = chunk[codes != _SPLIT_CODES["test"]]
+            if len(fit_rows):
+                scaler.partial_fit(fit_rows[NUMERICAL_FEATURES].astype(np.float64))
+                vocabulary.update(fit_rows["task_type"].astype(str).unique())
+                positives += int(fit_rows[LABEL].sum())
+                if sample is None:
+                    sample = fit_rows.head(1000)
+            for name, code in _SPLIT_CODES.items():
+                split_rows[name] += int(np.count_nonzero(codes == code))
+            if test_kept < eval_rows:
+                test_rows = chunk[codes == _SPLIT_CODES["test"]].head(eval_rows - test_kept)
+                test_parts.append(test_rows)
+                test_kept += len(test_rows)
+        total = sum(split_rows.values())
+        print(f"Scanned {path}: {total:,} rows so far, {total / (time.monotonic() - started):,.0f} rows/s")
+
+    if sample is None:
+        raise ValueError("No training rows in the shards")
+    categories = sorted(vocabulary)
+    sample = sample.astype({"task_type": str})
+    preprocessor = _build_preprocessor(scaler, categories, sample)
+    test = pd.concat(test_parts, ignore_index=True) if test_parts else sample.iloc[:0]
+    fit_rows = split_rows["train"] + split_rows["validation"]
+    print(f"Preprocessor fitted on {fit_rows:,} rows, task types {categories}; "
+          f"split {split_rows}, {len(test):,} test rows kept for evaluation")
+    return StreamingFit(preprocessor, split_rows, positives / max(fit_rows, 1),
+                        test[_FEATURE_COLUMNS], test[LABEL])
+
+
+def training_dataset(shards: List[str], plan: SplitPlan, preprocessor, split: str, batch_size: int,
+                     rows: Optional[int] = None, shuffle: bool = False, parallel_shards: Optional[int] = None):
+    # (features, label) batches of one split, features as preprocessor.transform
+    # gives them; every batch is full except the last. With the split's row count
+    # from the scan the dataset has a known length, which model.fit uses as the epoch
+    import tensorflow as tf
+
+    from app.models.feature_builder import FeatureBuilder
+
+    feature_builder = FeatureBuilder.from_preprocessor(preprocessor)
+    split_code = _SPLIT_CODES[split]
+    n_numeric = len(NUMERICAL_FEATURES)
+
+    def shard_chunks(shard_index):
+        shard_index = int(shard_index)
+        rng = np.random.default_rng()
+        for chunk_index, chunk in enumerate(read_chunks(shards[shard_index], plan.chunk_rows)):
+            rows = chunk[plan.assign(shard_index, chunk_index, len(chunk)) == split_code]
+            if shuffle:
+                # Rows are shuffled within a chunk; chunks of different shards are interleaved
+                rows = rows.iloc[rng.permutation(len(rows))]
+            if len(rows):
+                yield (
+                    rows[NUMERICAL_FEATURES].to_numpy(dtype=np.float32),
+                    rows["task_type"].astype(str).to_numpy(dtype=object),
+                    rows[LABEL].to_numpy(dtype=np.float32),
+                )
+
+    signature = (
+        tf.TensorSpec(shape=(None, n_numeric), dtype=tf.float32),
+        tf.TensorSpec(shape=(None,), dtype=tf.string),
+        tf.TensorSpec(shape=(None,), dtype=tf.float32),
+    )
+    mean = tf.constant(feature_builder.mean, dtype=tf.float32)
+    scale = tf.constant(feature_builder.scale, dtype=tf.float32)
+    # Unknown categories look up to -1, which one_hot encodes as all zeros (handle_unknown='ignore')
+    category_table = tf.lookup.StaticHashTable(
+        tf.lookup.KeyValueTensorInitializer(
+            tf.constant(feature_builder.categories), tf.range(len(feature_builder.categories), dtype=tf.int64),
+        ),
+        default_value=-1,
+    )
+
+    def encode(numeric, task_type, label):
+        one_hot = tf.one_hot(category_table.lookup(task_type), len(feature_builder.categories), dtype=tf.float32)
+        return tf.concat([(numeric - mean) / scale, one_hot], axis=1), label
+
+    dataset = tf.data.Dataset.range(len(shards))
+    if shuffle:
+        dataset = dataset.shuffle(len(shards), seed=plan.seed, reshuffle_each_iteration=True)
+    dataset = dataset.interleave(
+        lambda shard_index: tf.data.Dataset.from_generator(shard_chunks, args=(shard_index,), output_signature=signature),
+        cycle_length=min(len(shards), parallel_shards or os.cpu_count() or 1),
+        num_parallel_calls=tf.data.AUTOTUNE,
+        deterministic=not shuffle,
+    )
+    dataset = dataset.rebatch(batch_size)
+    if rows is not None:
+        dataset = dataset.apply(tf.data.experimental.assert_cardinality(math.ceil(rows / batch_size)))
+    return dataset.map(encode, num_parallel_calls=tf.data.AUTOTUNE).prefetch(tf.data.AUTOTUNE)
+
+
+def throughput_logger(train_rows: int, validation_rows: int):
+    # Keras callback printing rows/s of the training and validation passes of every epoch
+    import tensorflow as tf
+
+    class ThroughputLogger(tf.keras.callbacks.Callback):
+        def on_epoch_begin(self, epoch, logs=None):
+            self.epoch_started = time.monotonic()
+            self.validation_started = None
+
+        def on_test_begin(self, logs=None):
+            self.validation_started = time.monotonic()
+
+        def on_epoch_end(self, epoch, logs=None):
+            ended = time.monotonic()
+            train_seconds = (self.validation_started or ended) - self.epoch_started
+            line = (f"Epoch {epoch + 1}: {train_rows:,} training rows in {train_seconds:.1f}s "
+                    f"({train_rows / max(train_seconds, 1e-9):,.0f} rows/s)")
+            if self.validation_started is not None:
+                validation_seconds = ended - self.validation_started
+                line += (f", {validation_rows:,} validation rows in {validation_seconds:.1f}s "
+                         f"({validation_rows / max(validation_seconds, 1e-9):,.0f} rows/s)")
+            print(line)
+
+    return ThroughputLogger()
@@ -1,64 +1,348 @@
+import hashlib
 import os
-import joblib
-import pandas as pd
+import time
+from datetime import datetime, timezone
 import numpy as np
-from typing import List
-from tensorflow.keras.models import load_model
-
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-MODEL_PATH = os.path.join(BASE_DIR, "trained_models/task_completion_prediction_model_nn.keras")
-PREPROCESSOR_PATH = os.path.join(BASE_DIR, "trained_models/preprocessor_nn.pkl")
-
-task_prediction_model = None
-task_prediction_preprocessor = None
-
-def load_task_prediction_model():
-    global task_prediction_model, task_prediction_preprocessor
-    if task_prediction_model is None:
-        if os.path.exists(MODEL_PATH):
-            try:
-                task_prediction_model = load_model(MODEL_PATH)
-                print(f"Task prediction model loaded successfully from {MODEL_PATH}")
-            except Exception as e:
-                print(f"Error loading Keras model: {e}")
-        else:
-            print(f"Model not found at {MODEL_PATH}")
-    if task_prediction_preprocessor is None:
-        if os.path.exists(PREPROCESSOR_PATH):
-            try:
-                task_prediction_preprocessor = joblib.load(PREPROCESSOR_PATH)
-                print(f"Preprocessor loaded successfully from {PREPROCESSOR_PATH}")
-            except Exception as e:
-                print(f"Error loading preprocessor: {e}")
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple
+
+from app.core import config
+from app.core.metrics import observe_model_call, record_error
+from app.models.feature_builder import FeatureBuilder, TaskFeatures
+from app.models.dense_network import DenseLayer, extract_dense_layers, forward
+from app.models.inference_bundle import InferenceBundle
+from app.models.linear_model import LinearModel
+from app.models.model_registry import (
+    BUNDLE_FILENAME,
+    LINEAR_MODEL_FILENAME,
+    MODEL_FILENAME,
+    PREPROCESSOR_FILENAME,
+    TRAINED_MODELS_DIR,
+    ModelArtifacts,
+    resolve_model_version,
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# The unversioned artifacts; the served version is resolved through the model registry
+MODEL_PATH = os.path.join(TRAINED_MODELS_DIR, MODEL_FILENAME)
+PREPROCESSOR_PATH = os.path.join(TRAINED_MODELS_DIR, PREPROCESSOR_FILENAME)
+BUNDLE_PATH = os.path.join(TRAINED_MODELS_DIR, BUNDLE_FILENAME)
+LINEAR_MODEL_PATH = os.path.join(TRAINED_MODELS_DIR, LINEAR_MODEL_FILENAME)
+
+INFERENCE_BACKENDS = ("keras", "numpy", "bundle", "linear")
+RISK_LEVELS = ("HIGH", "MEDIUM", "LOW")
+
+if len(config.RISK_THRESHOLDS) != len(RISK_LEVELS) - 1:
+    raise ValueError(f"TASKR_RISK_THRESHOLDS needs {len(RISK_LEVELS) - 1} values, got {config.RISK_THRESHOLDS}")
+
+_RISK_NAMES = np.array(RISK_LEVELS)
+
+task_feature_builder: Optional[FeatureBuilder] = None
+task_prediction_backend = None
+candidate_backend = None
+# Registry version whose artifacts are being served by this process
+model_artifacts: Optional[ModelArtifacts] = None
+model_load_errors: List[str] = []
+# Bumped whenever this process activates model artifacts, so caches can drop old scores
+model_generation = 0
+_artifact_cache = {}
+
+
+class KerasBackend:
+    name = "keras"
+
+    def __init__(self, model, feature_builder: FeatureBuilder):
+        self.model = model
+        self.feature_builder = feature_builder
+
+    def predict(self, features: TaskFeatures) -> np.ndarray:
+        started = time.perf_counter()
+        X = self.feature_builder.transform(features)
+        transformed = time.perf_counter()
+        predictions = self.model.predict([X]).reshape(-1)
+        observe_model_call(self.name, len(features), transformed - started, time.perf_counter() - transformed)
+        return predictions
+
+
+class NumpyBackend:
+    name = "numpy"
+
+    def __init__(self, layers: List[DenseLayer], feature_builder: FeatureBuilder):
+        self.layers = [
+            (kernel.astype(np.float32), bias.astype(np.float32), activation)
+            for kernel, bias, activation in layers
+        ]
+        self.feature_builder = feature_builder
+
+    @classmethod
+    def from_keras(cls, model, feature_builder: FeatureBuilder) -> "NumpyBackend":
+        return cls(extract_dense_layers(model), feature_builder)
+
+    def predict(self, features: TaskFeatures) -> np.ndarray:
+        started = time.perf_counter()
+        X = self.feature_builder.transform(features)
+        transformed = time.perf_counter()
+        predictions = forward(self.layers, X).reshape(-1)
+        observe_model_call(self.name, len(features), transformed - started, time.perf_counter() - transformed)
+        return predictions
+
+
+class BundleBackend:
+    name = "bundle"
+
+    def __init__(self, bundle: InferenceBundle):
+        self.bundle = bundle
+        self.feature_builder = bundle.feature_builder
+
+    def predict(self, features: TaskFeatures) -> np.ndarray:
+        # Scaling and one-hot are folded into the first layer, so there is no separate transform
+        started = time.perf_counter()
+        predictions = self.bundle.predict(features)
+        observe_model_call(self.name, len(features), None, time.perf_counter() - started)
+        return predictions
+
+
+class LinearBackend:
+    name = "linear"
+
+    def __init__(self, model: LinearModel):
+        self.model = model
+        self.feature_builder = model.feature_builder
+
+    def predict(self, features: TaskFeatures) -> np.ndarray:
+        started = time.perf_counter()
+        predictions = self.model.predict(features)
+        observe_model_call(self.name, len(features), None, time.perf_counter() - started)
+        return predictions
+
+
+def _load_error(message: str):
+    print(message)
+    record_error("artifact_load")
+    model_load_errors.append(message)
+
+def _require(path: str, what: str):
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{what} not found at {path}")
+
+def _read_preprocessor(path: str):
+    import joblib
+    return joblib.load(path)
+
+def _read_keras_model(path: str):
+    # Imported here so the bundle backend never pulls in TensorFlow
+    from tensorflow.keras.models import load_model
+    return load_model(path)
+
+def build_backend(artifacts: ModelArtifacts, backend_name: Optional[str] = None):
+    # Loads one model version for the configured (or given) backend without
+    # touching the one being served; raises if an artifact is missing or unreadable
+    backend_name = backend_name or config.INFERENCE_BACKEND
+    if backend_name not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend_name}', expected one of {INFERENCE_BACKENDS}")
+    if backend_name == "bundle":
+        _require(artifacts.bundle_path, "Inference bundle")
+        backend = BundleBackend(InferenceBundle.load(artifacts.bundle_path))
+    elif backend_name == "linear":
+        _require(artifacts.linear_model_path, "Linear model")
+        backend = LinearBackend(LinearModel.load(artifacts.linear_model_path))
+    else:
+        _require(artifacts.preprocessor_path, "Preprocessor")
+        _require(artifacts.model_path, "Model")
+        feature_builder = FeatureBuilder.from_preprocessor(_read_preprocessor(artifacts.preprocessor_path))
+        model = _read_keras_model(artifacts.model_path)
+        if backend_name == "numpy":
+            # The Keras model is only needed for its weights and is dropped afterwards
+            backend = NumpyBackend.from_keras(model, feature_builder)
         else:
-            print(f"Preprocessor not found at {PREPROCESSOR_PATH}")
+            backend = KerasBackend(model, feature_builder)
+    backend.artifacts = artifacts
+    return backend
 
-def predict_task_completion(data: pd.DataFrame) -> List[float]:
-    if task_prediction_model is None or task_prediction_preprocessor is None:
-        print("Model or preprocessor not loaded. Cannot make predictions.")
+def build_feature_builder(artifacts: ModelArtifacts) -> FeatureBuilder:
+    # Only what is needed to encode requests, e.g. on the API process when
+    # the model itself lives in inference worker processes
+    if config.INFERENCE_BACKEND == "bundle":
+        _require(artifacts.bundle_path, "Inference bundle")
+        return InferenceBundle.load(artifacts.bundle_path).feature_builder
+    if config.INFERENCE_BACKEND == "linear":
+        _require(artifacts.linear_model_path, "Linear model")
+        return LinearModel.load(artifacts.linear_model_path).feature_builder
+    _require(artifacts.preprocessor_path, "Preprocessor")
+    return FeatureBuilder.from_preprocessor(_read_preprocessor(artifacts.preprocessor_path))
+
+def activate_backend(backend):
+    # Each global is replaced in a single assignment. predict_features reads the
+    # backend once per call, so calls already running finish on the old version.
+    global task_prediction_backend, task_feature_builder, model_artifacts, model_generation
+    task_prediction_backend = backend
+    task_feature_builder = backend.feature_builder
+    model_artifacts = backend.artifacts
+    model_generation += 1
+
+def activate_feature_builder(feature_builder: FeatureBuilder, artifacts: ModelArtifacts):
+    global task_feature_builder, model_artifacts, model_generation
+    task_feature_builder = feature_builder
+    model_artifacts = artifacts
+    model_generation += 1
+
+def load_task_prediction_model(version: Optional[str] = None):
+    # Without a version: the registry's active one, unless a model is already loaded
+    if task_prediction_backend is not None and version is None:
+        return
+    try:
+        artifacts = resolve_model_version(version)
+        backend = build_backend(artifacts)
+    except Exception as e:
+        _load_error(f"Error loading model: {e}")
+        return
+    activate_backend(backend)
+    print(f"Model version {artifacts.version} loaded ({config.INFERENCE_BACKEND} backend) from {artifacts.directory}")
+
+def load_task_feature_builder(version: Optional[str] = None):
+    if task_feature_builder is not None and version is None:
+        return
+    try:
+        artifacts = resolve_model_version(version)
+        feature_builder = build_feature_builder(artifacts)
+    except Exception as e:
+        _load_error(f"Error loading preprocessor: {e}")
+        return
+    activate_feature_builder(feature_builder, artifacts)
+    print(f"Feature builder of model version {artifacts.version} loaded from {artifacts.directory}")
+
+def _artifact_paths() -> List[str]:
+    if model_artifacts is None:
         return []
+    if config.INFERENCE_BACKEND == "bundle":
+        return [model_artifacts.bundle_path]
+    if config.INFERENCE_BACKEND == "linear":
+        return [model_artifacts.linear_model_path]
+    return [model_artifacts.model_path, model_artifacts.preprocessor_path]
+
+def artifact_versions() -> dict:
+    versions = {}
+    for path in _artifact_paths():
+        if not os.path.exists(path):
+            versions[os.path.basename(path)] = None
+            continue
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        if key not in _artifact_cache:
+            with open(path, "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+            _artifact_cache[key] = {
+                "sha256": digest[:12],
+                "modified": datetime.fromtimestamp(stat.st_mtime, timezone.utc).isoformat(),
+                "size_bytes": stat.st_size,
+            }
+        versions[os.path.basename(path)] = _artifact_cache[key]
+    return versions
 
+def model_status() -> dict:
+    # Load state of this process; with the process executor the model itself
+    # lives in the pool workers and only the feature builder is loaded here
+    return {
+        "backend": config.INFERENCE_BACKEND,
+        "model_version": get_model_version(),
+        "bundle_precision": config.BUNDLE_PRECISION if config.INFERENCE_BACKEND == "bundle" else None,
+        "model_loaded": task_prediction_backend is not None,
+        "preprocessor_loaded": task_feature_builder is not None,
+        "artifacts": artifact_versions(),
+        "errors": list(model_load_errors),
+    }
+
+def get_model_generation() -> int:
+    return model_generation
+
+def get_model_artifacts() -> Optional[ModelArtifacts]:
+    return model_artifacts
+
+def get_model_version() -> Optional[str]:
+    return model_artifacts.version if model_artifacts is not None else None
+
+def get_task_feature_builder() -> Optional[FeatureBuilder]:
+    return task_feature_builder
+
+def encode_task_features(tasks: Sequence) -> Optional[TaskFeatures]:
+    if task_feature_builder is None:
+        print("Preprocessor not loaded. Cannot build features.")
+        record_error("preprocessor_not_loaded")
+        return None
+    return task_feature_builder.encode(tasks)
+
+def encode_task_columns(numeric: np.ndarray, task_type_names: Sequence[str], task_type_index: np.ndarray,
+                        deadline_us: Optional[np.ndarray] = None,
+                        created_us: Optional[np.ndarray] = None) -> Optional[TaskFeatures]:
+    if task_feature_builder is None:
+        print("Preprocessor not loaded. Cannot build features.")
+        record_error("preprocessor_not_loaded")
+        return None
+    return task_feature_builder.encode_columns(numeric, task_type_names, task_type_index, deadline_us, created_us)
+
+def _predict_with(backend, features: TaskFeatures, error_cause: str) -> List[float]:
     try:
-        categorical_features = ['task_type']
-        numerical_features = [
-            'duration', 'priority', 'subtasks', 'deadline_days', 'created_to_deadline',
-            'user_past_completion', 'description_length', 'comments_count',
-            'assigned_team_size', 'user_availability', 'no_curr_assigned_tasks',
-            'tasks_completed', 'avg_completion_time'
-        ]
+        # Rows encoded before a model swap carry the previous version's category codes
+        preds = backend.predict(features.for_categories(backend.feature_builder.categories))
+        return preds.tolist()
+    except Exception as e:
+        print(f"Error during prediction: {e}")
+        record_error(error_cause)
+        return []
+
+def predict_versioned_features(features: TaskFeatures) -> Tuple[List[float], Optional[str]]:
+    # Scores and the version of the backend that produced them, read together
+    # so a model swap during the call cannot mislabel them
+    backend = task_prediction_backend
+    if backend is None:
+        print("Model or preprocessor not loaded. Cannot make predictions.")
+        record_error("model_not_loaded")
+        return [], None
+    return _predict_with(backend, features, "prediction_exception"), backend.artifacts.version
 
-        required_columns = set(numerical_features + categorical_features )
-        missing = required_columns - set(data.columns)
+def predict_features(features: TaskFeatures) -> List[float]:
+    return predict_versioned_features(features)[0]
+
+def activate_candidate_backend(backend):
+    # A second version scored next to the served one (shadow and canary traffic),
+    # always in this process; None removes it
+    global candidate_backend
+    candidate_backend = backend
+
+def get_candidate_version() -> Optional[str]:
+    backend = candidate_backend
+    return backend.artifacts.version if backend is not None else None
+
+def predict_candidate_features(features: TaskFeatures) -> List[float]:
+    backend = candidate_backend
+    if backend is None:
+        return []
+    return _predict_with(backend, features, "candidate_prediction_exception")
+
+def predict_task_completion(data: "pd.DataFrame") -> List[float]:
+    if task_prediction_backend is None:
+        print("Model or preprocessor not loaded. Cannot make predictions.")
+        record_error("model_not_loaded")
+        return []
+
+    try:
+        missing = task_feature_builder.missing_columns(data.columns)
         if missing:
             print(f"Missing required columns for prediction: {missing}")
+            record_error("missing_columns")
             return []
 
-        X_num_cat = data[numerical_features + categorical_features]
-        X_num_cat_processed = task_prediction_preprocessor.transform(X_num_cat)
-
-        preds = task_prediction_model.predict([X_num_cat_processed])
-        preds = preds.flatten().tolist()
-        return preds
+        features = task_feature_builder.encode_frame(data)
     except Exception as e:
         print(f"Error during prediction: {e}")
+        record_error("featurize_exception")
         return []
+    return predict_features(features)
+
+def risk_codes(probabilities: np.ndarray, thresholds: Sequence[float] = (0.3, 0.6)) -> np.ndarray:
+    # 0 = HIGH below the first threshold, 1 = MEDIUM, 2 = LOW from the second one
+    return np.searchsorted(np.asarray(thresholds), probabilities, side="right").astype(np.uint8)
+
+def risk_levels(probabilities: np.ndarray) -> np.ndarray:
+    return _RISK_NAMES[risk_codes(probabilities, config.RISK_THRESHOLDS)]
@@ -0,0 +1,291 @@
+import asyncio
+import heapq
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+import numpy as np
+
+from app.core import config
+from app.core.metrics import observe_snapshot_rows, record_error
+from app.models.feature_builder import NUMERICAL_FEATURES, TaskFeatures, _epoch_microseconds
+from app.models.task_prediction_model import get_model_generation, get_task_feature_builder
+from app.schemas.task_prediction import TaskPredictionInput
+
+# Per-task_id snapshots of the last request fields, derived features and score,
+# so callers can send only what changed and only tasks whose derived features
+# moved get re-scored.
+#
+# A derived deadline_days is floor((deadline - now) / 1 day). It does not
+# change at midnight but at the deadline's time of day. Each snapshot records
+# the next such rollover in a heap, and the sweep re-derives exactly the tasks
+# that are due, plus every task after a model swap.
+#
+# The store lives in one process. With several workers each keeps its own,
+# and a delta for a task another worker stored is answered with its id in
+# unknown_task_ids, so the caller resends the full task.
+
+_MICROSECONDS_PER_DAY = 86_400_000_000
+_DEADLINE_DAYS = NUMERICAL_FEATURES.index("deadline_days")
+_CREATED_TO_DEADLINE = NUMERICAL_FEATURES.index("created_to_deadline")
+
+ScoreFn = Callable[[TaskFeatures], Awaitable[List[float]]]
+# (task_id, completion probability, re-scored by this call)
+SnapshotScore = Tuple[int, float, bool]
+
+
+class TaskSnapshot:
+    __slots__ = ("task", "numeric", "task_type", "probability", "generation", "rollover_us")
+
+
+class TaskSnapshotStore:
+    def __init__(self, max_tasks: int = 1_000_000):
+        self.max_tasks = max(1, max_tasks)
+        # Seq numbers are only comparable within one epoch (one store instance)
+        self.epoch = uuid.uuid4().hex[:12]
+        # Least recently written first, which is also the eviction order
+        self._snapshots: "OrderedDict[int, TaskSnapshot]" = OrderedDict()
+        # task_id -> seq of its last re-score, oldest first
+        self._changes: "OrderedDict[int, int]" = OrderedDict()
+        # (rollover_us, task_id); entries of rewritten or deleted snapshots are skipped when popped
+        self._rollovers: List[Tuple[int, int]] = []
+        self._seq = 0
+        self._scanned_generation = get_model_generation()
+        # Writes hold this across scoring, so two calls never interleave on a task
+        self._lock = asyncio.Lock()
+
+        self.rows = {"put": 0, "delta": 0, "sweep": 0}
+        self.recomputed = {"put": 0, "delta": 0, "sweep": 0}
+        self.unknown = 0
+        self.evictions = 0
+        self.sweeps = 0
+        self.last_sweep = None
+
+    def __len__(self) -> int:
+        return len(self._snapshots)
+
+    def _encode(self, tasks: List[TaskPredictionInput], now: datetime) -> TaskFeatures:
+        features = get_task_feature_builder().encode(tasks, now)
+        # encode() derives a day count for every task once one task leaves it
+        # out; a snapshot keeps whatever its own task sent
+        for column, field in ((_DEADLINE_DAYS, "deadline_days"), (_CREATED_TO_DEADLINE, "created_to_deadline")):
+            for i, task in enumerate(tasks):
+                value = getattr(task, field)
+                if value is not None:
+                    features.numeric[i, column] = value
+        return features
+
+    async def _refresh(self, task_ids: List[int], tasks: List[TaskPredictionInput], score: ScoreFn) -> List[SnapshotScore]:
+        if get_task_feature_builder() is None:
+            raise RuntimeError("Preprocessor not loaded")
+        now = datetime.now(timezone.utc)
+        features = self._encode(tasks, now)
+        generation = get_model_generation()
+        changed = [
+            i for i, task_id in enumerate(task_ids)
+            if (snapshot := self._snapshots.get(task_id)) is None
+            or snapshot.generation != generation
+            or snapshot.task_type != features.task_type[i]
+            or not np.array_equal(snapshot.numeric, features.numeric[i])
+        ]
+        probabilities = {}
+        if changed:
+            predictions = await score(features.take(changed) if len(changed) < len(task_ids) else features)
+            if len(predictions) != len(changed):
+                raise RuntimeError("Prediction failed")
+            probabilities = dict(zip(changed, predictions))
+        if get_model_generation() != generation:
+            # Swapped while scoring: these scores are stale, the next sweep rescans
+            self._scanned_generation = None
+
+        results = []
+        for i, (task_id, task) in enumerate(zip(task_ids, tasks)):
+            snapshot = self._snapshots.pop(task_id, None) or TaskSnapshot()
+            snapshot.task = task
+            snapshot.numeric = features.numeric[i].copy()
+            snapshot.task_type = features.task_type[i]
+            if i in probabilities:
+                snapshot.probability = probabilities[i]
+                snapshot.generation = generation
+                self._seq += 1
+                self._changes.pop(task_id, None)
+                self._changes[task_id] = self._seq
+            self._snapshots[task_id] = snapshot
+            rollover_us = None
+            if task.deadline_days is None:
+                rollover_us = _epoch_microseconds(task.deadline) - int(snapshot.numeric[_DEADLINE_DAYS]) * _MICROSECONDS_PER_DAY
+            if rollover_us is not None and rollover_us != getattr(snapshot, "rollover_us", None):
+                heapq.heappush(self._rollovers, (rollover_us, task_id))
+            snapshot.rollover_us = rollover_us
+            results.append((task_id, snapshot.probability, i in probabilities))
+
+        while len(self._snapshots) > self.max_tasks:
+            task_id, _ = self._snapshots.popitem(last=False)
+            self._changes.pop(task_id, None)
+            self.evictions += 1
+        if len(self._rollovers) > 2 * len(self._snapshots) + 1024:
+            self._rollovers = [
+                (snapshot.rollover_us, task_id) for task_id, snapshot in self._snapshots.items()
+                if snapshot.rollover_us is not None
+            ]
+            heapq.heapify(self._rollovers)
+        return results
+
+    def _record(self, source: str, results: List[SnapshotScore]):
+        recomputed = sum(1 for _, _, rescored in results if rescored)
+        self.rows[source] += len(results)
+        self.recomputed[source] += recomputed
+        observe_snapshot_rows(source, recomputed, len(results) - recomputed)
+
+    async def put(self, task_ids: List[int], tasks: List[TaskPredictionInput], score: ScoreFn) -> List[SnapshotScore]:
+        # Full tasks: stored as given, re-scored unless their derived features are unchanged
+        async with self._lock:
+            results = await self._refresh(task_ids, tasks, score)
+        self._record("put", results)
+        return results
+
+    async def apply_delta(self, deltas: List[dict], score: ScoreFn) -> Tuple[List[SnapshotScore], List[int]]:
+        # deltas: {"task_id": ..., <changed fields>}; pydantic's ValidationError
+        # when a change leaves a task invalid
+        async with self._lock:
+            task_ids, tasks, unknown = [], [], []
+            for delta in deltas:
+                delta = dict(delta)
+                task_id = delta.pop("task_id")
+                snapshot = self._snapshots.get(task_id)
+                if snapshot is None:
+                    unknown.append(task_id)
+                    continue
+                task_ids.append(task_id)
+                tasks.append(TaskPredictionInput.model_validate({**snapshot.task.model_dump(), **delta}))
+            results = await self._refresh(task_ids, tasks, score) if task_ids else []
+        self.unknown += len(unknown)
+        self._record("delta", results)
+        return results, unknown
+
+    async def delete(self, task_id: int) -> bool:
+        async with self._lock:
+            self._changes.pop(task_id, None)
+            return self._snapshots.pop(task_id, None) is not None
+
+    def _take_due(self) -> List[int]:
+        now_us = _epoch_microseconds(datetime.now(timezone.utc))
+        due = {}
+        while self._rollovers and self._rollovers[0][0] <= now_us:
+            rollover_us, task_id = heapq.heappop(self._rollovers)
+            snapshot = self._snapshots.get(task_id)
+            if snapshot is not None and snapshot.rollover_us == rollover_us:
+                due[task_id] = rollover_us
+        generation = get_model_generation()
+        if generation != self._scanned_generation:
+            # Scores from a previous model version are refreshed as well
+            self._scanned_generation = generation
+            for task_id, snapshot in self._snapshots.items():
+                if snapshot.generation != generation:
+                    due.setdefault(task_id, snapshot.rollover_us)
+        return list(due)
+
+    async def sweep(self, score: ScoreFn, batch_rows: int = 10_000) -> dict:
+        # Re-derives and, where something moved, re-scores the due tasks in
+        # batches; other calls can run between batches
+        started = time.perf_counter()
+        batch_rows = max(1, batch_rows)
+        async with self._lock:
+            due = self._take_due()
+        recomputed = 0
+        for start in range(0, len(due), batch_rows):
+            async with self._lock:
+                task_ids = [task_id for task_id in due[start:start + batch_rows] if task_id in self._snapshots]
+                try:
+                    results = await self._refresh(task_ids, [self._snapshots[task_id].task for task_id in task_ids], score)
+                except Exception:
+                    # Back on the heap, so the next sweep retries them
+                    for task_id in task_ids:
+                        snapshot = self._snapshots.get(task_id)
+                        if snapshot is not None and snapshot.rollover_us is not None:
+                            heapq.heappush(self._rollovers, (snapshot.rollover_us, task_id))
+                    self._scanned_generation = None
+                    raise
+            self._record("sweep", results)
+            recomputed += sum(1 for _, _, rescored in results if rescored)
+        self.sweeps += 1
+        self.last_sweep = {
+            "due": len(due),
+            "recomputed": recomputed,
+            "ms": (time.perf_counter() - started) * 1000,
+            "at": datetime.now(timezone.utc).isoformat(),
+        }
+        return {"due": len(due), "recomputed": recomputed, "tasks": len(self._snapshots)}
+
+    def changes(self, since: int, limit: int = 10_000) -> Tuple[int, List[SnapshotScore]]:
+        # Tasks re-scored after seq `since`, oldest first, and the seq to ask from next
+        task_ids = []
+        for task_id in reversed(self._changes):
+            if self._changes[task_id] <= since:
+                break
+            task_ids.append(task_id)
+        task_ids.reverse()
+        if len(task_ids) > limit:
+            task_ids = task_ids[:limit]
+            seq = self._changes[task_ids[-1]]
+        else:
+            seq = self._seq
+        return seq, [(task_id, self._snapshots[task_id].probability, True) for task_id in task_ids]
+
+    def stats(self) -> dict:
+        return {
+            "epoch": self.epoch,
+            "seq": self._seq,
+            "tasks": len(self._snapshots),
+            "max_tasks": self.max_tasks,
+            "pending_rollovers": len(self._rollovers),
+            "rows": dict(self.rows),
+            "recomputed": dict(self.recomputed),
+            "unknown": self.unknown,
+            "evictions": self.evictions,
+            "sweeps": self.sweeps,
+            "last_sweep": self.last_sweep,
+        }
+
+
+task_snapshot_store: Optional[TaskSnapshotStore] = None
+_sweep_task: Optional[asyncio.Task] = None
+
+
+async def _sweep_loop(store: TaskSnapshotStore, score: ScoreFn):
+    while True:
+        await asyncio.sleep(config.SNAPSHOT_SWEEP_SECONDS)
+        try:
+            result = await store.sweep(score, config.SNAPSHOT_SWEEP_BATCH)
+        except Exception as e:
+            print(f"Snapshot sweep failed: {e}")
+            record_error("snapshot_sweep")
+            continue
+        if result["due"]:
+            print(f"Snapshot sweep: {result['due']} due, {result['recomputed']} re-scored, {result['tasks']} stored")
+
+
+def start_task_snapshots(score: ScoreFn) -> Optional[TaskSnapshotStore]:
+    global task_snapshot_store, _sweep_task
+    if config.SNAPSHOTS_ENABLED and task_snapshot_store is None:
+        task_snapshot_store = TaskSnapshotStore(config.SNAPSHOT_MAX_TASKS)
+        if config.SNAPSHOT_SWEEP_SECONDS > 0:
+            _sweep_task = asyncio.create_task(_sweep_loop(task_snapshot_store, score))
+    return task_snapshot_store
+
+
+async def stop_task_snapshots():
+    global _sweep_task
+    if _sweep_task is not None:
+        _sweep_task.cancel()
+        try:
+            await _sweep_task
+        except asyncio.CancelledError:
+            pass
+        _sweep_task = None
+
+
+def get_task_snapshot_store() -> Optional[TaskSnapshotStore]:
+    return task_snapshot_store
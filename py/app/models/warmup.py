@@ -0,0 +1,117 @@
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core import config
+from app.models.feature_builder import TaskFeatures
+from app.models.inference_executor import InferenceExecutor
+from app.models.task_prediction_model import get_task_feature_builder, predict_features
+
+# Typical raw feature values (NUMERICAL_FEATURES order) around which the
+# synthetic warm-up rows are drawn; the values only need to look like traffic
+_TYPICAL_ROW = np.array([7, 2, 3, 10, 17, 0.85, 120, 4, 2, 45, 2, 30, 1.2])
+
+
+def synthetic_features(n_rows: int, n_categories: int, rng: np.random.Generator) -> TaskFeatures:
+    numeric = _TYPICAL_ROW * rng.lognormal(0.0, 0.3, size=(n_rows, len(_TYPICAL_ROW)))
+    task_type = rng.integers(0, max(1, n_categories), size=n_rows, dtype=np.int32)
+    return TaskFeatures(numeric, task_type)
+
+
+class WarmupState:
+    def __init__(self):
+        self.status = "pending"
+        self.rounds = 0
+        # Whether the p99 latencies stopped moving before max_rounds ran out;
+        # None for a single-round warm-up, which cannot tell
+        self.settled: Optional[bool] = None
+        self.p99_ms: Dict[int, float] = {}
+        self.error: Optional[str] = None
+        self.seconds = 0.0
+
+    @property
+    def succeeded(self) -> bool:
+        return self.status == "done"
+
+    def to_dict(self) -> dict:
+        return {
+            "status": self.status,
+            "rounds": self.rounds,
+            "settled": self.settled,
+            "p99_ms": {str(size): p99 for size, p99 in self.p99_ms.items()},
+            "seconds": self.seconds,
+            "error": self.error,
+        }
+
+
+warmup_state = WarmupState()
+
+
+def _settled(previous: Dict[int, float], current: Dict[int, float], tolerance: float) -> bool:
+    if not previous:
+        return False
+    return all(abs(current[size] - previous[size]) <= tolerance * previous[size] for size in current)
+
+
+async def warm_up(executor: InferenceExecutor, n_categories: int, batch_sizes: List[int],
+                  round_size: int, max_rounds: int, tolerance: float) -> WarmupState:
+    state = warmup_state
+    state.status = "running"
+    started = time.monotonic()
+    rng = np.random.default_rng(0)
+    batches = {size: synthetic_features(size, n_categories, rng) for size in batch_sizes}
+    previous: Dict[int, float] = {}
+    state.settled = False if max_rounds > 1 else None
+
+    try:
+        for round_number in range(1, max_rounds + 1):
+            current = {}
+            for size, features in batches.items():
+                latencies = []
+                for _ in range(round_size):
+                    # One call per worker at a time, so every thread or process gets warmed
+                    call_started = time.monotonic()
+                    results = await asyncio.gather(*[
+                        executor.run(predict_features, features) for _ in range(executor.workers)
+                    ])
+                    latencies.append(time.monotonic() - call_started)
+                    if any(len(result) != size for result in results):
+                        raise RuntimeError(f"Warm-up prediction failed for batch size {size}")
+                current[size] = float(np.percentile(latencies, 99)) * 1000
+
+            state.rounds = round_number
+            state.p99_ms = current
+            if _settled(previous, current, tolerance):
+                state.settled = True
+                break
+            previous = current
+        state.status = "done"
+        p99_ms = ", ".join(f"{size}={p99:.2f}" for size, p99 in state.p99_ms.items())
+        if state.settled is False:
+            # Still serving: a busy host may never settle, but the first requests can be slow
+            print(f"Warning: warm-up did not settle within {max_rounds} rounds (tolerance {tolerance:g}), "
+                  f"last p99 ms by batch size: {p99_ms}")
+        else:
+            print(f"Warm-up finished after {state.rounds} rounds, p99 ms by batch size: {p99_ms}")
+    except Exception as e:
+        state.status = "failed"
+        state.error = str(e)
+        print(f"Warm-up failed: {e}")
+    state.seconds = time.monotonic() - started
+    return state
+
+
+async def run_configured_warmup(executor: InferenceExecutor) -> WarmupState:
+    feature_builder = get_task_feature_builder()
+    if feature_builder is None:
+        warmup_state.status = "failed"
+        warmup_state.error = "Preprocessor not loaded"
+        return warmup_state
+    n_categories = len(feature_builder.categories)
+    if config.WARMUP_ENABLED:
+        return await warm_up(executor, n_categories, config.WARMUP_BATCH_SIZES,
+                             config.WARMUP_ROUND_SIZE, config.WARMUP_MAX_ROUNDS, config.WARMUP_TOLERANCE)
+    # Even without a warm-up one prediction has to go through before we report ready
+    return await warm_up(executor, n_categories, [1], 1, 1, 0.0)
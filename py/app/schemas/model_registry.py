@@ -0,0 +1,10 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+class ModelReloadRequest(BaseModel):
+    version: Optional[str] = Field(None, description="Registry version to serve; the manifest's active version if left out")
+
+class CandidateRequest(BaseModel):
+    version: str = Field(..., description="Registry version to score next to the served one")
+    shadow_sample_rate: Optional[float] = Field(None, ge=0, le=1, description="Fraction of requests re-scored by the candidate in the background")
+    canary_percent: Optional[float] = Field(None, ge=0, le=100, description="Percentage of requests answered by the candidate")
@@ -0,0 +1,149 @@
+import struct
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+# Columnar binary format for high-volume prediction calls, selected with
+# Content-Type / Accept: application/x-taskr-packed. All values are
+# little-endian and every section starts on an 8-byte boundary.
+#
+# Request
+#   header      16 bytes: magic b"TKPQ", uint16 version (1), uint16 flags,
+#               uint32 n_rows, uint32 dictionary_bytes
+#   dictionary  task_type names as UTF-8 joined by "\n" (dictionary_bytes long)
+#   numeric     float32[n_rows, 13], row-major, in NUMERICAL_FEATURES order:
+#               duration, priority (LOW=1, MEDIUM=2, HIGH=3), subtasks,
+#               deadline_days, created_to_deadline, user_past_completion,
+#               description_length, comments_count, assigned_team_size,
+#               user_availability, no_curr_assigned_tasks, tasks_completed,
+#               avg_completion_time. NaN day counts are derived server-side
+#               like omitted JSON fields.
+#   task_type   int32[n_rows], index into the dictionary (-1 for none)
+#   timestamps  int64[n_rows, 2]: deadline, created_at as UTC epoch
+#               microseconds; only present with FLAG_TIMESTAMPS
+#
+# Response
+#   header      16 bytes: magic b"TKPR", uint16 version (1), uint16 flags (0),
+#               uint32 n_rows, uint32 reserved (0)
+#   probability float32[n_rows]
+#   risk        uint8[n_rows], index into RISK_LEVELS (app/models/task_prediction_model.py)
+
+PACKED_MEDIA_TYPE = "application/x-taskr-packed"
+PACKED_VERSION = 1
+FLAG_TIMESTAMPS = 1
+
+REQUEST_MAGIC = b"TKPQ"
+RESPONSE_MAGIC = b"TKPR"
+N_NUMERIC = 13
+
+_HEADER = struct.Struct("<4sHHII")
+
+
+class PackedFormatError(ValueError):
+    pass
+
+
+class PackedTasks:
+    __slots__ = ("numeric", "task_type_names", "task_type_index", "deadline_us", "created_us")
+
+    def __init__(self, numeric: np.ndarray, task_type_names: List[str], task_type_index: np.ndarray,
+                 deadline_us: Optional[np.ndarray] = None, created_us: Optional[np.ndarray] = None):
+        self.numeric = numeric
+        self.task_type_names = task_type_names
+        self.task_type_index = task_type_index
+        self.deadline_us = deadline_us
+        self.created_us = created_us
+
+    def __len__(self) -> int:
+        return len(self.task_type_index)
+
+
+def _aligned(size: int) -> int:
+    return (size + 7) & ~7
+
+
+def _padding(size: int) -> bytes:
+    return b"\0" * (_aligned(size) - size)
+
+
+def decode_packed_tasks(body: bytes) -> PackedTasks:
+    # The column sections are NumPy views on the request body, no per-row objects
+    if len(body) < _HEADER.size:
+        raise PackedFormatError("Packed request shorter than its header")
+    magic, version, flags, n_rows, dictionary_bytes = _HEADER.unpack_from(body)
+    if magic != REQUEST_MAGIC:
+        raise PackedFormatError("Not a packed prediction request")
+    if version != PACKED_VERSION:
+        raise PackedFormatError(f"Unsupported packed format version {version}")
+
+    offset = _HEADER.size
+    numeric_offset = offset + _aligned(dictionary_bytes)
+    task_type_offset = numeric_offset + _aligned(n_rows * N_NUMERIC * 4)
+    timestamps_offset = task_type_offset + _aligned(n_rows * 4)
+    expected = timestamps_offset + (n_rows * 16 if flags & FLAG_TIMESTAMPS else 0)
+    if len(body) != expected:
+        raise PackedFormatError(f"Packed request for {n_rows} rows should be {expected} bytes, got {len(body)}")
+
+    try:
+        names = bytes(body[offset:offset + dictionary_bytes]).decode("utf-8")
+    except UnicodeDecodeError:
+        raise PackedFormatError("task_type dictionary is not valid UTF-8")
+    task_type_names = names.split("\n") if names else []
+
+    numeric = np.frombuffer(body, dtype="<f4", count=n_rows * N_NUMERIC, offset=numeric_offset).reshape(n_rows, N_NUMERIC)
+    task_type_index = np.frombuffer(body, dtype="<i4", count=n_rows, offset=task_type_offset)
+    if n_rows and (task_type_index.min() < -1 or task_type_index.max() >= len(task_type_names)):
+        raise PackedFormatError("task_type index outside the dictionary")
+    # Only the day counts may be left out (NaN)
+    if not np.isfinite(np.delete(numeric, [3, 4], axis=1)).all():
+        raise PackedFormatError("Numeric features must be finite")
+
+    deadline_us = created_us = None
+    if flags & FLAG_TIMESTAMPS:
+        timestamps = np.frombuffer(body, dtype="<i8", count=n_rows * 2, offset=timestamps_offset).reshape(n_rows, 2)
+        deadline_us, created_us = timestamps[:, 0], timestamps[:, 1]
+    return PackedTasks(numeric, task_type_names, task_type_index, deadline_us, created_us)
+
+
+def encode_packed_tasks(numeric: np.ndarray, task_type_names: Sequence[str], task_type_index: np.ndarray,
+                        deadline_us: Optional[np.ndarray] = None, created_us: Optional[np.ndarray] = None) -> bytes:
+    # Client side of the request format (used by the benchmarks and scripts)
+    numeric = np.ascontiguousarray(numeric, dtype="<f4")
+    task_type_index = np.ascontiguousarray(task_type_index, dtype="<i4")
+    n_rows = len(task_type_index)
+    if numeric.shape != (n_rows, N_NUMERIC):
+        raise ValueError(f"numeric must have shape ({n_rows}, {N_NUMERIC})")
+    if any("\n" in name for name in task_type_names):
+        raise ValueError("task_type names cannot contain newlines")
+    dictionary = "\n".join(task_type_names).encode("utf-8")
+
+    has_timestamps = deadline_us is not None and created_us is not None
+    parts = [
+        _HEADER.pack(REQUEST_MAGIC, PACKED_VERSION, FLAG_TIMESTAMPS if has_timestamps else 0, n_rows, len(dictionary)),
+        dictionary, _padding(len(dictionary)),
+        numeric.tobytes(), _padding(numeric.nbytes),
+        task_type_index.tobytes(), _padding(task_type_index.nbytes),
+    ]
+    if has_timestamps:
+        parts.append(np.column_stack([deadline_us, created_us]).astype("<i8").tobytes())
+    return b"".join(parts)
+
+
+def encode_packed_predictions(probabilities: np.ndarray, risk: np.ndarray) -> bytes:
+    probabilities = np.ascontiguousarray(probabilities, dtype="<f4")
+    risk = np.ascontiguousarray(risk, dtype=np.uint8)
+    n_rows = len(probabilities)
+    return b"".join([
+        _HEADER.pack(RESPONSE_MAGIC, PACKED_VERSION, 0, n_rows, 0),
+        probabilities.tobytes(), _padding(probabilities.nbytes),
+        risk.tobytes(),
+    ])
+
+
+def decode_packed_predictions(body: bytes):
+    magic, version, _, n_rows, _ = _HEADER.unpack_from(body)
+    if magic != RESPONSE_MAGIC or version != PACKED_VERSION:
+        raise PackedFormatError("Not a packed prediction response")
+    probabilities = np.frombuffer(body, dtype="<f4", count=n_rows, offset=_HEADER.size)
+    risk = np.frombuffer(body, dtype=np.uint8, count=n_rows, offset=_HEADER.size + _aligned(n_rows * 4))
+    return probabilities, risk
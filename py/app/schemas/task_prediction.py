@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Dict, Optional
 from datetime import datetime
 
 class TaskPredictionInput(BaseModel):
@@ -27,3 +27,7 @@ class TaskPredictionOutput(BaseModel):
     task_id: int
     completion_probability: float = Field(..., description="Probability of completion on time (0 to 1)")
     risk_indicator: str = Field(..., description="Risk indicator based on probability (e.g., 'LOW', 'MEDIUM', 'HIGH')")
+
+class TaskExplanationOutput(TaskPredictionOutput):
+    baseline_probability: float = Field(..., description="Probability of the average training task")
+    attributions: Dict[str, float] = Field(..., description="Per input field: how much its value moves the probability away from the average task's value (positive raises it)")
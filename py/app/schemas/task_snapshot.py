@@ -0,0 +1,36 @@
+from pydantic import BaseModel, ConfigDict, Field, create_model
+from typing import List, Optional
+
+from app.schemas.task_prediction import TaskPredictionInput, TaskPredictionOutput
+
+class TaskSnapshotInput(TaskPredictionInput):
+    task_id: int = Field(..., description="Task id the snapshot is stored under")
+
+# Only the fields that changed; null on deadline_days / created_to_deadline
+# switches them back to being derived from the timestamps
+TaskSnapshotDelta = create_model(
+    "TaskSnapshotDelta",
+    __config__=ConfigDict(extra="forbid"),
+    task_id=(int, Field(..., description="Task id of a stored snapshot")),
+    **{name: (Optional[field.annotation], None) for name, field in TaskPredictionInput.model_fields.items()},
+)
+
+class TaskSnapshotScore(TaskPredictionOutput):
+    recomputed: bool = Field(..., description="Whether the task was re-scored by this call")
+
+class TaskSnapshotResponse(BaseModel):
+    rows: int = Field(..., description="Tasks in the request")
+    recomputed: int = Field(..., description="Tasks whose derived features changed and were re-scored")
+    model_version: Optional[str] = None
+    scores: List[TaskSnapshotScore]
+    unknown_task_ids: List[int] = Field(default_factory=list, description="No snapshot stored; send the full task")
+
+class TaskSnapshotChanges(BaseModel):
+    epoch: str = Field(..., description="Identifies the store; when it changes, resend all tasks")
+    seq: int = Field(..., description="Pass as since= to get the next changes")
+    scores: List[TaskSnapshotScore]
+
+class TaskSnapshotSweep(BaseModel):
+    due: int = Field(..., description="Tasks whose deadline day rolled over or whose model changed")
+    recomputed: int
+    tasks: int = Field(..., description="Snapshots stored")
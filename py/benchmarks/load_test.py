@@ -0,0 +1,270 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from itertools import product
+from typing import List, Optional
+
+import httpx
+import numpy as np
+
+PY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(PY_DIR)
+from app.schemas.packed_prediction import PACKED_MEDIA_TYPE
+from benchmarks.payloads import synthetic_packed_body, synthetic_tasks
+
+# Load test for the prediction endpoints. Every scenario (endpoint x batch
+# size x concurrency) sends --requests requests from --concurrency clients and
+# records throughput and latency percentiles:
+#
+#   python benchmarks/load_test.py --mode inprocess --batch-sizes 1,64 --concurrency 1,16
+#   python benchmarks/load_test.py --mode uvicorn --server-workers 2 --baseline benchmarks/results/main.json
+#
+# "inprocess" drives the ASGI app directly (no sockets), "uvicorn" starts a
+# local server (or uses --url). Multi-worker `uvicorn --workers` binds its
+# socket without IPPROTO_TCP, so asyncio leaves Nagle on and every keep-alive
+# response waits ~40 ms for a delayed ACK; --server serve uses serve.py instead.
+#
+# The started service runs with the prediction cache off, so the numbers are
+# featurization and inference rather than cache lookups of the repeated
+# payloads; --cache keeps it on. A --url server is used as configured, check
+# cache_hits in the result's meta.
+#
+# Results are written as JSON; with --baseline, scenarios whose p95 latency or
+# throughput got worse by more than --tolerance are flagged and the exit code is 1.
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+PREDICT_PATH = "/api/v1/tasks/{endpoint}"
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Throughput and latency benchmark for the prediction endpoints")
+    parser.add_argument("--mode", choices=("inprocess", "uvicorn"), default="inprocess")
+    parser.add_argument("--url", help="Benchmark an already running server instead of starting one (uvicorn mode)")
+    parser.add_argument("--server", choices=("uvicorn", "serve"), default="uvicorn",
+                        help="Start the server with uvicorn or with the pre-fork serve.py")
+    parser.add_argument("--server-workers", type=int, default=1, help="Worker processes of the started server")
+    parser.add_argument("--endpoints", default="predict,predict_batch")
+    parser.add_argument("--batch-sizes", type=_int_list, default=[1, 16, 256])
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 8, 32])
+    parser.add_argument("--format", choices=("json", "packed"), default="json")
+    parser.add_argument("--requests", type=int, default=500, help="Measured requests per scenario")
+    parser.add_argument("--warmup-requests", type=int, default=20)
+    parser.add_argument("--distinct-payloads", type=int, default=64, help="Payloads cycled through per scenario")
+    parser.add_argument("--cache", action="store_true",
+                        help="Keep the prediction cache on in the started service, so repeated payloads are cache hits")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", help="Earlier result file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative slowdown before flagging")
+    return parser.parse_args()
+
+
+def build_payloads(batch_size: int, count: int, payload_format: str, rng: np.random.Generator):
+    if payload_format == "packed":
+        return [(synthetic_packed_body(batch_size, rng), PACKED_MEDIA_TYPE) for _ in range(count)]
+    return [(json.dumps(synthetic_tasks(batch_size, rng)).encode(), "application/json") for _ in range(count)]
+
+
+async def run_scenario(client: httpx.AsyncClient, endpoint: str, batch_size: int, concurrency: int,
+                       payloads, n_requests: int, n_warmup: int) -> dict:
+    path = PREDICT_PATH.format(endpoint=endpoint)
+    latencies: List[float] = []
+    errors = 0
+    next_request = 0
+
+    async def worker(total: int, record: bool):
+        nonlocal next_request, errors
+        while next_request < total:
+            body, content_type = payloads[next_request % len(payloads)]
+            next_request += 1
+            started = time.perf_counter()
+            try:
+                response = await client.post(path, content=body, headers={"content-type": content_type})
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            elapsed = time.perf_counter() - started
+            if record:
+                latencies.append(elapsed)
+                errors += 0 if ok else 1
+
+    await asyncio.gather(*[worker(n_warmup, False) for _ in range(concurrency)])
+    next_request = 0
+    started = time.perf_counter()
+    await asyncio.gather(*[worker(n_requests, True) for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "name": f"{endpoint}/b{batch_size}/c{concurrency}",
+        "endpoint": endpoint,
+        "batch_size": batch_size,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": elapsed,
+        "requests_per_s": len(latencies) / elapsed,
+        "rows_per_s": len(latencies) * batch_size / elapsed,
+        "mean_ms": float(latencies_ms.mean()),
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+    }
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = 120.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            response = await client.get("/ready")
+            if response.status_code == 200:
+                return response.json()
+        except httpx.HTTPError:
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError("Service did not become ready")
+        await asyncio.sleep(0.25)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def inprocess_client():
+    from main import app
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=60) as client:
+            yield client
+
+
+@asynccontextmanager
+async def uvicorn_client(url: Optional[str], server_kind: str, server_workers: int, concurrency: int):
+    server = None
+    if url is None:
+        port = _free_port()
+        url = f"http://127.0.0.1:{port}"
+        if server_kind == "serve":
+            command = [sys.executable, "serve.py", "--port", str(port), "--workers", str(server_workers)]
+        else:
+            command = [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+                       "--workers", str(server_workers), "--log-level", "warning"]
+        server = subprocess.Popen(command, cwd=PY_DIR)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+            yield client
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+def compare(results: List[dict], baseline: dict, tolerance: float) -> List[str]:
+    previous = {scenario["name"]: scenario for scenario in baseline["scenarios"]}
+    regressions = []
+    print(f"\nAgainst baseline {baseline['meta'].get('timestamp')} (tolerance {tolerance:.0%}):")
+    for scenario in results:
+        before = previous.get(scenario["name"])
+        if before is None:
+            continue
+        p95_change = scenario["p95_ms"] / before["p95_ms"] - 1
+        throughput_change = scenario["rows_per_s"] / before["rows_per_s"] - 1
+        flagged = p95_change > tolerance or throughput_change < -tolerance
+        print(f"  {scenario['name']:<28} p95 {p95_change:+7.1%}  rows/s {throughput_change:+7.1%}"
+              + ("  REGRESSION" if flagged else ""))
+        if flagged:
+            regressions.append(scenario["name"])
+    return regressions
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PY_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main_async(args) -> int:
+    if not args.cache:
+        # Read by the in-process app on import and inherited by a started server
+        os.environ["TASKR_CACHE_ENABLED"] = "false"
+    rng = np.random.default_rng(args.seed)
+    endpoints = [endpoint.strip() for endpoint in args.endpoints.split(",") if endpoint.strip()]
+    max_concurrency = max(args.concurrency)
+    if args.mode == "inprocess":
+        client_context = inprocess_client()
+    else:
+        client_context = uvicorn_client(args.url, args.server, args.server_workers, max_concurrency)
+
+    results = []
+    async with client_context as client:
+        status = await wait_ready(client)
+        cache_before = (await client.get("/stats/cache")).json()
+        print(f"{'scenario':<28}{'req/s':>10}{'rows/s':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        for batch_size in args.batch_sizes:
+            payloads = build_payloads(batch_size, args.distinct_payloads, args.format, rng)
+            for endpoint, concurrency in product(endpoints, args.concurrency):
+                scenario = await run_scenario(client, endpoint, batch_size, concurrency, payloads,
+                                              args.requests, args.warmup_requests)
+                scenario["format"] = args.format
+                results.append(scenario)
+                print(f"{scenario['name']:<28}{scenario['requests_per_s']:>10.1f}{scenario['rows_per_s']:>12.0f}"
+                      f"{scenario['p50_ms']:>10.2f}{scenario['p95_ms']:>10.2f}{scenario['p99_ms']:>10.2f}"
+                      f"{scenario['errors']:>8}")
+        cache_after = (await client.get("/stats/cache")).json()
+    if cache_after.get("hits", 0) > cache_before.get("hits", 0):
+        print("Note: part of the requests were answered from the prediction cache")
+
+    meta = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": _git_commit(),
+        "mode": args.mode,
+        "server": args.server if args.mode == "uvicorn" and not args.url else None,
+        "server_workers": args.server_workers if args.mode == "uvicorn" else None,
+        "backend": status.get("backend"),
+        "format": args.format,
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "cache_enabled": cache_after.get("enabled", True),
+        # With the prediction cache on, repeated payloads skip the model
+        "cache_hits": cache_after.get("hits", 0) - cache_before.get("hits", 0),
+        "cache_misses": cache_after.get("misses", 0) - cache_before.get("misses", 0),
+    }
+    output = args.output or os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({"meta": meta, "scenarios": results}, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} scenario(s) regressed: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+def main():
+    sys.exit(asyncio.run(main_async(parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+import warnings
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from app.models.dense_network import extract_dense_layers, forward
+from app.models.explanations import occlusion_attributions, occlusion_batch
+from app.models.feature_builder import CATEGORICAL_FEATURES, NUMERICAL_FEATURES, PRIORITY_MAP, FeatureBuilder
+from app.models.inference_bundle import InferenceBundle
+from app.models.task_prediction_model import BUNDLE_PATH, MODEL_PATH, PREPROCESSOR_PATH
+from app.schemas.task_prediction import TaskPredictionInput
+from benchmarks.payloads import synthetic_tasks
+
+# Where the time of one prediction request goes, stage by stage:
+#
+#   python benchmarks/micro.py --batch-sizes 1,100,10000 --stages legacy_dataframe,feature_builder_encode
+#
+# The "legacy" stages are the original pandas/sklearn/Keras request path
+# (DataFrame from model_dump(), to_datetime/.dt.days, ColumnTransformer,
+# model.predict); the others are what the service runs now. Each stage is
+# timed on its own (median over repeats) and run once more under tracemalloc
+# for its peak Python/NumPy allocation. TensorFlow's own allocator is not
+# visible to tracemalloc. The *_explain stages are the /explain_batch model
+# work (occlusion batch, scoring, attributions); compare them with
+# numpy_forward / bundle_predict for the cost of explaining.
+
+DEFAULT_BATCH_SIZES = [1, 10, 100, 1000, 10_000, 100_000]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Per-stage microbenchmarks of the prediction path")
+    parser.add_argument("--batch-sizes", default=",".join(str(size) for size in DEFAULT_BATCH_SIZES))
+    parser.add_argument("--stages", help="Comma-separated subset of stages (default: all)")
+    parser.add_argument("--min-seconds", type=float, default=0.2, help="Time budget per stage and batch size")
+    parser.add_argument("--min-repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write the measurements to this file")
+    return parser.parse_args()
+
+
+class Artifacts:
+    def __init__(self):
+        import joblib
+        from tensorflow.keras.models import load_model
+
+        self.preprocessor = joblib.load(PREPROCESSOR_PATH)
+        self.model = load_model(MODEL_PATH)
+        self.builder = FeatureBuilder.from_preprocessor(self.preprocessor)
+        self.layers = [(k.astype(np.float32), b.astype(np.float32), a) for k, b, a in extract_dense_layers(self.model)]
+        self.bundle = InferenceBundle.load(BUNDLE_PATH) if os.path.exists(BUNDLE_PATH) else None
+
+
+class Inputs:
+    # Everything a stage consumes, prepared up front so each stage is timed alone
+    def __init__(self, tasks: List[TaskPredictionInput], artifacts: Artifacts, now: datetime):
+        self.tasks = tasks
+        self.now = now
+        self.frame = pd.DataFrame([task.model_dump() for task in tasks])
+        derived = legacy_derive(self.frame, now)
+        self.derived = derived[NUMERICAL_FEATURES + CATEGORICAL_FEATURES]
+        self.X = artifacts.preprocessor.transform(self.derived)
+        self.X32 = np.asarray(self.X, dtype=np.float32)
+        self.features = artifacts.builder.encode(tasks, now)
+
+
+def legacy_derive(frame: pd.DataFrame, now: datetime) -> pd.DataFrame:
+    # The original endpoint's timestamp and priority handling
+    data = frame.copy()
+    data['deadline'] = pd.to_datetime(data['deadline'], utc=True)
+    data['created_at'] = pd.to_datetime(data['created_at'], utc=True)
+    data['deadline_days'] = (data['deadline'] - now).dt.days
+    data['created_to_deadline'] = (data['deadline'] - data['created_at']).dt.days
+    data['priority'] = data['priority'].str.upper().map(PRIORITY_MAP).fillna(2).astype(int)
+    return data
+
+
+def explain(predict: Callable, features, reference: np.ndarray):
+    batch = occlusion_batch(features, reference)
+    return occlusion_attributions(predict(batch), len(features), len(features.categories))
+
+
+def build_stages(artifacts: Artifacts) -> Dict[str, Callable[[Inputs], object]]:
+    stages = {
+        "legacy_dataframe": lambda inputs: pd.DataFrame([task.model_dump() for task in inputs.tasks]),
+        "legacy_datetime": lambda inputs: legacy_derive(inputs.frame, inputs.now),
+        "legacy_column_transformer": lambda inputs: artifacts.preprocessor.transform(inputs.derived),
+        "legacy_model_predict": lambda inputs: artifacts.model.predict([inputs.X], verbose=0),
+        "keras_direct_call": lambda inputs: artifacts.model(inputs.X32, training=False).numpy(),
+        "feature_builder_encode": lambda inputs: artifacts.builder.encode(inputs.tasks, inputs.now),
+        "feature_builder_transform": lambda inputs: artifacts.builder.transform(inputs.features),
+        "numpy_forward": lambda inputs: forward(artifacts.layers, inputs.X32),
+        "numpy_explain": lambda inputs: explain(
+            lambda batch: forward(artifacts.layers, artifacts.builder.transform(batch)).reshape(-1),
+            inputs.features, artifacts.builder.reference,
+        ),
+    }
+    if artifacts.bundle is not None:
+        stages["bundle_predict"] = lambda inputs: artifacts.bundle.predict(inputs.features)
+        stages["bundle_explain"] = lambda inputs: explain(
+            artifacts.bundle.predict, inputs.features, artifacts.builder.reference,
+        )
+    return stages
+
+
+def measure(fn: Callable[[], object], min_seconds: float, min_repeats: int) -> dict:
+    fn()
+    timings = []
+    budget_end = time.perf_counter() + min_seconds
+    while len(timings) < min_repeats or time.perf_counter() < budget_end:
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"median_s": statistics.median(timings), "repeats": len(timings), "peak_bytes": peak}
+
+
+def main():
+    args = parse_args()
+    # Keras warns on every model.predict([X]) of the legacy path
+    warnings.filterwarnings("ignore", message="The structure of `inputs` doesn't match")
+    batch_sizes = [int(size) for size in args.batch_sizes.split(",") if size.strip()]
+    artifacts = Artifacts()
+    stages = build_stages(artifacts)
+    if args.stages:
+        selected = [name.strip() for name in args.stages.split(",") if name.strip()]
+        unknown = set(selected) - set(stages)
+        if unknown:
+            sys.exit(f"Unknown stages {sorted(unknown)}, expected some of {list(stages)}")
+        stages = {name: stages[name] for name in selected}
+
+    now = datetime.now(timezone.utc)
+    rng = np.random.default_rng(args.seed)
+    all_tasks = [TaskPredictionInput.model_validate(task) for task in synthetic_tasks(max(batch_sizes), rng, now)]
+
+    results = []
+    print(f"{'stage':<28}{'rows':>8}{'median ms':>12}{'us/row':>10}{'peak MB':>10}{'repeats':>9}")
+    for batch_size in batch_sizes:
+        inputs = Inputs(all_tasks[:batch_size], artifacts, now)
+        for name, stage in stages.items():
+            result = measure(lambda: stage(inputs), args.min_seconds, args.min_repeats)
+            result.update(stage=name, rows=batch_size)
+            results.append(result)
+            print(f"{name:<28}{batch_size:>8}{result['median_s'] * 1000:>12.3f}"
+                  f"{result['median_s'] * 1e6 / batch_size:>10.2f}{result['peak_bytes'] / 2 ** 20:>10.2f}"
+                  f"{result['repeats']:>9}")
+        print()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+import numpy as np
+
+from app.models.feature_builder import NUMERICAL_FEATURES
+from app.schemas.packed_prediction import encode_packed_tasks
+from datagen.synthetic_tasks import TASK_TYPES, sample_task_features as synthetic_task_columns
+
+# Benchmark traffic drawn from the same distributions as
+# scripts/generate_synthetic_data_v3.py (see datagen/synthetic_tasks.py), but
+# shaped like API requests: priority names and deadline/created_at timestamps instead of day counts.
+
+PRIORITY_NAMES = np.array(["LOW", "MEDIUM", "HIGH"])
+_MICROSECONDS_PER_DAY = 86_400_000_000
+
+
+def _timestamps(columns: dict, now: datetime, rng: np.random.Generator):
+    # Deadlines land at a random time of their day so the server's day
+    # derivation reproduces deadline_days
+    now_us = int(now.timestamp() * 1_000_000)
+    offset_us = rng.integers(0, _MICROSECONDS_PER_DAY, len(columns["duration"]))
+    deadline_us = now_us + columns["deadline_days"] * _MICROSECONDS_PER_DAY + offset_us
+    created_us = deadline_us - columns["created_to_deadline"] * _MICROSECONDS_PER_DAY
+    return deadline_us, created_us
+
+
+def synthetic_tasks(n: int, rng: np.random.Generator, now: Optional[datetime] = None) -> List[dict]:
+    # TaskPredictionInput-shaped dicts; the day counts are left to the server
+    now = now or datetime.now(timezone.utc)
+    columns = synthetic_task_columns(n, rng)
+    deadline_us, created_us = _timestamps(columns, now, rng)
+    epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    rows = {name: values.tolist() for name, values in columns.items()}
+    tasks = []
+    for i in range(n):
+        tasks.append({
+            "task_type": TASK_TYPES[rows["task_type"][i]],
+            "priority": str(PRIORITY_NAMES[rows["priority"][i] - 1]),
+            "duration": rows["duration"][i],
+            "subtasks": rows["subtasks"][i],
+            "deadline": (epoch + timedelta(microseconds=int(deadline_us[i]))).isoformat(),
+            "created_at": (epoch + timedelta(microseconds=int(created_us[i]))).isoformat(),
+            "description_length": rows["description_length"][i],
+            "comments_count": rows["comments_count"][i],
+            "assigned_team_size": rows["assigned_team_size"][i],
+            "user_availability": rows["user_availability"][i],
+            "no_curr_assigned_tasks": rows["no_curr_assigned_tasks"][i],
+            "tasks_completed": rows["tasks_completed"][i],
+            "user_past_completion": rows["user_past_completion"][i],
+            "avg_completion_time": rows["avg_completion_time"][i],
+        })
+    return tasks
+
+
+def synthetic_packed_body(n: int, rng: np.random.Generator, now: Optional[datetime] = None) -> bytes:
+    # The same traffic in the packed binary format, day counts also left to the server
+    now = now or datetime.now(timezone.utc)
+    columns = synthetic_task_columns(n, rng)
+    deadline_us, created_us = _timestamps(columns, now, rng)
+    numeric = np.column_stack([
+        np.full(n, np.nan) if name in ("deadline_days", "created_to_deadline") else columns[name]
+        for name in NUMERICAL_FEATURES
+    ])
+    return encode_packed_tasks(numeric, TASK_TYPES, columns["task_type"], deadline_us, created_us)
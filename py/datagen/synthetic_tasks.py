@@ -0,0 +1,126 @@
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+# Vectorized version of scripts/generate_synthetic_data_v3.py for datasets of
+# any size. Rows are generated in independent chunks: chunk i of a dataset
+# draws from its own numpy Generator seeded with (seed, i), so the output only
+# depends on the seed and the chunk size, not on how many processes made it.
+#
+# v3 labels a task as completed on time when its propensity (a weighted sum
+# of standardized features plus noise) is above the dataset mean. Those
+# statistics cannot come from the whole dataset when it is made chunk by
+# chunk, so they are estimated once per seed from a calibration sample of
+# CALIBRATION_ROWS rows drawn from a separate stream.
+
+TASK_TYPES = ["bug", "feature", "documentation"]
+CALIBRATION_ROWS = 1_000_000
+
+# Same weights as v3; task_type enters through its code (bug 0, feature 1, documentation 2)
+PROPENSITY_WEIGHTS = {
+    "duration": -0.15,
+    "priority": 0.05,
+    "subtasks": -0.10,
+    "deadline_days": 0.15,
+    "created_to_deadline": 0.03,
+    "user_past_completion": 0.30,
+    "task_type": 0.05,
+    "description_length": -0.02,
+    "comments_count": 0.02,
+    "assigned_team_size": 0.03,
+    "user_availability": 0.20,
+    "no_curr_assigned_tasks": -0.10,
+    "tasks_completed": 0.10,
+    "avg_completion_time": -0.20,
+}
+_WEIGHT_COLUMNS = list(PROPENSITY_WEIGHTS)
+_WEIGHTS = np.array(list(PROPENSITY_WEIGHTS.values()))
+PROPENSITY_NOISE = 0.3
+
+# Stream keys under the dataset seed: (0, i) for chunk i, (1,) for calibration
+_CHUNK_STREAM = 0
+_CALIBRATION_STREAM = 1
+
+
+def chunk_rng(seed: int, chunk_index: int) -> np.random.Generator:
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(_CHUNK_STREAM, chunk_index)))
+
+
+def sample_task_features(n: int, rng: np.random.Generator) -> Dict[str, np.ndarray]:
+    # v3 distributions; task_type as an index into TASK_TYPES
+    user_past_completion = np.round(rng.beta(5, 1.5, n) * 0.5 + 0.5, 2)
+    target_mean_act_div_est = 1.5 - (user_past_completion - 0.5) * 1.0
+    avg_completion_time = np.round(np.clip(rng.lognormal(np.log(target_mean_act_div_est), 0.2), 0.5, 2), 2)
+    tasks_completed = np.clip(rng.normal(30, 15, n), 0, 100).astype(int)
+
+    duration = np.clip(rng.normal(7, 3, n), 1, 20).astype(int)
+    priority = rng.choice([1, 2, 3], n, p=[0.3, 0.5, 0.2])
+    subtasks = np.clip(rng.poisson(duration * 0.3 + 1), 0, 10)
+    deadline_days_raw = (duration * rng.normal(1.5, 0.3, n)).astype(int)
+    deadline_days = np.maximum(1, np.clip(deadline_days_raw, np.round(duration * 0.8), np.round(duration * 3))).astype(int)
+    created_to_deadline = deadline_days + rng.integers(0, 15, n)
+    task_type = rng.choice(len(TASK_TYPES), n, p=[0.3, 0.5, 0.2])
+
+    description_length = np.clip(rng.normal(50 + duration * 10, 40), 10, 500).astype(int)
+    comments_count = np.clip(rng.poisson(1 + duration * 0.5), 0, 20)
+    assigned_team_size = np.clip(rng.normal(1 + duration * 0.1, 1), 1, 5).astype(int)
+    no_curr_assigned_tasks = np.clip(rng.poisson(2, n), 0, 5)
+    daily_hours = rng.normal(6, 1, n) * np.clip(1 - no_curr_assigned_tasks * 0.10, 0.3, 1.0)
+    user_availability = np.maximum(1, (daily_hours * deadline_days).astype(int))
+
+    return {
+        "duration": duration,
+        "priority": priority,
+        "subtasks": subtasks,
+        "deadline_days": deadline_days,
+        "created_to_deadline": created_to_deadline,
+        "user_past_completion": user_past_completion,
+        "task_type": task_type,
+        "description_length": description_length,
+        "comments_count": comments_count,
+        "assigned_team_size": assigned_team_size,
+        "user_availability": user_availability,
+        "no_curr_assigned_tasks": no_curr_assigned_tasks,
+        "tasks_completed": tasks_completed,
+        "avg_completion_time": avg_completion_time,
+    }
+
+
+def _raw_propensity(columns: Dict[str, np.ndarray], means: np.ndarray, stds: np.ndarray,
+                    rng: np.random.Generator) -> np.ndarray:
+    X = np.column_stack([columns[name] for name in _WEIGHT_COLUMNS]).astype(np.float64)
+    X -= means
+    X /= stds
+    return X @ _WEIGHTS + rng.normal(0, PROPENSITY_NOISE, len(X))
+
+
+class LabelCalibration:
+    def __init__(self, means: np.ndarray, stds: np.ndarray, propensity_threshold: float):
+        self.means = means
+        self.stds = stds
+        self.propensity_threshold = propensity_threshold
+
+    @classmethod
+    def estimate(cls, seed: int, rows: int = CALIBRATION_ROWS) -> "LabelCalibration":
+        rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(_CALIBRATION_STREAM,)))
+        columns = sample_task_features(rows, rng)
+        X = np.column_stack([columns[name] for name in _WEIGHT_COLUMNS]).astype(np.float64)
+        means = X.mean(axis=0)
+        stds = X.std(axis=0)
+        stds[stds == 0] = 1.0
+        threshold = float(np.mean(_raw_propensity(columns, means, stds, rng)))
+        return cls(means, stds, threshold)
+
+
+def generate_chunk(seed: int, chunk_index: int, n_rows: int, calibration: LabelCalibration) -> pd.DataFrame:
+    # Rows of one chunk with the columns of v3's CSV
+    rng = chunk_rng(seed, chunk_index)
+    columns = sample_task_features(n_rows, rng)
+    propensity = _raw_propensity(columns, calibration.means, calibration.stds, rng)
+    task_type_numeric = columns["task_type"]
+    columns["task_type"] = np.array(TASK_TYPES)[task_type_numeric]
+    frame = pd.DataFrame(columns)
+    frame["task_type_numeric"] = task_type_numeric
+    frame["completed_on_time"] = (propensity > calibration.propensity_threshold).astype(np.int8)
+    return frame
@@ -1,13 +1,75 @@
-from fastapi import FastAPI
+import asyncio
+import os
+from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 from app.api import api_router
-from app.models.task_prediction_model import load_task_prediction_model
+from app.api.prediction_pipeline import get_pipeline_stats, predict_scores
+from app.core import config
+from app.core.metrics import CONTENT_TYPE, MetricsMiddleware, render_metrics
+from app.core.process_info import startup_report
+from app.models.task_prediction_model import (
+    load_task_prediction_model,
+    load_task_feature_builder,
+    model_status,
+)
+from app.models.inference_executor import (
+    get_inference_executor,
+    shutdown_inference_executor,
+    start_inference_executor,
+)
+from app.models.warmup import run_configured_warmup, warmup_state
+from app.models.model_reloader import start_model_reloader, stop_model_reloader
+from app.models.candidate_scoring import (
+    get_candidate_scorer,
+    load_configured_candidate,
+    start_candidate_scorer,
+    stop_candidate_scorer,
+)
+from app.models.prediction_cache import get_prediction_cache, start_prediction_cache
+from app.models.drift_monitor import get_drift_report
+from app.models.task_snapshots import get_task_snapshot_store, start_task_snapshots, stop_task_snapshots
+from app.models.batcher import (
+    get_prediction_batcher,
+    start_prediction_batcher,
+    stop_prediction_batcher,
+)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("Starting up Taskr AI Microservice...")
-    load_task_prediction_model()
+    if not config.ADMIN_TOKEN:
+        print("Warning: TASKR_ADMIN_TOKEN is not set, the /admin endpoints will refuse every request")
+    if config.INFERENCE_EXECUTOR == "thread":
+        # Process pool workers load their own copy in the pool initializer
+        load_task_prediction_model()
+    else:
+        # Features are still built on the API process
+        load_task_feature_builder()
+    executor = start_inference_executor()
+    start_prediction_batcher(executor)
+    start_prediction_cache()
+    # Re-scores stored tasks whose deadline day rolled over
+    start_task_snapshots(predict_scores)
+    # Hot-swaps model versions activated in the registry
+    start_model_reloader(executor)
+    candidate_scorer = start_candidate_scorer()
+    candidate_task = None
+    if config.CANDIDATE_VERSION:
+        # Shadow and canary scoring start once the candidate has loaded
+        candidate_task = asyncio.create_task(load_configured_candidate(candidate_scorer))
+    print(startup_report(f"Worker {os.getpid()}"))
+    # Liveness answers right away, readiness only once the warm-up has settled
+    warmup_task = asyncio.create_task(run_configured_warmup(executor))
     yield
+    warmup_task.cancel()
+    if candidate_task is not None:
+        candidate_task.cancel()
+    await stop_task_snapshots()
+    await stop_candidate_scorer()
+    await stop_model_reloader()
+    await stop_prediction_batcher()
+    shutdown_inference_executor()
     print("Shutting down Taskr AI Microservice.")
 
 app = FastAPI(
@@ -17,8 +79,56 @@ app = FastAPI(
     lifespan=lifespan,  # <-- Use the new lifespan handler
 )
 
+app.add_middleware(MetricsMiddleware)
 app.include_router(api_router, prefix="/api/v1")
 
 @app.get("/", tags=["Health"])
 async def root():
     return {"message": "Taskr AI Microservice is running"}
+
+@app.get("/ready", tags=["Health"])
+async def ready():
+    status = model_status()
+    status["warmup"] = warmup_state.to_dict()
+    # A successful warm-up prediction also proves the model loaded in process pool workers
+    status["ready"] = status["preprocessor_loaded"] and warmup_state.succeeded
+    # Ready but not settled: latencies were still moving when the warm-up rounds ran out
+    status["warmup_settled"] = warmup_state.settled
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+@app.get("/metrics", tags=["Health"])
+async def metrics():
+    # Prometheus text format, covering all worker processes in multiprocess mode
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
+
+@app.get("/stats/inference", tags=["Health"])
+async def inference_stats():
+    return get_inference_executor().stats()
+
+@app.get("/stats/batching", tags=["Health"])
+async def batching_stats():
+    batcher = get_prediction_batcher()
+    return batcher.stats() if batcher is not None else {"enabled": False}
+
+@app.get("/stats/pipeline", tags=["Health"])
+async def pipeline_stats():
+    return get_pipeline_stats()
+
+@app.get("/stats/cache", tags=["Health"])
+async def cache_stats():
+    cache = get_prediction_cache()
+    return cache.stats() if cache is not None else {"enabled": False}
+
+@app.get("/stats/candidate", tags=["Health"])
+async def candidate_stats():
+    scorer = get_candidate_scorer()
+    return scorer.stats() if scorer is not None else {"enabled": False}
+
+@app.get("/stats/snapshots", tags=["Health"])
+async def snapshot_stats():
+    store = get_task_snapshot_store()
+    return store.stats() if store is not None else {"enabled": False}
+
+@app.get("/stats/drift", tags=["Health"])
+async def drift_stats():
+    return get_drift_report()
@@ -0,0 +1,58 @@
+import argparse
+import os
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+from tensorflow.keras.models import load_model
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from app.core import config
+from app.models.feature_builder import FeatureBuilder
+from app.models.inference_bundle import InferenceBundle
+from app.models.task_prediction_model import BUNDLE_PATH, MODEL_PATH, PREPROCESSOR_PATH, NumpyBackend, risk_codes
+
+# Scores the same rows with Keras and the NumPy backends and fails when the
+# probabilities drift apart by more than float32 round-off
+
+
+def risk_buckets(probabilities):
+    # The buckets the service answers with, TASKR_RISK_THRESHOLDS included
+    return risk_codes(probabilities, config.RISK_THRESHOLDS)
+
+
+def compare(name, reference, candidate, tolerance):
+    max_diff = float(np.max(np.abs(reference - candidate)))
+    disagreements = int(np.sum(risk_buckets(reference) != risk_buckets(candidate)))
+    status = "OK" if max_diff <= tolerance else "FAIL"
+    print(f"{name:>8}: max abs diff {max_diff:.3e}, risk bucket disagreements {disagreements}/{len(reference)} [{status}]")
+    return max_diff <= tolerance
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check NumPy inference backends against the Keras model")
+    parser.add_argument("data", nargs="?", default="synth_data_set_v2.csv", help="CSV with the training feature columns")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--tolerance", type=float, default=1e-5)
+    args = parser.parse_args()
+
+    data = pd.read_csv(args.data, nrows=args.rows)
+    model = load_model(MODEL_PATH)
+    feature_builder = FeatureBuilder.from_preprocessor(joblib.load(PREPROCESSOR_PATH))
+    features = feature_builder.encode_frame(data)
+
+    reference = model.predict(feature_builder.transform(features), verbose=0).reshape(-1)
+    ok = compare("numpy", reference, NumpyBackend.from_keras(model, feature_builder).predict(features), args.tolerance)
+
+    if os.path.exists(BUNDLE_PATH):
+        bundle = InferenceBundle.load(BUNDLE_PATH)
+        ok &= compare("bundle", reference, bundle.predict(bundle.feature_builder.encode_frame(data)), args.tolerance)
+    else:
+        print(f"Inference bundle not found at {BUNDLE_PATH}, skipping")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import argparse
+import os
+import sys
+
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from app.models.backend_comparison import backend_comparison_report
+from app.models.feature_builder import CATEGORICAL_FEATURES, NUMERICAL_FEATURES
+from app.models.model_registry import resolve_model_version
+from app.models.task_prediction_model import INFERENCE_BACKENDS
+
+# Accuracy and per-row latency of every inference backend side by side, on the
+# held-out split of the training script (test_size 0.25, random_state 42, stratified):
+#
+#   python compare_backends.py synth_data_set_v2.csv --output backend_comparison.json
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy/latency tradeoff of the inference backends")
+    parser.add_argument("data", nargs="?", default="synth_data_set_v2.csv", help="Training CSV")
+    parser.add_argument("--version", help="Registry model version (default: the active one)")
+    parser.add_argument("--backends", nargs="+", default=list(INFERENCE_BACKENDS), choices=INFERENCE_BACKENDS)
+    parser.add_argument("--test-size", type=float, default=0.25)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Also write the report as JSON")
+    args = parser.parse_args()
+
+    data = pd.read_csv(args.data)
+    X = data[NUMERICAL_FEATURES + CATEGORICAL_FEATURES]
+    y = data["completed_on_time"]
+    _, X_test, _, y_test = train_test_split(X, y, test_size=args.test_size, random_state=args.seed, stratify=y)
+    backend_comparison_report(resolve_model_version(args.version), X_test, y_test, args.backends, args.output)
+
+
+if __name__ == "__main__":
+    main()
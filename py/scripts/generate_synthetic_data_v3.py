@@ -186,9 +186,10 @@ def generate_synthetic_data(n_samples=1000, random_state=42):
     return df
 
 
-data_set = generate_synthetic_data(n_samples=10000, random_state=42)
-data_set.to_csv("synth_data_set_v2.csv", index=False)
-print("\nFirst 5 rows of the generated dataset:")
-print(data_set.head())
-print("\nInfo about the generated dataset:")
-data_set.info()
+if __name__ == "__main__":
+    data_set = generate_synthetic_data(n_samples=10000, random_state=42)
+    data_set.to_csv("synth_data_set_v2.csv", index=False)
+    print("\nFirst 5 rows of the generated dataset:")
+    print(data_set.head())
+    print("\nInfo about the generated dataset:")
+    data_set.info()
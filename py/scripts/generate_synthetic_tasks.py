@@ -0,0 +1,109 @@
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from datagen.synthetic_tasks import CALIBRATION_ROWS, LabelCalibration, generate_chunk
+
+# Synthetic training data at any scale, in bounded memory:
+#
+#   python generate_synthetic_tasks.py tasks_100m.parquet --rows 100000000 --workers 8
+#
+# Chunks of --chunk-rows are generated in parallel and written in order. The
+# same --seed and --chunk-rows give the same file for any number of workers.
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate synthetic task data (v3 distributions) to CSV or Parquet")
+    parser.add_argument("output", help="CSV or Parquet file")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--chunk-rows", type=int, default=500_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--calibration-rows", type=int, default=CALIBRATION_ROWS,
+                        help="Rows drawn to estimate the labelling statistics")
+    return parser.parse_args()
+
+
+def is_parquet(path: str) -> bool:
+    return path.lower().endswith((".parquet", ".pq"))
+
+
+def make_chunk(seed: int, chunk_index: int, n_rows: int, calibration: LabelCalibration, as_csv: bool):
+    frame = generate_chunk(seed, chunk_index, n_rows, calibration)
+    if as_csv:
+        # Formatting CSV text is the slow part of writing, so it happens in the worker
+        return n_rows, frame.to_csv(header=chunk_index == 0, index=False).encode()
+    return n_rows, frame
+
+
+class ChunkWriter:
+    def __init__(self, path: str):
+        self.path = path
+        self._parquet_writer = None
+        self._file = None if is_parquet(path) else open(path, "wb")
+
+    def write(self, chunk):
+        if self._file is not None:
+            self._file.write(chunk)
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if self._parquet_writer is None:
+            self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+        self._parquet_writer.write_table(table)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+
+def main():
+    args = parse_args()
+    started = time.monotonic()
+    calibration = LabelCalibration.estimate(args.seed, args.calibration_rows)
+    print(f"Labelling statistics estimated from {args.calibration_rows:,} rows in {time.monotonic() - started:.1f}s")
+
+    workers = max(1, args.workers)
+    chunk_rows = max(1, args.chunk_rows)
+    as_csv = not is_parquet(args.output)
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    writer = ChunkWriter(args.output)
+    # At most two chunks per worker are in flight, so memory stays bounded by
+    # the chunk size rather than growing with --rows
+    in_flight = deque()
+    rows_done = 0
+
+    def write_oldest():
+        nonlocal rows_done
+        n_rows, chunk = in_flight.popleft().result()
+        writer.write(chunk)
+        rows_done += n_rows
+        elapsed = time.monotonic() - started
+        print(f"{rows_done:,} / {args.rows:,} rows, {rows_done / elapsed:,.0f} rows/s")
+
+    try:
+        for chunk_index, first_row in enumerate(range(0, args.rows, chunk_rows)):
+            n_rows = min(chunk_rows, args.rows - first_row)
+            in_flight.append(pool.submit(make_chunk, args.seed, chunk_index, n_rows, calibration, as_csv))
+            if len(in_flight) >= 2 * workers:
+                write_oldest()
+        while in_flight:
+            write_oldest()
+    finally:
+        writer.close()
+        pool.shutdown(cancel_futures=True)
+
+    elapsed = time.monotonic() - started
+    print(f"Done: {rows_done:,} rows in {elapsed:.1f}s ({rows_done / max(elapsed, 1e-9):,.0f} rows/s) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import argparse
+import os
+import sys
+
+import joblib
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from tensorflow.keras.models import load_model
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from app.models.feature_builder import CATEGORICAL_FEATURES, NUMERICAL_FEATURES
+from app.models.inference_bundle import BUNDLE_PRECISIONS, export_inference_bundle, precision_bundle_path
+from app.models.precision_parity import precision_parity_report
+from app.models.task_prediction_model import BUNDLE_PATH, MODEL_PATH, PREPROCESSOR_PATH
+
+# Exports the float32/float16/int8 bundles of the saved model and reports their
+# accuracy parity with Keras on the held-out split of the training script
+# (training_task_completion_model.py: test_size 0.25, random_state 42, stratified):
+#
+#   python precision_parity.py synth_data_set_v2.csv --output ../app/models/trained_models/precision_parity.json
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy parity of the reduced-precision inference bundles")
+    parser.add_argument("data", nargs="?", default="synth_data_set_v2.csv", help="Training CSV")
+    parser.add_argument("--test-size", type=float, default=0.25)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-export", action="store_true", help="Report on the bundles already on disk")
+    parser.add_argument("--output", help="Also write the report as JSON")
+    args = parser.parse_args()
+
+    data = pd.read_csv(args.data)
+    X = data[NUMERICAL_FEATURES + CATEGORICAL_FEATURES]
+    y = data["completed_on_time"]
+    _, X_test, _, y_test = train_test_split(X, y, test_size=args.test_size, random_state=args.seed, stratify=y)
+
+    model = load_model(MODEL_PATH)
+    preprocessor = joblib.load(PREPROCESSOR_PATH)
+    if not args.no_export:
+        for precision in BUNDLE_PRECISIONS:
+            path = precision_bundle_path(BUNDLE_PATH, precision)
+            export_inference_bundle(model, preprocessor, path, precision)
+            print(f"Exported {precision} bundle to {path}")
+    precision_parity_report(model, preprocessor, X_test, y_test, BUNDLE_PATH, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from app.core import config
+from app.models import task_prediction_model
+from app.models.task_prediction_model import (
+    INFERENCE_BACKENDS,
+    RISK_LEVELS,
+    load_task_prediction_model,
+    predict_task_completion,
+    risk_codes,
+)
+
+# Offline batch scoring for backfills and analytics:
+#
+#   python score_tasks.py tasks.parquet scores.parquet --workers 8 --backend bundle
+#
+# Input rows are either training-style (numeric priority, deadline_days,
+# created_to_deadline) or raw API-style (priority strings, deadline and
+# created_at timestamps). Each pool process loads its own model copy.
+
+THREAD_LIMIT_VARIABLES = (
+    "OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+    "TF_NUM_INTRAOP_THREADS", "TF_NUM_INTEROP_THREADS",
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Score historical tasks from CSV or Parquet")
+    parser.add_argument("input", help="CSV or Parquet file with task feature columns")
+    parser.add_argument("output", help="CSV or Parquet file for the scores")
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--backend", default=config.INFERENCE_BACKEND, choices=INFERENCE_BACKENDS)
+    parser.add_argument("--id-column", default="task_id", help="Column copied to the output when present")
+    return parser.parse_args()
+
+
+def is_parquet(path: str) -> bool:
+    return path.lower().endswith((".parquet", ".pq"))
+
+
+def read_chunks(path: str, chunk_size: int):
+    if is_parquet(path):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+class ScoreWriter:
+    def __init__(self, path: str):
+        self.path = path
+        self._parquet_writer = None
+        self._wrote_header = False
+
+    def write(self, scores: pd.DataFrame):
+        if is_parquet(self.path):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(scores, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            scores.to_csv(self.path, mode="a" if self._wrote_header else "w", header=not self._wrote_header, index=False)
+            self._wrote_header = True
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+
+def init_worker(backend: str):
+    config.INFERENCE_BACKEND = backend
+    load_task_prediction_model()
+    if task_prediction_model.task_prediction_backend is None:
+        raise RuntimeError("Model could not be loaded in scoring worker")
+
+
+def score_chunk(chunk: pd.DataFrame, id_column: str, first_row: int) -> pd.DataFrame:
+    predictions = np.asarray(predict_task_completion(chunk), dtype=np.float64)
+    if len(predictions) != len(chunk):
+        raise RuntimeError(f"Prediction failed for rows {first_row}-{first_row + len(chunk) - 1}")
+    ids = chunk[id_column].to_numpy() if id_column in chunk.columns else np.arange(first_row, first_row + len(chunk))
+    return pd.DataFrame({
+        id_column: ids,
+        "completion_probability": predictions,
+        "risk_indicator": np.array(RISK_LEVELS)[risk_codes(predictions, config.RISK_THRESHOLDS)],
+    })
+
+
+def main():
+    args = parse_args()
+    # Children inherit these before importing NumPy/TensorFlow, so N workers
+    # use N * threads_per_worker cores instead of oversubscribing every core
+    for variable in THREAD_LIMIT_VARIABLES:
+        os.environ[variable] = str(args.threads_per_worker)
+
+    workers = max(1, args.workers)
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_worker,
+        initargs=(args.backend,),
+    )
+    writer = ScoreWriter(args.output)
+    # Chunks are written in input order; at most two chunks per worker are in
+    # flight so memory does not grow with the input size
+    in_flight = deque()
+    started = time.monotonic()
+    rows_done = 0
+
+    def write_oldest():
+        nonlocal rows_done
+        scores = in_flight.popleft().result()
+        writer.write(scores)
+        rows_done += len(scores)
+        elapsed = time.monotonic() - started
+        print(f"{rows_done:,} rows scored, {rows_done / elapsed:,.0f} rows/s")
+
+    try:
+        first_row = 0
+        for chunk in read_chunks(args.input, args.chunk_size):
+            in_flight.append(pool.submit(score_chunk, chunk, args.id_column, first_row))
+            first_row += len(chunk)
+            if len(in_flight) >= 2 * workers:
+                write_oldest()
+        while in_flight:
+            write_oldest()
+    finally:
+        writer.close()
+        pool.shutdown(cancel_futures=True)
+
+    elapsed = time.monotonic() - started
+    print(f"Done: {rows_done:,} rows in {elapsed:.1f}s ({rows_done / max(elapsed, 1e-9):,.0f} rows/s) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+import argparse
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# Hyperparameter search for the completion model with k-fold cross-validation:
+#
+#   python search_hyperparameters.py synth_data_set_v2.csv --folds 5 --workers 4 \
+#       --architectures 128,64,32 64,32 --learning-rates 0.001 0.0003 --batch-sizes 32 128 \
+#       --class-weights none balanced
+#
+# The test split of the training script (25%, seed 42, stratified) is held out;
+# the folds are made from the rest. Each fold is preprocessed once, with a
+# preprocessor fitted on its own training rows, and cached as .npy files that
+# trials memory-map, so parallel trials share one copy in the page cache.
+# Trials run in spawned processes with their thread counts limited.
+
+THREAD_LIMIT_VARIABLES = (
+    "OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+    "TF_NUM_INTRAOP_THREADS", "TF_NUM_INTEROP_THREADS",
+)
+FOLD_ARRAYS = ("X_train", "y_train", "X_val", "y_val")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Cross-validated hyperparameter search for the completion model")
+    parser.add_argument("data", nargs="?", default="synth_data_set_v2.csv", help="Training CSV")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--architectures", nargs="+", default=["128,64,32", "64,32", "256,128,64"],
+                        help="Hidden layer sizes, comma separated")
+    parser.add_argument("--dropouts", nargs="+", type=float, default=[0.3])
+    parser.add_argument("--learning-rates", nargs="+", type=float, default=[0.001, 0.0003])
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[32, 128])
+    parser.add_argument("--class-weights", nargs="+", default=["none", "balanced"],
+                        help="none, balanced or NEGATIVE:POSITIVE weights such as 3:1")
+    parser.add_argument("--max-trials", type=int, help="Random sample of this many configurations from the grid")
+    parser.add_argument("--epochs", type=int, default=100)
+    parser.add_argument("--patience", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--test-size", type=float, default=0.25)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cache-dir", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), ".fold_cache"))
+    parser.add_argument("--output", default="hyperparameter_search.json", help="Ranked report (JSON)")
+    return parser.parse_args()
+
+
+def trial_grid(args) -> list:
+    grid = [
+        {
+            "hidden_units": [int(units) for units in architecture.split(",")],
+            "dropout": dropout,
+            "learning_rate": learning_rate,
+            "batch_size": batch_size,
+            "class_weight": class_weight,
+        }
+        for architecture, dropout, learning_rate, batch_size, class_weight in itertools.product(
+            args.architectures, args.dropouts, args.learning_rates, args.batch_sizes, args.class_weights,
+        )
+    ]
+    if args.max_trials is not None and args.max_trials < len(grid):
+        grid = random.Random(args.seed).sample(grid, args.max_trials)
+    return grid
+
+
+def class_weights(spec: str, y_train: np.ndarray):
+    if spec == "none":
+        return None
+    if spec == "balanced":
+        counts = np.bincount(y_train.astype(int), minlength=2)
+        return {label: len(y_train) / (2 * max(count, 1)) for label, count in enumerate(counts)}
+    negative, positive = spec.split(":")
+    return {0: float(negative), 1: float(positive)}
+
+
+def fold_cache_dir(args) -> str:
+    # Keyed by the data file and everything that decides the folds
+    stat = os.stat(args.data)
+    key = f"{os.path.abspath(args.data)}:{stat.st_size}:{stat.st_mtime_ns}:{args.folds}:{args.test_size}:{args.seed}"
+    return os.path.join(args.cache_dir, hashlib.sha1(key.encode()).hexdigest()[:16])
+
+
+def prepare_folds(args) -> str:
+    from sklearn.base import clone
+    from sklearn.model_selection import StratifiedKFold, train_test_split
+    from training_task_completion_model import preprocess_data
+
+    directory = fold_cache_dir(args)
+    if os.path.exists(os.path.join(directory, "folds.json")):
+        print(f"Using cached folds in {directory}")
+        return directory
+
+    started = time.monotonic()
+    X, y, preprocessor = preprocess_data(pd.read_csv(args.data))
+    X_search, _, y_search, _ = train_test_split(X, y, test_size=args.test_size, random_state=args.seed, stratify=y)
+    # Written to a temporary directory and renamed, so an interrupted run leaves no partial cache
+    tmp_directory = f"{directory}.{os.getpid()}.tmp"
+    os.makedirs(tmp_directory, exist_ok=True)
+    splitter = StratifiedKFold(n_splits=args.folds, shuffle=True, random_state=args.seed)
+    for fold, (train_index, val_index) in enumerate(splitter.split(X_search, y_search)):
+        fold_preprocessor = clone(preprocessor).fit(X_search.iloc[train_index])
+        arrays = {
+            "X_train": fold_preprocessor.transform(X_search.iloc[train_index]),
+            "y_train": y_search.iloc[train_index].to_numpy(),
+            "X_val": fold_preprocessor.transform(X_search.iloc[val_index]),
+            "y_val": y_search.iloc[val_index].to_numpy(),
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_directory, f"fold{fold}_{name}.npy"), np.ascontiguousarray(array, dtype=np.float32))
+    with open(os.path.join(tmp_directory, "folds.json"), "w") as f:
+        json.dump({"data": os.path.abspath(args.data), "folds": args.folds, "rows": len(X_search)}, f)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp_directory, directory)
+    print(f"Preprocessed {args.folds} folds of {len(X_search):,} rows into {directory} "
+          f"in {time.monotonic() - started:.1f}s")
+    return directory
+
+
+def load_fold(directory: str, fold: int) -> dict:
+    return {name: np.load(os.path.join(directory, f"fold{fold}_{name}.npy"), mmap_mode="r") for name in FOLD_ARRAYS}
+
+
+def run_trial(trial_id: int, params: dict, fold_directory: str, folds: int, epochs: int, patience: int, seed: int):
+    # In a pool process: trains and scores one configuration on every fold
+    import tensorflow as tf
+    from sklearn.metrics import accuracy_score, f1_score, log_loss, roc_auc_score
+    from tensorflow.keras.callbacks import EarlyStopping
+    from training_task_completion_model import build_model
+
+    tf.keras.utils.set_random_seed(seed)
+    started = time.monotonic()
+    fold_scores = []
+    for fold in range(folds):
+        arrays = load_fold(fold_directory, fold)
+        model = build_model(
+            arrays["X_train"].shape[1], params["hidden_units"], params["dropout"], params["learning_rate"],
+        )
+        history = model.fit(
+            arrays["X_train"],
+            arrays["y_train"],
+            epochs=epochs,
+            batch_size=params["batch_size"],
+            validation_data=(arrays["X_val"], arrays["y_val"]),
+            class_weight=class_weights(params["class_weight"], np.asarray(arrays["y_train"])),
+            callbacks=[EarlyStopping(monitor='val_loss', patience=patience, restore_best_weights=True)],
+            verbose=0,
+        )
+        y_val = np.asarray(arrays["y_val"])
+        probabilities = model.predict(arrays["X_val"], batch_size=4096, verbose=0).reshape(-1)
+        predictions = (probabilities > 0.5).astype(int)
+        fold_scores.append({
+            "auc": float(roc_auc_score(y_val, probabilities)),
+            "log_loss": float(log_loss(y_val, probabilities.astype(np.float64))),
+            "accuracy": float(accuracy_score(y_val, predictions)),
+            "f1": float(f1_score(y_val, predictions, zero_division=0)),
+            "epochs": len(history.history["loss"]),
+        })
+        tf.keras.backend.clear_session()
+
+    summary = {"trial": trial_id, "params": params, "folds": fold_scores, "seconds": time.monotonic() - started}
+    for metric in ("auc", "log_loss", "accuracy", "f1"):
+        values = [scores[metric] for scores in fold_scores]
+        summary[f"mean_{metric}"] = float(np.mean(values))
+        summary[f"std_{metric}"] = float(np.std(values))
+    return summary
+
+
+def describe(params: dict) -> str:
+    return (f"{'-'.join(map(str, params['hidden_units']))} dropout {params['dropout']} "
+            f"lr {params['learning_rate']} batch {params['batch_size']} weights {params['class_weight']}")
+
+
+def main():
+    args = parse_args()
+    # Set before any process imports NumPy/TensorFlow; spawned trial processes
+    # inherit them, so N workers use N * threads_per_worker cores
+    for variable in THREAD_LIMIT_VARIABLES:
+        os.environ[variable] = str(args.threads_per_worker)
+
+    fold_directory = prepare_folds(args)
+    trials = trial_grid(args)
+    workers = max(1, min(args.workers, len(trials)))
+    print(f"Running {len(trials)} trials x {args.folds} folds on {workers} worker(s)")
+
+    started = time.monotonic()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = {
+            pool.submit(run_trial, trial_id, params, fold_directory, args.folds, args.epochs, args.patience, args.seed):
+                trial_id
+            for trial_id, params in enumerate(trials)
+        }
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            print(f"[{len(results)}/{len(trials)}] {describe(result['params'])}: "
+                  f"AUC {result['mean_auc']:.4f} +/- {result['std_auc']:.4f}, "
+                  f"log loss {result['mean_log_loss']:.4f} ({result['seconds']:.0f}s)")
+
+    # Ranked by mean validation AUC, ties broken by log loss
+    results.sort(key=lambda result: (-result["mean_auc"], result["mean_log_loss"]))
+    for rank, result in enumerate(results, 1):
+        result["rank"] = rank
+    elapsed = time.monotonic() - started
+
+    print(f"\nRanked results ({args.folds}-fold CV, {elapsed:.0f}s):")
+    print(f"{'rank':>4}  {'auc':>13}  {'log loss':>8}  {'accuracy':>8}  {'f1':>6}  configuration")
+    for result in results:
+        print(f"{result['rank']:>4}  {result['mean_auc']:.4f}+/-{result['std_auc']:.4f}  "
+              f"{result['mean_log_loss']:>8.4f}  {result['mean_accuracy']:>8.4f}  {result['mean_f1']:>6.4f}  "
+              f"{describe(result['params'])}")
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "data": os.path.abspath(args.data),
+            "folds": args.folds,
+            "seed": args.seed,
+            "workers": workers,
+            "threads_per_worker": args.threads_per_worker,
+            "seconds": elapsed,
+            "results": results,
+        }, f, indent=2)
+    print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
+import argparse
 import pandas as pd
 import numpy as np
 import random
 import os
+import sys
 
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import (
@@ -13,6 +15,7 @@ from sklearn.metrics import (
 )
 from sklearn.preprocessing import OneHotEncoder, StandardScaler
 from sklearn.compose import ColumnTransformer
+from sklearn.linear_model import LogisticRegression
 import joblib
 
 import tensorflow as tf
@@ -22,6 +25,15 @@ from tensorflow.keras.optimizers import Adam
 from tensorflow.keras.callbacks import EarlyStopping
 import matplotlib.pyplot as plt
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from app.models.backend_comparison import backend_comparison_report
+from app.models.drift_monitor import save_reference_stats
+from app.models.feature_builder import FeatureBuilder
+from app.models.inference_bundle import BUNDLE_PRECISIONS, export_inference_bundle, precision_bundle_path
+from app.models.linear_model import export_linear_model
+from app.models.precision_parity import precision_parity_report
+from app.models.model_registry import ModelArtifacts, publish_model_version
+
 
 random.seed(42)
 np.random.seed(42)
@@ -30,8 +42,16 @@ tf.random.set_seed(42)
 MODEL_SAVE_DIR = "../app/models/trained_models"
 MODEL_FILENAME = "task_completion_prediction_model_nn.keras"
 PREPROCESSOR_FILENAME = "preprocessor_nn.pkl"
+BUNDLE_FILENAME = "task_completion_prediction_model_nn.npz"
+LINEAR_MODEL_FILENAME = "task_completion_prediction_model_linear.npz"
+REFERENCE_STATS_FILENAME = "reference_stats.json"
 MODEL_PATH = os.path.join(MODEL_SAVE_DIR, MODEL_FILENAME)
 PREPROCESSOR_PATH = os.path.join(MODEL_SAVE_DIR, PREPROCESSOR_FILENAME)
+BUNDLE_PATH = os.path.join(MODEL_SAVE_DIR, BUNDLE_FILENAME)
+LINEAR_MODEL_PATH = os.path.join(MODEL_SAVE_DIR, LINEAR_MODEL_FILENAME)
+REFERENCE_STATS_PATH = os.path.join(MODEL_SAVE_DIR, REFERENCE_STATS_FILENAME)
+PARITY_REPORT_PATH = os.path.join(MODEL_SAVE_DIR, "precision_parity.json")
+BACKEND_REPORT_PATH = os.path.join(MODEL_SAVE_DIR, "backend_comparison.json")
 
 def preprocess_data(df):
     print("Preprocessing data...")
@@ -66,21 +86,26 @@ def preprocess_data(df):
 
     return X_num_cat, y, preprocessor
 
-def build_and_train_model(X_train, y_train, input_dim):
-    print("Building and training a more complex neural network...")
-
+def build_model(input_dim, hidden_units=(128, 64, 32), dropout=0.3, learning_rate=0.001):
+    # Batch norm after the first hidden layer, dropout after all but the last
     features_input = Input(shape=(input_dim,), name='features')
-    x = Dense(128, activation='relu')(features_input)
-    x = BatchNormalization()(x)
-    x = Dropout(0.3)(x)
-    x = Dense(64, activation='relu')(x)
-    x = Dropout(0.3)(x)
-    x = Dense(32, activation='relu')(x)
+    x = features_input
+    for i, units in enumerate(hidden_units):
+        x = Dense(units, activation='relu')(x)
+        if i == 0:
+            x = BatchNormalization()(x)
+        if i < len(hidden_units) - 1:
+            x = Dropout(dropout)(x)
     output = Dense(1, activation='sigmoid')(x)
 
     model = Model(inputs=features_input, outputs=output)
-    model.compile(optimizer=Adam(learning_rate=0.001), loss='binary_crossentropy', metrics=['accuracy'])
+    model.compile(optimizer=Adam(learning_rate=learning_rate), loss='binary_crossentropy', metrics=['accuracy'])
+    return model
 
+def build_and_train_model(X_train, y_train, input_dim):
+    print("Building and training a more complex neural network...")
+
+    model = build_model(input_dim)
     early_stopping = EarlyStopping(monitor='val_loss', patience=15, restore_best_weights=True)
 
     history = model.fit(
@@ -117,15 +142,53 @@ def evaluate_model(model, preprocessor, X_test, y_test):
     print("\nConfusion Matrix:")
     print(cm)
 
-def save_model_and_preprocessor(model, preprocessor):
+def train_linear_model(X_train, y_train):
+    # Logistic regression on the same features, served by the "linear" backend
+    print("Training the logistic regression fallback...")
+    linear_model = LogisticRegression(max_iter=1000)
+    linear_model.fit(X_train, y_train)
+    return linear_model
+
+def save_model_and_preprocessor(model, preprocessor, linear_model=None, reference_data=None):
     print("Saving model and preprocessor...")
     os.makedirs(MODEL_SAVE_DIR, exist_ok=True)
     model.save(MODEL_PATH)
     joblib.dump(preprocessor, PREPROCESSOR_PATH)
+    # Scaler and one-hot folded into the network, servable without sklearn/TensorFlow;
+    # also with float16 and int8 weights (TASKR_BUNDLE_PRECISION picks one at load)
+    for precision in BUNDLE_PRECISIONS:
+        export_inference_bundle(model, preprocessor, precision_bundle_path(BUNDLE_PATH, precision), precision)
     print(f"Neural network model saved to {MODEL_PATH}")
     print(f"Preprocessor saved to {PREPROCESSOR_PATH}")
+    print(f"Inference bundles saved to {BUNDLE_PATH} ({', '.join(BUNDLE_PRECISIONS)})")
+    if linear_model is not None:
+        export_linear_model(linear_model, preprocessor, LINEAR_MODEL_PATH)
+        print(f"Linear model saved to {LINEAR_MODEL_PATH}")
+    if reference_data is not None:
+        # Feature distributions of the training rows, which the service's drift monitor compares traffic with
+        save_reference_stats(FeatureBuilder.from_preprocessor(preprocessor).encode_frame(reference_data),
+                             REFERENCE_STATS_PATH)
+        print(f"Reference stats of {len(reference_data)} rows saved to {REFERENCE_STATS_PATH}")
+
+def publish_trained_model(with_linear_model: bool, with_reference_stats: bool, activate: bool = False):
+    # Inactive unless asked for: running services only switch to it once it is
+    # activated (admin /model/reload, or the candidate's shadow/canary first).
+    # With activate=True they pick it up through their registry watch
+    version = publish_model_version(
+        MODEL_PATH, PREPROCESSOR_PATH, BUNDLE_PATH,
+        activate=activate,
+        linear_model_path=LINEAR_MODEL_PATH if with_linear_model else None,
+        reference_stats_path=REFERENCE_STATS_PATH if with_reference_stats else None,
+    )
+    print(f"Published as model version {version}" + (" (active)" if activate else " (not active)"))
+    return version
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the task completion model")
+    parser.add_argument("--activate", action="store_true",
+                        help="Make the published version the active one, which running services switch to")
+    args = parser.parse_args()
+
     raw_data = pd.read_csv("synth_data_set_v2.csv")
 
     X_num_cat, y, preprocessor = preprocess_data(raw_data)
@@ -167,4 +230,9 @@ if __name__ == "__main__":
         X_test, y_test
     )
 
-    save_model_and_preprocessor(trained_model, preprocessor)
+    linear_model = train_linear_model(X_train_processed, y_train)
+
+    save_model_and_preprocessor(trained_model, preprocessor, linear_model, X_train)
+    precision_parity_report(trained_model, preprocessor, X_test, y_test, BUNDLE_PATH, PARITY_REPORT_PATH)
+    backend_comparison_report(ModelArtifacts("trained", MODEL_SAVE_DIR), X_test, y_test, output=BACKEND_REPORT_PATH)
+    publish_trained_model(with_linear_model=True, with_reference_stats=True, activate=args.activate)
@@ -0,0 +1,92 @@
+import argparse
+import os
+import sys
+
+from sklearn.linear_model import SGDClassifier
+from tensorflow.keras.callbacks import EarlyStopping
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from app.models.backend_comparison import backend_comparison_report
+from app.models.model_registry import ModelArtifacts
+from app.models.precision_parity import precision_parity_report
+from app.models.streaming_training import (
+    SplitPlan, fit_streaming_preprocessor, list_shards, throughput_logger, training_dataset,
+)
+from training_task_completion_model import (
+    BACKEND_REPORT_PATH, BUNDLE_PATH, MODEL_SAVE_DIR, PARITY_REPORT_PATH, build_model, evaluate_model,
+    publish_trained_model, save_model_and_preprocessor,
+)
+
+# Out-of-core variant of training_task_completion_model.py for task histories
+# that do not fit in memory. Same network, preprocessor and saved artifacts:
+#
+#   python training_task_completion_model_streaming.py 'shards/*.parquet' --batch-size 1024
+#
+# Nothing holds more than a few chunks of the data, except the test sample
+# used for evaluation (--eval-rows).
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the task completion model from CSV/Parquet shards")
+    parser.add_argument("shards", nargs="+", help="CSV/Parquet files, directories or glob patterns")
+    parser.add_argument("--chunk-rows", type=int, default=100_000, help="Rows read from a shard at a time")
+    parser.add_argument("--batch-size", type=int, default=1024)
+    parser.add_argument("--epochs", type=int, default=30)
+    parser.add_argument("--patience", type=int, default=3)
+    parser.add_argument("--test-fraction", type=float, default=0.25)
+    parser.add_argument("--validation-fraction", type=float, default=0.2)
+    parser.add_argument("--eval-rows", type=int, default=250_000, help="Test rows kept in memory for evaluation")
+    parser.add_argument("--parallel-shards", type=int, help="Shards read concurrently (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--activate", action="store_true",
+                        help="Make the published version the active one, which running services switch to")
+    return parser.parse_args()
+
+
+def train_linear_model(train, seed: int):
+    # The logistic regression fallback, fitted with SGD over one pass of the
+    # same training batches instead of LogisticRegression on an in-memory array
+    print("Training the logistic regression fallback...")
+    linear_model = SGDClassifier(loss="log_loss", alpha=1e-5, random_state=seed)
+    for X, y in train.as_numpy_iterator():
+        linear_model.partial_fit(X, y, classes=[0, 1])
+    return linear_model
+
+
+def main():
+    args = parse_args()
+    shards = list_shards(args.shards)
+    plan = SplitPlan(args.test_fraction, args.validation_fraction, args.seed, args.chunk_rows)
+    print(f"Training from {len(shards)} shard(s)")
+
+    fit = fit_streaming_preprocessor(shards, plan, args.eval_rows)
+    print(f"Completed on time in the training rows: {fit.positive_rate:.4f}")
+
+    train = training_dataset(shards, plan, fit.preprocessor, "train", args.batch_size, fit.split_rows["train"],
+                             shuffle=True, parallel_shards=args.parallel_shards)
+    validation = training_dataset(shards, plan, fit.preprocessor, "validation", args.batch_size,
+                                  fit.split_rows["validation"], parallel_shards=args.parallel_shards)
+
+    input_dim = len(fit.preprocessor.get_feature_names_out())
+    model = build_model(input_dim)
+    early_stopping = EarlyStopping(monitor='val_loss', patience=args.patience, restore_best_weights=True)
+    model.fit(
+        train,
+        validation_data=validation,
+        epochs=args.epochs,
+        callbacks=[early_stopping, throughput_logger(fit.split_rows["train"], fit.split_rows["validation"])],
+        verbose=2,
+    )
+
+    evaluate_model(model, fit.preprocessor, fit.X_test, fit.y_test)
+    linear_model = train_linear_model(train, args.seed)
+    # The training rows are never all in memory; the test sample has the same distribution
+    save_model_and_preprocessor(model, fit.preprocessor, linear_model, fit.X_test)
+    precision_parity_report(model, fit.preprocessor, fit.X_test, fit.y_test, BUNDLE_PATH, PARITY_REPORT_PATH)
+    backend_comparison_report(ModelArtifacts("trained", MODEL_SAVE_DIR), fit.X_test, fit.y_test,
+                              output=BACKEND_REPORT_PATH)
+    publish_trained_model(with_linear_model=True, with_reference_stats=True, activate=args.activate)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+
+import uvicorn
+
+from app.core import config
+from app.core.metrics import clear_multiprocess_dir, mark_process_dead
+from app.core.process_info import startup_report
+from app.models.task_prediction_model import load_task_prediction_model
+
+# Pre-fork server: the model is loaded once here and the uvicorn workers are
+# forked afterwards, so they share its memory copy-on-write and start serving
+# right away. `uvicorn --workers` spawns fresh interpreters instead, where
+# every worker imports and loads everything again.
+#
+# The TensorFlow runtime does not survive a fork (forked workers hang on their
+# first model call), so with the keras backend nothing is preloaded and every
+# worker loads its own model after the fork; the other backends are preloaded.
+#
+#   python serve.py --workers 4 --port 8000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the Taskr AI Microservice with a preloaded model")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=2)
+    return parser.parse_args()
+
+
+def run_worker(app, sock: socket.socket):
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, signal.SIG_DFL)
+    server = uvicorn.Server(uvicorn.Config(app, lifespan="on"))
+    server.run(sockets=[sock])
+
+
+def main():
+    args = parse_args()
+
+    if config.INFERENCE_EXECUTOR == "process":
+        print("Warning: the process executor loads a model per pool process, preloading only helps the thread executor")
+    preload = config.INFERENCE_BACKEND != "keras"
+    if not preload:
+        print("TensorFlow is not fork-safe: with the keras backend every worker loads its own model after the fork; "
+              "TASKR_INFERENCE_BACKEND=numpy or bundle share one preloaded copy")
+
+    # Metric files of an earlier run would be added to this one's
+    clear_multiprocess_dir()
+    if preload:
+        load_task_prediction_model()
+    from main import app
+    if not preload and "tensorflow" in sys.modules:
+        sys.exit("TensorFlow was imported before forking the workers, which would hang them")
+    print(startup_report(f"Pre-fork parent {os.getpid()}"))
+    # Move everything loaded so far out of the GC's reach so collections in the
+    # workers do not write to (and un-share) those pages
+    gc.collect()
+    gc.freeze()
+
+    # With proto=0 asyncio skips TCP_NODELAY on accepted connections, and
+    # keep-alive responses then stall ~40 ms on Nagle + delayed ACK
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    print(f"Listening on http://{args.host}:{args.port} with {args.workers} workers")
+
+    workers = set()
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(app, sock)
+            finally:
+                os._exit(0)
+        workers.add(pid)
+
+    def handle_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        # SIGINT from a terminal already reaches the whole process group
+        if signum == signal.SIGTERM:
+            for pid in workers:
+                os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGINT, handle_stop)
+    signal.signal(signal.SIGTERM, handle_stop)
+
+    for _ in range(max(1, args.workers)):
+        spawn()
+
+    while workers:
+        pid, status = os.wait()
+        workers.discard(pid)
+        mark_process_dead(pid)
+        if not stopping:
+            print(f"Worker {pid} exited with status {status}, starting a replacement")
+            spawn()
+
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from app.core import config
+from app.models.feature_builder import CATEGORICAL_FEATURES, NUMERICAL_FEATURES, FeatureBuilder
+from app.models.inference_bundle import InferenceBundle, export_inference_bundle
+from app.models.task_prediction_model import NumpyBackend, risk_codes
+
+keras = pytest.importorskip("tensorflow").keras
+
+# The NumPy backends against model.predict on a small network with the layout
+# of the training scripts: Dense(relu) -> BatchNormalization -> Dropout -> ...
+
+TASK_TYPES = ["bug", "feature", "chore", "research"]
+TOLERANCE = 1e-5
+
+
+def task_frame(n_rows: int, rng: np.random.Generator) -> pd.DataFrame:
+    data = pd.DataFrame(rng.lognormal(1.0, 0.8, size=(n_rows, len(NUMERICAL_FEATURES))), columns=NUMERICAL_FEATURES)
+    data["priority"] = rng.integers(1, 4, size=n_rows)
+    data["task_type"] = rng.choice(TASK_TYPES, size=n_rows)
+    return data
+
+
+@pytest.fixture(scope="module")
+def trained():
+    from sklearn.compose import ColumnTransformer
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    rng = np.random.default_rng(0)
+    keras.utils.set_random_seed(0)
+    data = task_frame(512, rng)
+    preprocessor = ColumnTransformer(transformers=[
+        ('num', StandardScaler(), NUMERICAL_FEATURES),
+        ('cat', OneHotEncoder(handle_unknown='ignore'), CATEGORICAL_FEATURES),
+    ])
+    X = preprocessor.fit_transform(data)
+
+    features_input = keras.Input(shape=(X.shape[1],), name='features')
+    x = keras.layers.Dense(16, activation='relu')(features_input)
+    x = keras.layers.BatchNormalization()(x)
+    x = keras.layers.Dropout(0.3)(x)
+    x = keras.layers.Dense(8, activation='relu')(x)
+    output = keras.layers.Dense(1, activation='sigmoid')(x)
+    model = keras.Model(inputs=features_input, outputs=output)
+
+    # Moving statistics far from the identity, so a wrong fold shows
+    batch_norm = model.layers[2]
+    gamma, beta, moving_mean, moving_variance = batch_norm.get_weights()
+    batch_norm.set_weights([
+        rng.uniform(0.5, 2.0, gamma.shape), rng.normal(0.0, 0.5, beta.shape),
+        rng.uniform(0.0, 1.0, moving_mean.shape), rng.uniform(0.2, 3.0, moving_variance.shape),
+    ])
+    return model, preprocessor
+
+
+def test_numpy_and_bundle_match_keras(trained, tmp_path):
+    model, preprocessor = trained
+    data = task_frame(1000, np.random.default_rng(1))
+    feature_builder = FeatureBuilder.from_preprocessor(preprocessor)
+    features = feature_builder.encode_frame(data)
+    reference = model.predict(preprocessor.transform(data), verbose=0).reshape(-1)
+
+    bundle_path = str(tmp_path / "model.npz")
+    export_inference_bundle(model, preprocessor, bundle_path, "float32")
+    bundle = InferenceBundle.load(bundle_path)
+    candidates = {
+        "numpy": NumpyBackend.from_keras(model, feature_builder).predict(features),
+        "bundle": bundle.predict(bundle.feature_builder.encode_frame(data)),
+    }
+
+    for name, predictions in candidates.items():
+        np.testing.assert_allclose(predictions, reference, rtol=0, atol=TOLERANCE, err_msg=name)
+        disagreements = risk_codes(predictions, config.RISK_THRESHOLDS) != risk_codes(reference, config.RISK_THRESHOLDS)
+        assert not disagreements.any(), f"{name}: {int(disagreements.sum())} risk bucket disagreements"